@@ -13,6 +13,12 @@ def main():
         host=settings.host,
         port=settings.port,
         reload=settings.debug,
+        # reload模式只支持单进程
+        workers=1 if settings.debug else settings.server_workers,
+        loop=settings.server_loop,
+        http=settings.server_http,
+        backlog=settings.server_backlog,
+        access_log=settings.server_access_log,
         log_level=settings.log_level.lower()
     )
 
@@ -3,13 +3,14 @@ Async Execution Layer Package
 """
 
 from .message_queue import MessageQueue, celery_app, message_queue
+from .batch_dispatcher import BatchedCeleryDispatcher
 from .worker_manager import WorkerManager, worker_manager
 from .tasks import (
     process_user_task, send_a2a_request, process_a2a_response
 )
 
 __all__ = [
-    "MessageQueue", "celery_app", "message_queue",
+    "MessageQueue", "celery_app", "message_queue", "BatchedCeleryDispatcher",
     "WorkerManager", "worker_manager", 
     "process_user_task", "send_a2a_request", "process_a2a_response"
 ]
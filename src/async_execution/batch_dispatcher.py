@@ -0,0 +1,78 @@
+"""
+Batched Celery Dispatcher
+将短时间窗口内的多个任务提交合并为一次Celery group发布，减少Broker往返
+"""
+import asyncio
+import logging
+from typing import Any, List, Optional, Tuple
+
+from celery import group
+from celery.result import AsyncResult
+
+logger = logging.getLogger(__name__)
+
+
+class BatchedCeleryDispatcher:
+    """批量Celery任务分发器
+
+    调用方通过 submit() 提交任务参数并获得对应的 AsyncResult；
+    后台协程在合并窗口内收集请求，一次性以 group(...).apply_async() 发布，
+    再把每个子任务的 AsyncResult 分发回各自的等待方。
+    """
+
+    def __init__(self, task, window_seconds: float, max_batch: int):
+        self.task = task
+        self.window_seconds = window_seconds
+        self.max_batch = max(1, max_batch)
+        self._queue: Optional[asyncio.Queue] = None
+        self._drain_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def submit(self, payload: Any) -> AsyncResult:
+        """提交一个任务参数，返回该任务的 AsyncResult；发布失败时抛出异常"""
+        self._ensure_started()
+        future = self._loop.create_future()
+        self._queue.put_nowait((payload, future))
+        return await future
+
+    def _ensure_started(self):
+        """在当前事件循环上按需启动后台合并协程"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # 事件循环变化时（如测试或重启）重新绑定队列
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._drain_task = None
+        if self._drain_task is None or self._drain_task.done():
+            self._drain_task = loop.create_task(self._drain_loop())
+
+    async def _drain_loop(self):
+        """持续收集窗口内的提交并批量发布"""
+        while True:
+            batch = [await self._queue.get()]
+            if self.window_seconds > 0 and self._queue.empty():
+                await asyncio.sleep(self.window_seconds)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            await self._publish(batch)
+
+    async def _publish(self, batch: List[Tuple[Any, asyncio.Future]]):
+        """发布一批任务并将结果回填给各等待方"""
+        payloads = [payload for payload, _ in batch]
+        try:
+            group_result = await asyncio.to_thread(self._apply_group, payloads)
+        except Exception as e:
+            logger.error(f"❌ 批量提交Celery任务失败 ({len(batch)} 个): {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        logger.debug(f"📦 批量提交Celery任务: {len(batch)} 个")
+        for (_, future), result in zip(batch, group_result.results):
+            if not future.done():
+                future.set_result(result)
+
+    def _apply_group(self, payloads: List[Any]):
+        """在工作线程中同步发布group，避免阻塞事件循环"""
+        return group(self.task.s(payload) for payload in payloads).apply_async()
@@ -2,6 +2,7 @@
 Message Queue Service using Redis and Celery
 """
 from celery import Celery
+from celery.states import FAILURE, READY_STATES
 from config.settings import settings
 from src.config.agent_config import agent_config
 import logging
@@ -28,6 +29,8 @@ celery_app.conf.update(
     worker_prefetch_multiplier=1,
     task_acks_late=True,
     worker_max_tasks_per_child=1000,
+    # 允许通过广播控制消息 pool_restart 重启Worker进程池
+    worker_pool_restarts=True,
 )
 
 
@@ -55,12 +58,14 @@ class MessageQueue:
     def get_task_result(self, task_id: str):
         """获取任务结果"""
         try:
-            result = self.celery.AsyncResult(task_id)
+            # 一次取回任务元数据，不构造AsyncResult，也不逐个属性访问结果后端
+            meta = self.celery.backend.get_task_meta(task_id)
+            status = meta.get("status", "PENDING")
             return {
                 "id": task_id,
-                "status": result.status,
-                "result": result.result if result.ready() else None,
-                "error": result.traceback if result.failed() else None
+                "status": status,
+                "result": meta.get("result") if status in READY_STATES else None,
+                "error": meta.get("traceback") if status == FAILURE else None
             }
         except Exception as e:
             logger.error(f"Failed to get task result {task_id}: {e}")
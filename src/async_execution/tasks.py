@@ -3,6 +3,7 @@ Background Tasks for Async Execution
 """
 from celery import current_task
 from .message_queue import celery_app
+from .batch_dispatcher import BatchedCeleryDispatcher
 from src.config.agent_config import agent_config
 from src.external_services import LLMService, zhipu_a2a_client
 from src.data_persistence import (
@@ -708,3 +709,11 @@ def _process_file_processing_task(task_data: Dict[str, Any]) -> Dict[str, Any]:
         "requires_agent": True,
         "agent_capability": "file_processing"
     }
+
+
+# A2A请求批量分发器：合并短时间窗口内的请求，以单次group发布到Broker
+a2a_request_dispatcher = BatchedCeleryDispatcher(
+    process_a2a_request,
+    window_seconds=agent_config.celery_batch_window_ms / 1000,
+    max_batch=agent_config.celery_batch_max_size
+)
@@ -2,11 +2,44 @@
 Celery Worker Application Entry Point
 确保所有任务都被正确导入和注册
 """
+import os
+import socket
+import time
+
+from celery.signals import worker_init, worker_process_init, worker_ready
+
+from src.config.agent_config import agent_config
 from .message_queue import celery_app
+from .worker_manager import mark_worker_ready
 
 # 显式导入所有任务模块以确保它们被注册
 from . import tasks
 
+
+# 当前Worker节点名（如 worker_1@host），由主进程在启动时记录，prefork子进程fork后继承
+_node_name = None
+
+
+@worker_init.connect
+def remember_node_name(sender=None, **kwargs):
+    """记录Worker节点名，用于只统计参与重启的节点"""
+    global _node_name
+    _node_name = getattr(sender, "hostname", None)
+
+
+@worker_process_init.connect
+def report_worker_process_ready(**kwargs):
+    """Worker子进程（包括pool_restart后重建的子进程）初始化完成后上报就绪"""
+    mark_worker_ready(f"{socket.gethostname()}:{os.getpid()}", _node_name, time.time())
+
+
+@worker_ready.connect
+def report_worker_ready(**kwargs):
+    """非prefork执行池没有子进程，重启后由Worker主进程就绪时上报"""
+    if agent_config.worker_pool != "prefork":
+        mark_worker_ready(f"{socket.gethostname()}:{os.getpid()}", _node_name, time.time())
+
+
 # 确保所有任务都被注册到celery_app
 def register_tasks():
     """注册所有任务到Celery应用"""
@@ -4,13 +4,83 @@ Background Worker Manager
 import subprocess
 import signal
 import os
+import functools
 import logging
-from typing import List, Dict, Any
+import time
+import uuid
+import redis
+from typing import List, Dict, Any, Optional
 from config.settings import settings
 from src.config.agent_config import agent_config
+from .message_queue import celery_app
 
 logger = logging.getLogger(__name__)
 
+# Worker重启进度记录：restart:<id> 保存发起信息，restart:<id>:ready 记录已就绪的Worker进程，
+# restart:<id>:nodes 记录重启时在线的Worker节点（只统计这些节点的进程）；
+# pool_restart模式下expected和nodes由后台的 track_restart() 补充
+_RESTART_KEY_PREFIX = "worker_restart:"
+_RESTART_CURRENT_KEY = "worker_restart:current"
+_RESTART_KEY_TTL = 3600
+
+
+@functools.cache
+def _restart_redis() -> redis.Redis:
+    """记录Worker重启进度用的Redis客户端"""
+    return redis.Redis.from_url(settings.redis_url, decode_responses=True)
+
+
+def mark_worker_ready(worker_id: str, node_name: Optional[str] = None, started_at: Optional[float] = None):
+    """Worker进程就绪时调用：若存在进行中的重启，则记录该进程已就绪
+
+    只统计重启发起之后启动、且属于广播时在线节点的进程；就绪数量达到预期后结束本次重启。
+    """
+    started_at = started_at or time.time()
+    try:
+        client = _restart_redis()
+        restart_id = client.get(_RESTART_CURRENT_KEY)
+        if not restart_id:
+            return
+        info_key = f"{_RESTART_KEY_PREFIX}{restart_id}"
+        initiated_at, expected = client.hmget(info_key, "initiated_at", "expected")
+        if initiated_at is None or started_at < float(initiated_at):
+            return
+        nodes_key = f"{info_key}:nodes"
+        if node_name and client.exists(nodes_key) and not client.sismember(nodes_key, node_name):
+            return
+        
+        ready_key = f"{info_key}:ready"
+        pipe = client.pipeline()
+        pipe.sadd(ready_key, worker_id)
+        pipe.expire(ready_key, _RESTART_KEY_TTL)
+        pipe.scard(ready_key)
+        ready = pipe.execute()[-1]
+        # 预期数量尚未统计完成时不结束重启
+        if expected is not None:
+            _complete_restart_if_ready(client, restart_id, ready, int(expected))
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to report worker ready: {e}")
+
+
+def _complete_restart_if_ready(client: redis.Redis, restart_id: str, ready: int, expected: int):
+    """就绪数量达到预期时结束本次重启，之后启动的进程不再计入"""
+    if ready >= expected and client.get(_RESTART_CURRENT_KEY) == restart_id:
+        client.delete(_RESTART_CURRENT_KEY)
+
+
+def _live_pool_processes() -> Dict[str, Dict[str, Any]]:
+    """查询在线Worker节点的进程池信息：{节点名: {"processes": 进程池大小, "implementation": 执行池实现}}"""
+    stats = celery_app.control.inspect(timeout=1.0).stats() or {}
+    pools = {}
+    for node, node_stats in stats.items():
+        pool = node_stats.get("pool") or {}
+        # 进程池重建期间processes列表可能不完整，优先使用配置的进程池大小
+        pools[node] = {
+            "processes": int(pool.get("max-concurrency") or 0) or len(pool.get("processes") or []),
+            "implementation": str(pool.get("implementation", ""))
+        }
+    return pools
+
 
 class WorkerManager:
     """后台Worker管理器"""
@@ -18,6 +88,7 @@ class WorkerManager:
     def __init__(self):
         self.worker_processes: List[subprocess.Popen] = []
         self.is_running = False
+        self._worker_seq = 0  # Worker编号，保证hostname不重复
     
     def start_workers(self, worker_count: int = None, queues: List[str] = None):
         """启动Worker进程"""
@@ -31,29 +102,7 @@ class WorkerManager:
         
         try:
             for i in range(worker_count):
-                worker_name = f"worker_{i+1}"
-                
-                # 构建Celery worker命令 - 使用worker_app模块确保任务被正确导入
-                # 使用配置文件中的并发度设置
-                cmd = [
-                    "celery",
-                    "-A", "src.async_execution.worker_app:celery_app",
-                    "worker",
-                    "--loglevel=info",
-                    f"--hostname={worker_name}@%h",
-                    f"--queues={','.join(queues)}",
-                    f"--concurrency={agent_config.worker_concurrency}"  # 使用配置文件中的并发设置
-                ]
-                
-                # 启动Worker进程
-                process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE
-                )
-                
-                self.worker_processes.append(process)
-                logger.info(f"Started worker {worker_name} with PID {process.pid}")
+                self._spawn_worker(queues)
             
             self.is_running = True
             logger.info(f"Started {worker_count} workers successfully")
@@ -63,12 +112,38 @@ class WorkerManager:
             self.stop_workers()
             raise
     
-    def stop_workers(self):
-        """停止所有Worker进程"""
-        if not self.is_running:
-            return
+    def _spawn_worker(self, queues: List[str]) -> subprocess.Popen:
+        """启动单个Worker进程"""
+        self._worker_seq += 1
+        worker_name = f"worker_{self._worker_seq}"
+        
+        # 构建Celery worker命令 - 使用worker_app模块确保任务被正确导入
+        # 使用配置文件中的并发度设置
+        cmd = [
+            "celery",
+            "-A", "src.async_execution.worker_app:celery_app",
+            "worker",
+            "--loglevel=info",
+            f"--hostname={worker_name}@%h",
+            f"--queues={','.join(queues)}",
+            f"--concurrency={agent_config.worker_concurrency}",  # 使用配置文件中的并发设置
+            f"--pool={agent_config.worker_pool}"
+        ]
+        
+        # 启动Worker进程
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
         
-        for process in self.worker_processes:
+        self.worker_processes.append(process)
+        logger.info(f"Started worker {worker_name} with PID {process.pid}")
+        return process
+    
+    def _terminate(self, processes: List[subprocess.Popen]):
+        """终止指定的Worker进程并等待退出"""
+        for process in processes:
             try:
                 if process.poll() is None:  # 进程还在运行
                     process.terminate()
@@ -77,25 +152,145 @@ class WorkerManager:
                 logger.error(f"Failed to terminate worker {process.pid}: {e}")
         
         # 等待进程结束
-        for process in self.worker_processes:
+        for process in processes:
             try:
                 process.wait(timeout=agent_config.worker_termination_timeout)
             except subprocess.TimeoutExpired:
                 logger.warning(f"Force killing worker {process.pid}")
                 process.kill()
+    
+    def stop_workers(self):
+        """停止所有Worker进程"""
+        if not self.is_running:
+            return
         
+        self._terminate(self.worker_processes)
         self.worker_processes.clear()
+        self._worker_seq = 0
         self.is_running = False
         logger.info("All workers stopped")
     
-    def restart_workers(self, worker_count: int = None):
-        """重启Worker"""
+    @staticmethod
+    def supports_pool_restart() -> bool:
+        """Celery仅prefork执行池支持pool_restart远程控制命令"""
+        return agent_config.worker_pool == "prefork"
+    
+    def restart_workers(self, worker_count: int = None) -> str:
+        """发起Worker重启，立即返回restart_id
+
+        prefork执行池：广播pool_restart，各Worker重建进程池，本进程托管的Worker数量
+        由调用方另行通过 scale_workers() 调整；
+        其他执行池不支持pool_restart，只能由调用方通过 respawn_workers() 重启本进程托管的Worker，
+        未托管Worker时抛出RuntimeError。
+        进度由Worker进程通过 mark_worker_ready() 上报，使用 get_restart_status() 查询。
+        """
         logger.info("Restarting workers...")
         # 使用配置文件中的默认重启数量
         worker_count = worker_count or agent_config.worker_restart_count
+        pool_restart = self.supports_pool_restart()
+        if not pool_restart and not self.is_running:
+            raise RuntimeError(
+                f"Worker pool '{agent_config.worker_pool}' does not support pool_restart "
+                f"and no workers are managed by this process"
+            )
+        restart_id = uuid.uuid4().hex
+        
+        # 重新启动托管Worker时每个Worker主进程上报一次；
+        # pool_restart的预期进程数需要查询集群，由后台的 track_restart() 补充
+        info = {
+            "worker_count": worker_count,
+            "mode": "pool_restart" if pool_restart else "respawn",
+            "initiated_at": time.time()
+        }
+        if not pool_restart:
+            info["expected"] = worker_count
+        
+        client = _restart_redis()
+        info_key = f"{_RESTART_KEY_PREFIX}{restart_id}"
+        pipe = client.pipeline()
+        pipe.hset(info_key, mapping=info)
+        pipe.expire(info_key, _RESTART_KEY_TTL)
+        pipe.set(_RESTART_CURRENT_KEY, restart_id, ex=_RESTART_KEY_TTL)
+        pipe.execute()
+        
+        if pool_restart:
+            # 一条广播控制消息通知所有Worker重启进程池并重新加载任务模块，不等待回复
+            celery_app.control.broadcast("pool_restart", arguments={"reload": True}, reply=False)
+        return restart_id
+    
+    def track_restart(self, restart_id: str):
+        """pool_restart广播后在后台统计预期进程数和参与节点，并记录无法执行pool_restart的节点"""
+        try:
+            pools = _live_pool_processes()
+            for node, pool in pools.items():
+                if pool["implementation"] and "prefork" not in pool["implementation"]:
+                    logger.error(
+                        f"pool_restart is not supported on {node} "
+                        f"(pool: {pool['implementation']}), it will not report ready"
+                    )
+            expected = sum(pool["processes"] for pool in pools.values())
+            
+            client = _restart_redis()
+            info_key = f"{_RESTART_KEY_PREFIX}{restart_id}"
+            pipe = client.pipeline()
+            pipe.hset(info_key, "expected", expected)
+            if pools:
+                pipe.sadd(f"{info_key}:nodes", *pools)
+                pipe.expire(f"{info_key}:nodes", _RESTART_KEY_TTL)
+            pipe.scard(f"{info_key}:ready")
+            ready = pipe.execute()[-1]
+            _complete_restart_if_ready(client, restart_id, ready, expected)
+        except Exception as e:
+            logger.error(f"Failed to track worker restart {restart_id}: {e}")
+    
+    def respawn_workers(self, worker_count: int):
+        """停止并重新启动本进程托管的Worker进程（非prefork执行池的重启方式）"""
         self.stop_workers()
         self.start_workers(worker_count)
     
+    def get_restart_status(self, restart_id: str) -> Optional[Dict[str, Any]]:
+        """查询一次重启的进度；restart_id不存在或已过期时返回None"""
+        client = _restart_redis()
+        pipe = client.pipeline()
+        pipe.hgetall(f"{_RESTART_KEY_PREFIX}{restart_id}")
+        pipe.smembers(f"{_RESTART_KEY_PREFIX}{restart_id}:ready")
+        info, ready = pipe.execute()
+        if not info:
+            return None
+        
+        # pool_restart的预期进程数由后台统计，统计完成前为None
+        expected = int(info["expected"]) if "expected" in info else None
+        return {
+            "restart_id": restart_id,
+            "status": "completed" if expected is not None and len(ready) >= expected else "initiated",
+            "worker_count": int(info["worker_count"]),
+            "mode": info.get("mode", "pool_restart"),
+            "expected_processes": expected,
+            "ready_processes": len(ready),
+            "ready_workers": sorted(ready),
+            "initiated_at": float(info["initiated_at"])
+        }
+    
+    def scale_workers(self, worker_count: int):
+        """将本进程托管的Worker进程数量调整到worker_count"""
+        if not self.is_running:
+            self.start_workers(worker_count)
+            return
+        
+        # 清理已退出的进程
+        self.worker_processes = [p for p in self.worker_processes if p.poll() is None]
+        current = len(self.worker_processes)
+        
+        if current < worker_count:
+            for _ in range(worker_count - current):
+                self._spawn_worker(agent_config.celery_queues)
+        elif current > worker_count:
+            surplus = self.worker_processes[worker_count:]
+            self.worker_processes = self.worker_processes[:worker_count]
+            self._terminate(surplus)
+        
+        logger.info(f"Worker count adjusted: {current} -> {worker_count}")
+    
     def get_worker_status(self) -> Dict[str, Any]:
         """获取Worker状态"""
         active_workers = []
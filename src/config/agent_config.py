@@ -43,6 +43,10 @@ class AgentConfig(BaseSettings):
         default=2,
         description="重启时的Worker数量"
     )
+    worker_pool: str = Field(
+        default="prefork",
+        description="Celery Worker执行池(prefork/threads/gevent/solo)，IO密集场景可用threads或gevent(需安装gevent)"
+    )
     
     # Worker队列配置
     celery_queues: List[str] = Field(
@@ -89,7 +93,17 @@ class AgentConfig(BaseSettings):
         default=3,
         description="Celery任务最大重试次数"
     )
-    
+
+    # Celery批量提交配置
+    celery_batch_window_ms: float = Field(
+        default=2.0,
+        description="A2A请求批量提交到Celery的合并窗口(毫秒)"
+    )
+    celery_batch_max_size: int = Field(
+        default=64,
+        description="单次批量提交到Celery的最大任务数"
+    )
+
     # Worker进程管理超时
     worker_termination_timeout: int = Field(
         default=10,
@@ -107,6 +121,20 @@ class AgentConfig(BaseSettings):
         default=60,
         description="长任务结果获取超时时间(秒)"
     )
+    task_result_poll_interval: float = Field(
+        default=0.05,
+        description="异步等待Celery任务结果时的轮询间隔(秒)"
+    )
+    
+    # 任务状态查询缓存（仅缓存已结束的任务）
+    task_status_cache_ttl: float = Field(
+        default=2.0,
+        description="已结束(SUCCESS/FAILURE)任务状态查询结果的缓存时间(秒)"
+    )
+    task_status_cache_max_entries: int = Field(
+        default=10000,
+        description="任务状态查询缓存的最大条目数"
+    )
     
     # ==================== 测试配置 ====================
     
@@ -167,7 +195,61 @@ class AgentConfig(BaseSettings):
         default=20.0,
         description="WebSocket ping超时(秒)"
     )
+    ws_receive_queue_size: int = Field(
+        default=64,
+        description="每个设备WebSocket连接的接收队列容量，队列满时文本数据等待、二进制数据丢弃"
+    )
+    
+    # ==================== A2A服务器配置 ====================
+
+    # 活跃任务记录上限
+    a2a_active_tasks_max_entries: int = Field(
+        default=10000,
+        description="A2A请求处理器保留的任务记录上限，超出时淘汰最早结束的任务"
+    )
+    a2a_active_tasks_ttl: float = Field(
+        default=3600.0,
+        description="A2A任务记录的保留时间(秒)，超过后无论是否结束都会被淘汰"
+    )
+    
+    # 路由结果合并缓存
+    a2a_route_cache_ttl: float = Field(
+        default=5.0,
+        description="相同消息路由结果的缓存时间(秒)，用于合并重复/并发的相同请求"
+    )
+    a2a_route_cache_max_entries: int = Field(
+        default=1024,
+        description="路由结果缓存的最大条目数"
+    )
     
+    # 请求体大小限制
+    a2a_max_request_bytes: int = Field(
+        default=256 * 1024,
+        description="A2A JSON-RPC及推送通知请求体的最大字节数，超出时直接返回413"
+    )
+
+    # ==================== 推送通知配置 ====================
+
+    # 任务状态批量写入
+    notification_batch_window_ms: float = Field(
+        default=20.0,
+        description="推送通知触发的任务状态更新合并写入窗口(毫秒)"
+    )
+    notification_batch_max_size: int = Field(
+        default=200,
+        description="单次批量写入的任务状态更新上限"
+    )
+    
+    # 重复通知去重
+    notification_dedup_size: int = Field(
+        default=16384,
+        description="推送通知去重缓冲的容量"
+    )
+    notification_dedup_ttl: float = Field(
+        default=300.0,
+        description="相同任务状态通知的去重时间窗口(秒)"
+    )
+
     # ==================== 终端设备配置 ====================
     
     # 终端设备数据限制
@@ -180,6 +262,30 @@ class AgentConfig(BaseSettings):
         description="终端设备操作超时时间(秒)"
     )
     
+    # 设备查询缓存
+    terminal_device_cache_ttl: float = Field(
+        default=5.0,
+        description="单个设备查询结果的缓存时间(秒)，设备注册/注销/状态变更时立即失效"
+    )
+    terminal_device_cache_max_entries: int = Field(
+        default=10000,
+        description="设备查询缓存的最大条目数"
+    )
+    terminal_device_list_cache_ttl: float = Field(
+        default=1.0,
+        description="设备列表快照的缓存时间(秒)"
+    )
+    
+    # 设备心跳批量写入
+    heartbeat_batch_window_ms: float = Field(
+        default=200.0,
+        description="设备心跳合并写入窗口(毫秒)"
+    )
+    heartbeat_batch_max_size: int = Field(
+        default=1000,
+        description="单次批量写入的设备心跳上限"
+    )
+    
     # ==================== 实用方法 ====================
     
     def get_celery_queue_routes(self) -> Dict[str, Dict[str, str]]:
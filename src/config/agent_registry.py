@@ -6,11 +6,60 @@ import json
 import os
 import logging
 import asyncio
-from typing import Dict, List, Optional, Any
-from datetime import datetime
+import threading
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, List, Optional, Any, Tuple, Mapping
+from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+# 动态获取的Agent信息缓存有效期
+_AGENT_INFO_TTL = timedelta(minutes=5)
+
+
+@dataclass(slots=True)
+class AgentRecord:
+    """注册表中单个Agent的类型化快照，供API层直接按属性读取"""
+    id: str
+    name: str
+    agent_card_url: str
+    url: Optional[str]
+    enabled: bool
+    added_at: Optional[str]
+    available: bool
+    description: str = ""
+    capabilities: Tuple[str, ...] = ()
+    tags: Tuple[str, ...] = ()
+    agent_card: Dict[str, Any] = field(default_factory=dict)
+    
+    @classmethod
+    def from_info(cls, agent_id: str, url_config: Dict[str, Any], agent_info: Optional[Dict[str, Any]]) -> "AgentRecord":
+        """根据URL配置和（可选的）动态Agent信息构建记录"""
+        if not agent_info:
+            return cls(
+                id=agent_id,
+                name=url_config.get('name', f"Agent {agent_id}"),
+                agent_card_url=url_config['agent_card_url'],
+                url=None,
+                enabled=url_config.get('enabled', True),
+                added_at=url_config.get('added_at'),
+                available=False
+            )
+        return cls(
+            id=agent_id,
+            name=agent_info.get('name', 'Unknown'),
+            agent_card_url=agent_info.get('agent_card_url', url_config['agent_card_url']),
+            url=agent_info.get('url'),
+            enabled=agent_info.get('enabled', True),
+            added_at=agent_info.get('added_at'),
+            available=True,
+            description=agent_info.get('description') or "",
+            capabilities=tuple(agent_info.get('capabilities', ())),
+            tags=tuple(agent_info.get('tags', ())),
+            agent_card=agent_info.get('agent_card', {})
+        )
+
 class SimpleAgentRegistry:
     """
     简单A2A Agent注册表
@@ -28,6 +77,16 @@ class SimpleAgentRegistry:
         
         self.agent_urls: Dict[str, Dict[str, Any]] = {}  # 存储配置的URL信息
         self.agent_cache: Dict[str, Dict[str, Any]] = {}  # 缓存动态获取的Agent信息
+        self._by_card_url: Dict[str, str] = {}  # agent_card_url -> agent_id 索引
+        self._records: Dict[str, AgentRecord] = {}  # agent_id -> 当前记录
+        # 倒排索引: capability/tag -> 有序的agent_id集合（dict保留插入顺序）
+        self._cap_idx: Dict[str, Dict[str, None]] = {}
+        self._tag_idx: Dict[str, Dict[str, None]] = {}
+        # 写时复制的只读快照：读取方直接返回，写入方在锁内重建后整体替换
+        self._write_lock = threading.RLock()
+        self._agents_view: Mapping[str, Dict[str, Any]] = MappingProxyType({})
+        self._records_view: Mapping[str, AgentRecord] = MappingProxyType({})
+        self._refresh_due_at: Optional[datetime] = None
         self._load_config()
     
     def _load_config(self):
@@ -53,6 +112,8 @@ class SimpleAgentRegistry:
                 logger.debug(f"   🔗 URL: {agent_url_info['agent_card_url']}")
                 logger.debug(f"   ✅ Enabled: {agent_url_info['enabled']}")
             
+            self._rebuild_card_url_index()
+            self._reindex_all()
             logger.info(f"✅ Loaded {len(self.agent_urls)} agent URLs from config")
                 
         except Exception as e:
@@ -69,11 +130,106 @@ class SimpleAgentRegistry:
         
         # 初始化为空
         self.agent_urls = {}
+        self._by_card_url = {}
+        self._reindex_all()
+    
+    def _rebuild_card_url_index(self):
+        """根据agent_urls重建agent_card_url索引"""
+        self._by_card_url = {
+            url_config['agent_card_url']: agent_id
+            for agent_id, url_config in self.agent_urls.items()
+        }
+    
+    def _index_agent(self, agent_id: str):
+        """根据当前URL配置和缓存重建单个Agent的记录及倒排索引"""
+        self._unindex_agent(agent_id)
+        url_config = self.agent_urls.get(agent_id)
+        if not url_config:
+            return
+        record = AgentRecord.from_info(agent_id, url_config, self.agent_cache.get(agent_id))
+        self._records[agent_id] = record
+        for capability in record.capabilities:
+            self._cap_idx.setdefault(capability, {})[agent_id] = None
+        for tag in record.tags:
+            self._tag_idx.setdefault(tag, {})[agent_id] = None
+    
+    def _unindex_agent(self, agent_id: str):
+        """从记录及倒排索引中移除单个Agent"""
+        record = self._records.pop(agent_id, None)
+        if record is None:
+            return
+        for index, keys in ((self._cap_idx, record.capabilities), (self._tag_idx, record.tags)):
+            for key in keys:
+                ids = index.get(key)
+                if ids is not None:
+                    ids.pop(agent_id, None)
+                    if not ids:
+                        del index[key]
+    
+    def _reindex_all(self):
+        """重建全部记录及倒排索引"""
+        with self._write_lock:
+            self._records = {}
+            self._cap_idx = {}
+            self._tag_idx = {}
+            for agent_id in self.agent_urls:
+                self._index_agent(agent_id)
+            self._publish_snapshot()
+    
+    def _set_cached_info(self, agent_id: str, agent_info: Dict[str, Any]):
+        """写入Agent信息缓存并同步索引"""
+        with self._write_lock:
+            self.agent_cache[agent_id] = agent_info
+            self._index_agent(agent_id)
+            self._publish_snapshot()
+    
+    def _drop_cached_info(self, agent_id: str):
+        """清除Agent信息缓存并同步索引"""
+        with self._write_lock:
+            self.agent_cache.pop(agent_id, None)
+            self._index_agent(agent_id)
+            self._publish_snapshot()
+    
+    def _publish_snapshot(self):
+        """重建只读快照并计算下一次需要刷新的时间，调用方需持有写锁"""
+        now = datetime.utcnow()
+        agents = {}
+        refresh_due_at = None
+        for agent_id, url_config in self.agent_urls.items():
+            agent_info = self.agent_cache.get(agent_id)
+            enabled = url_config.get('enabled', True)
+            if agent_info and enabled:
+                agents[agent_id] = agent_info
+                expires_at = datetime.fromisoformat(agent_info['cached_at']) + _AGENT_INFO_TTL
+            else:
+                # 如果无法获取详细信息，返回基本URL配置
+                agents[agent_id] = {
+                    **url_config,
+                    "status": "unavailable",
+                    "last_checked": now.isoformat()
+                }
+                # 启用但尚未获取到信息的Agent需要在下次读取时重新获取
+                expires_at = now if enabled else None
+            if expires_at and (refresh_due_at is None or expires_at < refresh_due_at):
+                refresh_due_at = expires_at
+        
+        self._agents_view = MappingProxyType(agents)
+        self._records_view = MappingProxyType(dict(self._records))
+        self._refresh_due_at = refresh_due_at
+    
+    async def _ensure_fresh(self):
+        """仅在存在过期或缺失的缓存时才逐个刷新Agent信息"""
+        if self._refresh_due_at is None or datetime.utcnow() < self._refresh_due_at:
+            return
+        for agent_id in list(self.agent_urls):
+            await self._fetch_agent_info(agent_id)
+    
+    def get_agent_id_by_card_url(self, agent_card_url: str) -> Optional[str]:
+        """根据Agent Card URL查找已注册的Agent ID"""
+        return self._by_card_url.get(agent_card_url)
     
     async def _fetch_agent_info(self, agent_id: str) -> Optional[Dict[str, Any]]:
         """动态获取Agent的详细信息"""
-        from datetime import datetime, timedelta
-        
         url_config = self.agent_urls.get(agent_id)
         if not url_config or not url_config['enabled']:
             return None
@@ -84,7 +240,7 @@ class SimpleAgentRegistry:
             # 如果缓存时间不超过5分钟，直接返回
             if 'cached_at' in cached_info:
                 cached_time = datetime.fromisoformat(cached_info['cached_at'])
-                if datetime.utcnow() - cached_time < timedelta(minutes=5):
+                if datetime.utcnow() - cached_time < _AGENT_INFO_TTL:
                     return cached_info
         
         try:
@@ -98,25 +254,10 @@ class SimpleAgentRegistry:
             agent_card = await zhipu_a2a_client.discover_agent(agent_card_url)
             if agent_card:
                 logger.info(f"✅ Successfully fetched agent card for {agent_id}: {agent_card.name}")
-                # 构建完整的Agent信息
-                agent_info = {
-                    "agent_id": agent_id,
-                    "name": agent_card.name,
-                    "description": agent_card.description,
-                    "agent_card_url": agent_card_url,
-                    "url": agent_card.url,
-                    "version": agent_card.version,
-                    "protocol_version": agent_card.protocol_version,
-                    "capabilities": self._extract_capabilities(agent_card),
-                    "skills": [skill.model_dump() for skill in agent_card.skills] if agent_card.skills else [],
-                    "enabled": url_config['enabled'],
-                    "added_at": url_config['added_at'],
-                    "cached_at": datetime.utcnow().isoformat(),
-                    "last_updated": datetime.utcnow().isoformat()
-                }
+                agent_info = self._build_agent_info(agent_id, url_config, agent_card)
                 
                 # 缓存信息
-                self.agent_cache[agent_id] = agent_info
+                self._set_cached_info(agent_id, agent_info)
                 logger.debug(f"Cached agent info for {agent_id}")
                 return agent_info
             else:
@@ -128,11 +269,34 @@ class SimpleAgentRegistry:
             logger.error(f"🔗 Agent card URL was: {url_config.get('agent_card_url', 'NOT_SET')}")
             return None
     
-    async def add_agent_by_card_url(self, agent_card_url: str, agent_id: Optional[str] = None) -> bool:
+    def _build_agent_info(self, agent_id: str, url_config: Dict[str, Any], agent_card) -> Dict[str, Any]:
+        """根据URL配置和Agent Card构建完整的Agent信息"""
+        now = datetime.utcnow().isoformat()
+        return {
+            "agent_id": agent_id,
+            "name": agent_card.name,
+            "description": agent_card.description,
+            "agent_card_url": url_config['agent_card_url'],
+            "url": agent_card.url,
+            "version": agent_card.version,
+            "protocol_version": agent_card.protocol_version,
+            "capabilities": self._extract_capabilities(agent_card),
+            "tags": self._extract_tags(agent_card),
+            "skills": [skill.model_dump() for skill in agent_card.skills] if agent_card.skills else [],
+            "enabled": url_config['enabled'],
+            "added_at": url_config['added_at'],
+            "cached_at": now,
+            "last_updated": now
+        }
+    
+    async def add_agent_by_card_url(self, agent_card_url: str, agent_id: Optional[str] = None) -> Optional[Tuple[str, Dict[str, Any]]]:
         """
         添加Agent Card URL到配置文件
+        
+        成功时返回 (agent_id, agent_info)，失败时返回None
         """
         try:
+            agent_card = None
             # 生成Agent ID
             if not agent_id:
                 from src.external_services.zhipu_a2a_client import zhipu_a2a_client
@@ -142,30 +306,39 @@ class SimpleAgentRegistry:
                     agent_id = self._generate_agent_id(agent_card.name)
                 else:
                     logger.error(f"Failed to discover agent from {agent_card_url}")
-                    return False
+                    return None
             
             # 添加到URL配置
-            self.agent_urls[agent_id] = {
+            previous = self.agent_urls.get(agent_id)
+            if previous:
+                self._by_card_url.pop(previous['agent_card_url'], None)
+            url_config = {
                 "id": agent_id,
-                "name": agent_card.name if 'agent_card' in locals() else f"Agent {agent_id}",
+                "name": agent_card.name if agent_card else f"Agent {agent_id}",
                 "agent_card_url": agent_card_url,
                 "enabled": True,
                 "added_at": datetime.utcnow().isoformat()
             }
+            self.agent_urls[agent_id] = url_config
+            self._by_card_url[agent_card_url] = agent_id
             
             # 保存配置文件
             await self._save_config()
             
-            # 清除缓存，强制重新获取
-            if agent_id in self.agent_cache:
-                del self.agent_cache[agent_id]
+            # 已获取到Agent Card时直接写入缓存，否则清除缓存并重新获取
+            if agent_card:
+                agent_info = self._build_agent_info(agent_id, url_config, agent_card)
+                self._set_cached_info(agent_id, agent_info)
+            else:
+                self._drop_cached_info(agent_id)
+                agent_info = await self._fetch_agent_info(agent_id) or url_config
             
             logger.info(f"Successfully added agent URL: {agent_id} -> {agent_card_url}")
-            return True
+            return agent_id, agent_info
             
         except Exception as e:
             logger.error(f"Error adding agent URL {agent_card_url}: {e}")
-            return False
+            return None
     
     def _generate_agent_id(self, name: str) -> str:
         """生成Agent ID"""
@@ -199,16 +372,20 @@ class SimpleAgentRegistry:
         
         return list(set(capabilities))  # 去重
     
+    def _extract_tags(self, agent_card) -> List[str]:
+        """从Agent Card的技能标签中提取去重后的标签列表"""
+        tags = {}
+        for skill in agent_card.skills or []:
+            tags.update(dict.fromkeys(skill.tags or []))
+        return list(tags)
+    
     async def _save_config(self):
         """保存配置到文件 - 只保存URL配置"""
         try:
             config = {
-                "agents": []
+                "agents": list(self.agent_urls.values())
             }
             
-            for agent_id, url_config in self.agent_urls.items():
-                config["agents"].append(url_config)
-            
             self.config_manager.save_config(config)
             logger.debug(f"Saved agent URLs using config manager")
             
@@ -240,23 +417,49 @@ class SimpleAgentRegistry:
         logger.info(f"🎯 Final enabled agents count: {len(enabled_agents)}")
         return enabled_agents
     
-    async def get_all_agents(self) -> Dict[str, Any]:
-        """返回所有Agent配置 - 动态获取详细信息"""
-        all_agents = {}
+    async def get_all_agents(self) -> Mapping[str, Any]:
+        """返回所有Agent配置的只读快照 - 缓存未过期时不做任何重建"""
+        await self._ensure_fresh()
+        return self._agents_view
+    
+    async def get_agent_records(self, enabled_only: bool = False) -> Mapping[str, AgentRecord]:
+        """一次性获取注册表快照，返回 agent_id -> AgentRecord"""
+        await self._ensure_fresh()
+        if not enabled_only:
+            return self._records_view
+        return {
+            agent_id: record
+            for agent_id, record in self._records_view.items()
+            if record.enabled and record.available
+        }
+    
+    async def query(self, capability: Optional[str] = None, tag: Optional[str] = None,
+                    enabled_only: bool = False) -> List[AgentRecord]:
+        """
+        按能力/标签查询Agent - 通过倒排索引求交集，只处理命中的Agent
+        """
+        await self._ensure_fresh()
         
-        for agent_id in self.agent_urls.keys():
-            agent_info = await self._fetch_agent_info(agent_id)
-            if agent_info:
-                all_agents[agent_id] = agent_info
-            else:
-                # 如果无法获取详细信息，返回基本URL配置
-                all_agents[agent_id] = {
-                    **self.agent_urls[agent_id],
-                    "status": "unavailable",
-                    "last_checked": datetime.utcnow().isoformat()
-                }
+        records = self._records_view
+        if capability is None and tag is None:
+            candidates = records.keys()
+        else:
+            candidates = None
+            for index, key in ((self._cap_idx, capability), (self._tag_idx, tag)):
+                if key is None:
+                    continue
+                ids = index.get(key, {})
+                candidates = list(ids) if candidates is None else [aid for aid in candidates if aid in ids]
         
-        return all_agents
+        results = []
+        for agent_id in candidates:
+            record = records.get(agent_id)
+            if record is None:
+                continue
+            if enabled_only and not (record.enabled and record.available):
+                continue
+            results.append(record)
+        return results
     
     async def refresh_agent_info(self, agent_id: str) -> bool:
         """刷新Agent信息 - 清除缓存，强制重新获取"""
@@ -265,8 +468,7 @@ class SimpleAgentRegistry:
             return False
         
         # 清除缓存
-        if agent_id in self.agent_cache:
-            del self.agent_cache[agent_id]
+        self._drop_cached_info(agent_id)
         
         # 重新获取信息
         agent_info = await self._fetch_agent_info(agent_id)
@@ -280,9 +482,12 @@ class SimpleAgentRegistry:
     def remove_agent(self, agent_id: str) -> bool:
         """移除Agent"""
         if agent_id in self.agent_urls:
-            del self.agent_urls[agent_id]
-            if agent_id in self.agent_cache:
-                del self.agent_cache[agent_id]
+            with self._write_lock:
+                url_config = self.agent_urls.pop(agent_id)
+                self._by_card_url.pop(url_config['agent_card_url'], None)
+                self.agent_cache.pop(agent_id, None)
+                self._unindex_agent(agent_id)
+                self._publish_snapshot()
             # 异步保存配置
             asyncio.create_task(self._save_config())
             logger.info(f"Removed agent: {agent_id}")
@@ -300,14 +505,8 @@ class SimpleAgentRegistry:
     
     async def get_agents_by_capability(self, capability: str) -> Dict[str, Any]:
         """根据能力查找Agent - 动态获取并筛选"""
-        result = {}
-        all_agents = await self.get_enabled_agents()
-        
-        for agent_id, agent_config in all_agents.items():
-            if capability in agent_config.get("capabilities", []):
-                result[agent_id] = agent_config
-        
-        return result
+        records = await self.query(capability=capability, enabled_only=True)
+        return {record.id: self.agent_cache[record.id] for record in records}
     
     def enable_agent(self, agent_id: str) -> bool:
         """启用Agent"""
@@ -315,8 +514,7 @@ class SimpleAgentRegistry:
             self.agent_urls[agent_id]['enabled'] = True
             asyncio.create_task(self._save_config())
             # 清除缓存
-            if agent_id in self.agent_cache:
-                del self.agent_cache[agent_id]
+            self._drop_cached_info(agent_id)
             return True
         return False
     
@@ -326,14 +524,14 @@ class SimpleAgentRegistry:
             self.agent_urls[agent_id]['enabled'] = False
             asyncio.create_task(self._save_config())
             # 清除缓存
-            if agent_id in self.agent_cache:
-                del self.agent_cache[agent_id]
+            self._drop_cached_info(agent_id)
             return True
         return False
     
     def clear_cache(self):
         """清除所有缓存"""
         self.agent_cache.clear()
+        self._reindex_all()
         logger.info("Cleared agent cache")
     
     def reload_config(self):
@@ -376,7 +574,7 @@ def get_agents_by_capability(capability: str):
     return loop.run_until_complete(_agent_registry.get_agents_by_capability(capability))
 
 # 简化的新功能函数
-async def add_agent_by_card_url(agent_card_url: str, agent_id: Optional[str] = None) -> bool:
+async def add_agent_by_card_url(agent_card_url: str, agent_id: Optional[str] = None) -> Optional[Tuple[str, Dict[str, Any]]]:
     """通过Agent Card URL添加Agent"""
     return await _agent_registry.add_agent_by_card_url(agent_card_url, agent_id)
 
@@ -836,11 +836,11 @@ JSON格式要求：
     async def _send_a2a_request(self, a2a_request: Dict[str, Any]) -> bool:
         """发送A2A请求"""
         try:
-            # 导入A2A主端点处理函数
-            from src.user_interaction.main_simple import a2a_main_endpoint
+            # 导入A2A JSON-RPC处理函数
+            from src.user_interaction.main_simple import process_jsonrpc_request
             
             # 发送请求
-            response = await a2a_main_endpoint(a2a_request)
+            response = await process_jsonrpc_request(a2a_request)
             
             # 检查响应
             if response.get("jsonrpc") == "2.0" and "result" in response:
@@ -9,25 +9,44 @@ Terminal Device Registration Manager
 4. 设备在线状态管理
 5. MCP服务验证
 """
+import asyncio
 import logging
 import json
+import orjson
+import threading
+import time
 import requests
-from typing import Dict, List, Optional, Any, Tuple
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import String
+from sqlalchemy import String, func, update
 
 from src.data_persistence.terminal_device_models import (
     TerminalDevice, TerminalDeviceType, DataType
 )
 from src.data_persistence.database import DatabaseManager
 from src.external_services.mcp_client import mcp_client_manager
+from src.config.agent_config import agent_config
 from config.settings import settings
 
 
 logger = logging.getLogger(__name__)
 
 
+def normalize_tool_names(mcp_tools) -> List[str]:
+    """确保mcp_tools是字符串数组（兼容字典列表格式）"""
+    if not mcp_tools:
+        return []
+    if isinstance(mcp_tools, (list, tuple)):
+        # 如果是字典列表，提取name字段
+        if isinstance(mcp_tools[0], dict):
+            return [tool.get("name", str(tool)) for tool in mcp_tools if tool.get("name")]
+        # 如果是字符串列表，直接返回
+        return [str(tool) for tool in mcp_tools]
+    return []
+
+
 class TerminalDeviceManager:
     """终端设备管理器"""
     
@@ -36,6 +55,15 @@ class TerminalDeviceManager:
         self._registered_devices: Dict[str, TerminalDevice] = {}
         self._device_capabilities: Dict[str, List[str]] = {}
         
+        # 设备查询TTL缓存：device_id -> (过期时间, 设备)；设备列表快照：(online_only, device_type) -> (过期时间, 设备列表)
+        self._device_cache: "OrderedDict[str, Tuple[float, Optional[TerminalDevice]]]" = OrderedDict()
+        self._device_list_cache: Dict[Tuple[bool, Optional[TerminalDeviceType]], Tuple[float, List[TerminalDevice]]] = {}
+        # 在线设备列表的JSON编码结果：(过期时间, bytes)，与设备列表快照同时失效
+        self._online_devices_json: Optional[Tuple[float, bytes]] = None
+        # 设备静态信息（不随心跳变化的响应字段）：device_id -> (updated_at, dict)
+        self._device_profiles: Dict[str, Tuple[Any, Dict[str, Any], FrozenSet[str]]] = {}
+        self._cache_lock = threading.Lock()
+        
         # 从数据库加载现有设备到内存缓存
         self._load_existing_devices()
     
@@ -249,6 +277,7 @@ class TerminalDeviceManager:
                 # 缓存设备信息
                 self._registered_devices[device_id] = device
                 self._device_capabilities[device_id] = device.mcp_tools or []
+                self.invalidate_device(device_id)
                 
                 # 更新服务器Agent Card
                 self._update_server_agent_card()
@@ -259,6 +288,72 @@ class TerminalDeviceManager:
             logger.error(f"❌ 注册终端设备失败 {device_id}: {e}")
             raise
     
+    def update_device(self, device_id: str, **changes) -> bool:
+        """
+        按字段更新设备信息 - 只更新传入的字段
+        
+        只有mcp_server_url变化时才重新验证MCP服务并使用服务器返回的工具列表。
+        
+        Args:
+            device_id: 设备ID
+            **changes: 需要更新的字段
+            
+        Returns:
+            bool: 设备是否存在
+        """
+        values = dict(changes)
+        if "supported_data_types" in values:
+            values["supported_data_types"] = [
+                getattr(dt, "value", dt) for dt in (values["supported_data_types"] or [])
+            ]
+        for field in ("mcp_tools", "intent_keywords"):
+            if field in values:
+                values[field] = list(values[field] or [])
+        
+        try:
+            if "mcp_server_url" in values:
+                mcp_server_url = values["mcp_server_url"]
+                logger.info(f"🔍 MCP服务地址变更，重新验证: {device_id} -> {mcp_server_url}")
+                is_valid, available_tools, error_msg = self._validate_mcp_service(mcp_server_url, timeout=10)
+                if not is_valid:
+                    raise ValueError(f"MCP服务验证失败，无法更新设备 {device_id}: {error_msg}")
+                if available_tools:
+                    values["mcp_tools"] = available_tools
+            
+            if not values:
+                return self.get_device(device_id) is not None
+            
+            values["updated_at"] = datetime.utcnow()
+            with self.db_manager.create_session() as db:
+                result = db.execute(
+                    update(TerminalDevice)
+                    .where(TerminalDevice.device_id == device_id)
+                    .values(**values)
+                )
+                db.commit()
+            
+            if result.rowcount == 0:
+                logger.warning(f"⚠️ 设备未找到: {device_id}")
+                return False
+            
+            self.invalidate_device(device_id)
+            # 与register_device一致，保持已注册设备缓存为最新的数据库记录
+            device = self.get_device(device_id)
+            if device is not None:
+                self._registered_devices[device_id] = device
+            else:
+                self._registered_devices.pop(device_id, None)
+            if "mcp_tools" in values:
+                self._device_capabilities[device_id] = values["mcp_tools"]
+                self._update_server_agent_card()
+            
+            logger.info(f"✅ 更新终端设备: {device_id} ({', '.join(sorted(changes))})")
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ 更新终端设备失败 {device_id}: {e}")
+            raise
+    
     def unregister_device(self, device_id: str) -> bool:
         """
         注销终端设备 - 完全删除设备
@@ -283,6 +378,7 @@ class TerminalDeviceManager:
                     # 从缓存中移除
                     self._registered_devices.pop(device_id, None)
                     self._device_capabilities.pop(device_id, None)
+                    self.invalidate_device(device_id)
                     
                     # 更新服务器Agent Card
                     self._update_server_agent_card()
@@ -298,28 +394,150 @@ class TerminalDeviceManager:
             return False
     
     def get_device(self, device_id: str) -> Optional[TerminalDevice]:
-        """获取设备信息"""
+        """获取设备信息 - 结果（包括设备不存在）缓存terminal_device_cache_ttl秒"""
+        now = time.monotonic()
+        with self._cache_lock:
+            cached = self._device_cache.get(device_id)
+            if cached is not None and cached[0] > now:
+                return cached[1]
+        
         try:
             with self.db_manager.create_session() as db:
                 device = db.query(TerminalDevice).filter(
                     TerminalDevice.device_id == device_id
                 ).first()
-                return device
         except Exception as e:
             logger.error(f"❌ 获取设备信息失败 {device_id}: {e}")
             return None
+        
+        with self._cache_lock:
+            self._device_cache[device_id] = (now + agent_config.terminal_device_cache_ttl, device)
+            self._device_cache.move_to_end(device_id)
+            while len(self._device_cache) > agent_config.terminal_device_cache_max_entries:
+                self._device_cache.popitem(last=False)
+        return device
     
-    def get_all_devices(self, online_only: bool = False) -> List[TerminalDevice]:
-        """获取所有设备"""
+    def get_all_devices(
+        self,
+        online_only: bool = False,
+        device_type: Optional[TerminalDeviceType] = None
+    ) -> List[TerminalDevice]:
+        """获取所有设备（可按在线状态和设备类型在数据库中过滤） - 列表快照缓存terminal_device_list_cache_ttl秒"""
+        cache_key = (online_only, device_type)
+        now = time.monotonic()
+        with self._cache_lock:
+            cached = self._device_list_cache.get(cache_key)
+            if cached is not None and cached[0] > now:
+                return list(cached[1])
+        
         try:
             with self.db_manager.create_session() as db:
                 query = db.query(TerminalDevice)
                 if online_only:
                     query = query.filter(TerminalDevice.is_connected == True)
-                return query.all()
+                if device_type:
+                    query = query.filter(TerminalDevice.device_type == device_type)
+                devices = query.all()
         except Exception as e:
             logger.error(f"❌ 获取设备列表失败: {e}")
             return []
+        
+        with self._cache_lock:
+            self._device_list_cache[cache_key] = (now + agent_config.terminal_device_list_cache_ttl, devices)
+        return list(devices)
+    
+    def invalidate_device(self, device_id: str):
+        """设备信息或在线状态变更后清除相关缓存"""
+        with self._cache_lock:
+            self._device_cache.pop(device_id, None)
+            self._device_list_cache.clear()
+            self._online_devices_json = None
+            self._device_profiles.pop(device_id, None)
+    
+    def get_device_profile(self, device: TerminalDevice) -> Dict[str, Any]:
+        """获取设备的静态信息（已规范化的工具列表、枚举值、ISO格式时间戳等）
+
+        按device_id缓存，数据库重新加载出的设备对象也能复用；
+        设备的updated_at变化（包括其他进程更新了设备）或缓存被清除时重新构建。
+        """
+        return self._get_profile_entry(device)[1]
+    
+    def get_device_tool_names(self, device: TerminalDevice) -> FrozenSet[str]:
+        """获取设备支持的工具名集合，与设备静态信息一同缓存，用于O(1)检查工具是否支持"""
+        return self._get_profile_entry(device)[2]
+    
+    def _get_profile_entry(self, device: TerminalDevice) -> Tuple[Any, Dict[str, Any], FrozenSet[str]]:
+        """返回缓存的 (updated_at, 静态信息, 工具名集合)，缓存失效时重新构建"""
+        cached = self._device_profiles.get(device.device_id)
+        if cached is not None and cached[0] == device.updated_at:
+            return cached
+        
+        profile = {
+            "id": device.id,
+            "device_id": device.device_id,
+            "name": device.name,
+            "description": device.description or "",
+            "device_type": device.device_type.value,
+            "mcp_server_url": device.mcp_server_url,
+            "mcp_tools": normalize_tool_names(device.mcp_tools),
+            "websocket_endpoint": device.websocket_endpoint,
+            "supported_data_types": device.supported_data_types or [],
+            "max_data_size_mb": device.max_data_size_mb,
+            "location": device.location,
+            "hardware_info": device.hardware_info or {},
+            "system_prompt": device.system_prompt,
+            "intent_keywords": device.intent_keywords or [],
+            "created_at": device.created_at.isoformat(),
+            "updated_at": device.updated_at.isoformat()
+        }
+        entry = (device.updated_at, profile, frozenset(profile["mcp_tools"]))
+        self._device_profiles[device.device_id] = entry
+        return entry
+    
+    def device_to_response_dict(self, device: TerminalDevice) -> Dict[str, Any]:
+        """将设备转换为与TerminalDeviceResponse字段一致的dict
+
+        静态信息取自 get_device_profile()，在线状态和last_seen随心跳变化，每次实时读取。
+        """
+        return {
+            **self.get_device_profile(device),
+            "is_connected": device.is_connected,
+            "last_seen": device.last_seen.isoformat() if device.last_seen else None
+        }
+    
+    def get_online_devices_json(self) -> bytes:
+        """获取在线设备列表的JSON编码结果 - 与设备列表快照使用相同的缓存时间和失效时机"""
+        now = time.monotonic()
+        cached = self._online_devices_json
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        
+        devices = self.get_all_devices(online_only=True)
+        payload = orjson.dumps([self.device_to_response_dict(device) for device in devices])
+        with self._cache_lock:
+            self._online_devices_json = (now + agent_config.terminal_device_list_cache_ttl, payload)
+        return payload
+    
+    def touch_device(self, device_id: str, heartbeat_time: datetime) -> bool:
+        """
+        在内存中记录设备心跳 - 只更新缓存中的设备，不访问数据库
+        
+        Returns:
+            bool: 设备在缓存中且未过期时返回True；返回False时需由调用方查询数据库确认设备存在
+        """
+        with self._cache_lock:
+            cached = self._device_cache.get(device_id)
+            if cached is None or cached[1] is None or cached[0] <= time.monotonic():
+                return False
+            device = cached[1]
+            # 离线 -> 在线会改变在线设备列表
+            if not device.is_connected:
+                self._device_list_cache.clear()
+                self._online_devices_json = None
+            device.last_ping = heartbeat_time
+            device.last_seen = heartbeat_time
+            device.is_connected = True
+            return True
 
     def list_connected_devices(self) -> List[TerminalDevice]:
         """获取所有已连接的设备（符合MCP标准）"""
@@ -346,8 +564,12 @@ class TerminalDeviceManager:
             logger.error(f"❌ 获取已连接设备失败: {e}")
             return []
     
-    def get_devices_by_tool(self, tool_name: str) -> List[TerminalDevice]:
-        """根据工具名称获取设备（符合MCP标准）"""
+    def get_devices_by_tool(
+        self,
+        tool_name: str,
+        device_type: Optional[TerminalDeviceType] = None
+    ) -> List[TerminalDevice]:
+        """根据工具名称获取设备（符合MCP标准），可按设备类型在数据库中过滤"""
         try:
             with self.db_manager.create_session() as db:
                 logger.info(f"🔍 查找支持工具 '{tool_name}' 的设备...")
@@ -355,9 +577,12 @@ class TerminalDeviceManager:
                 # 使用LIKE查询来匹配JSON数组中的工具名称
                 tool_pattern = f'%"{tool_name}"%'
                 
-                all_capable_devices = db.query(TerminalDevice).filter(
+                query = db.query(TerminalDevice).filter(
                     TerminalDevice.mcp_tools.cast(String).like(tool_pattern)
-                ).all()
+                )
+                if device_type:
+                    query = query.filter(TerminalDevice.device_type == device_type)
+                all_capable_devices = query.all()
                 
                 logger.info(f"📋 找到 {len(all_capable_devices)} 个支持该工具的设备")
                 
@@ -377,6 +602,7 @@ class TerminalDeviceManager:
                         all_capable_devices[0].is_connected = True
                         all_capable_devices[0].last_seen = datetime.utcnow()
                         db.commit()
+                        self.invalidate_device(all_capable_devices[0].device_id)
                         return [all_capable_devices[0]]
                 
                 return connected_devices
@@ -386,6 +612,48 @@ class TerminalDeviceManager:
             logger.error(f"❌ 详细错误: {traceback.format_exc()}")
             return []
     
+    def get_devices(self, device_type: Optional[str] = None, status: Optional[str] = None) -> List[TerminalDevice]:
+        """按设备类型/在线状态筛选设备，status为"active"或"online"时只返回已连接设备"""
+        try:
+            with self.db_manager.create_session() as db:
+                query = db.query(TerminalDevice)
+                if device_type:
+                    query = query.filter(TerminalDevice.device_type == device_type)
+                if status in ("active", "online"):
+                    query = query.filter(TerminalDevice.is_connected == True)
+                elif status == "offline":
+                    query = query.filter(TerminalDevice.is_connected == False)
+                return query.all()
+        except Exception as e:
+            logger.error(f"❌ 筛选设备失败: {e}")
+            return []
+    
+    def get_device_summary(self) -> Dict[str, Any]:
+        """获取设备统计摘要 - 在数据库中按类型和在线状态聚合"""
+        with self.db_manager.create_session() as db:
+            rows = db.query(
+                TerminalDevice.device_type,
+                TerminalDevice.is_connected,
+                func.count(TerminalDevice.id)
+            ).group_by(TerminalDevice.device_type, TerminalDevice.is_connected).all()
+        
+        total = 0
+        online = 0
+        by_type: Dict[str, int] = {}
+        for device_type, is_connected, count in rows:
+            type_name = getattr(device_type, "value", device_type)
+            by_type[type_name] = by_type.get(type_name, 0) + count
+            total += count
+            if is_connected:
+                online += count
+        
+        return {
+            "total_devices": total,
+            "online_devices": online,
+            "offline_devices": total - online,
+            "devices_by_type": by_type
+        }
+    
     def update_device_status(self, device_id: str, is_connected: bool) -> bool:
         """更新设备在线状态"""
         try:
@@ -400,6 +668,7 @@ class TerminalDeviceManager:
                     if is_connected:
                         device.last_ping = datetime.utcnow()
                     db.commit()
+                    self.invalidate_device(device_id)
                     return True
                 return False
         except Exception as e:
@@ -419,6 +688,7 @@ class TerminalDeviceManager:
                     device.last_seen = datetime.utcnow()
                     device.is_connected = True
                     db.commit()
+                    self.invalidate_device(device_id)
                     return True
                 return False
         except Exception as e:
@@ -474,19 +744,9 @@ class TerminalDeviceManager:
                     "tool_name": tool_name
                 }
             
-            # 检查设备是否支持该工具
-            # 兼容处理：支持字符串列表和字典列表两种格式
-            if isinstance(device.mcp_tools, list) and device.mcp_tools:
-                if isinstance(device.mcp_tools[0], str):
-                    # 字符串列表格式
-                    device_tools = device.mcp_tools
-                else:
-                    # 字典列表格式
-                    device_tools = [tool.get("name") for tool in device.mcp_tools]
-            else:
-                device_tools = []
-                
-            if tool_name not in device_tools:
+            # 检查设备是否支持该工具（工具名集合随设备静态信息缓存，兼容字符串列表和字典列表两种格式）
+            if tool_name not in self.get_device_tool_names(device):
+                device_tools = self.get_device_profile(device)["mcp_tools"]
                 return {
                     "success": False,
                     "error": f"设备不支持工具 '{tool_name}'，支持的工具: {device_tools}",
@@ -557,6 +817,46 @@ class TerminalDeviceManager:
                 "device_id": device_id
             }
     
+    async def test_all_device_mcp_connections(self, online_only: bool = False) -> List[Dict[str, Any]]:
+        """
+        并发测试所有设备的MCP连接
+        
+        同一MCP服务器地址只测试一次（共享的MCP客户端不能被并发进入），
+        各地址之间通过asyncio.gather并发进行。
+        
+        Args:
+            online_only: 是否只测试在线设备
+            
+        Returns:
+            List[Dict[str, Any]]: 每个设备的连接测试结果
+        """
+        devices = await asyncio.to_thread(self.get_all_devices, online_only)
+        
+        devices_by_url: Dict[str, List[str]] = {}
+        for device in devices:
+            devices_by_url.setdefault(device.mcp_server_url, []).append(device.device_id)
+        
+        server_urls = list(devices_by_url)
+        url_results = await asyncio.gather(
+            *[
+                mcp_client_manager.test_device_connection(
+                    device_id=devices_by_url[url][0],
+                    server_url=url
+                )
+                for url in server_urls
+            ],
+            return_exceptions=True
+        )
+        
+        results = []
+        for url, url_result in zip(server_urls, url_results):
+            if isinstance(url_result, Exception):
+                logger.error(f"❌ 测试MCP连接异常: {url} - {url_result}")
+                url_result = {"success": False, "error": str(url_result)}
+            for device_id in devices_by_url[url]:
+                results.append({**url_result, "device_id": device_id, "server_url": url})
+        return results
+    
     async def call_mcp_tool(
         self,
         tool_name: str,
@@ -713,6 +1013,8 @@ class TerminalDeviceManager:
                 
                 if offline_devices:
                     db.commit()
+                    for device in offline_devices:
+                        self.invalidate_device(device.device_id)
                     self._update_server_agent_card()
                     
                 return len(offline_devices)
@@ -22,6 +22,7 @@ from pathlib import Path
 from src.data_persistence.terminal_device_models import DataType
 from src.core_application.terminal_device_manager import terminal_device_manager
 from src.core_application.event_stream_manager import event_stream_manager
+from src.config.agent_config import agent_config
 from config.settings import settings
 
 
@@ -38,6 +39,9 @@ class DeviceWebSocketConnection:
         self.last_activity = datetime.utcnow()
         self.data_received_count = 0
         self.total_bytes_received = 0
+        # 接收与处理解耦的有界队列；二进制数据在队列满时丢弃
+        self.receive_queue: asyncio.Queue = asyncio.Queue(maxsize=agent_config.ws_receive_queue_size)
+        self.dropped_count = 0
     
     async def send_json(self, data: Dict[str, Any]):
         """发送JSON消息"""
@@ -139,6 +143,10 @@ class WebSocketDataManager:
             logger.error(f"❌ 连接不存在: {device_id}")
             return
         
+        # 接收协程只负责入队，数据处理在独立协程中进行
+        queue = connection.receive_queue
+        consumer = asyncio.create_task(self._consume_device_data(device_id, queue))
+        
         try:
             while True:
                 try:
@@ -151,11 +159,26 @@ class WebSocketDataManager:
                     if message.get("type") == "websocket.disconnect":
                         break
                     
-                    # 处理不同类型的消息
+                    # 接收计数在接收协程中维护，心跳确认按实际收到的数据帧数发送，与处理进度无关；
+                    # 文本数据在队列满时等待（背压）；音视频等二进制数据在队列满时直接丢弃
                     if "text" in message:
-                        await self._handle_text_data(device_id, message["text"])
+                        connection.data_received_count += 1
+                        connection.total_bytes_received += len(message["text"].encode('utf-8'))
+                        await queue.put(("text", message["text"]))
                     elif "bytes" in message:
-                        await self._handle_binary_data(device_id, message["bytes"])
+                        connection.data_received_count += 1
+                        connection.total_bytes_received += len(message["bytes"])
+                        try:
+                            queue.put_nowait(("bytes", message["bytes"]))
+                        except asyncio.QueueFull:
+                            connection.dropped_count += 1
+                            if connection.dropped_count % 100 == 1:
+                                logger.warning(
+                                    f"⚠️ 设备数据处理积压，丢弃二进制数据: {device_id} "
+                                    f"(累计丢弃 {connection.dropped_count})"
+                                )
+                    else:
+                        continue
                     
                     # 发送心跳确认
                     if connection.data_received_count % 10 == 0:
@@ -179,8 +202,27 @@ class WebSocketDataManager:
         except Exception as e:
             logger.error(f"❌ 处理设备数据失败 {device_id}: {e}")
         finally:
+            # 处理完已入队的数据后再结束处理协程，超时则放弃剩余数据
+            try:
+                await asyncio.wait_for(queue.put(None), timeout=agent_config.ws_connection_timeout)
+                await asyncio.wait_for(consumer, timeout=agent_config.ws_connection_timeout)
+            except asyncio.TimeoutError:
+                consumer.cancel()
+                logger.warning(f"⚠️ 设备数据处理超时，放弃剩余 {queue.qsize()} 条数据: {device_id}")
             await self.disconnect_device(device_id)
     
+    async def _consume_device_data(self, device_id: str, queue: asyncio.Queue):
+        """从接收队列中取出设备数据并处理，收到None时结束"""
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            kind, payload = item
+            if kind == "text":
+                await self._handle_text_data(device_id, payload)
+            else:
+                await self._handle_binary_data(device_id, payload)
+    
     async def _handle_text_data(self, device_id: str, text_data: str):
         """处理文本数据"""
         try:
@@ -387,7 +429,9 @@ class WebSocketDataManager:
                     "connected_at": conn.connected_at.isoformat(),
                     "last_activity": conn.last_activity.isoformat(),
                     "data_received_count": conn.data_received_count,
-                    "total_bytes_received": conn.total_bytes_received
+                    "total_bytes_received": conn.total_bytes_received,
+                    "queued_messages": conn.receive_queue.qsize(),
+                    "dropped_count": conn.dropped_count
                 }
                 for device_id, conn in self.active_connections.items()
             }
@@ -17,6 +17,12 @@ from .repositories import (
     A2AAgentRepository, AgentInteractionRepository  # TerminalAgentRepository已重构为TerminalDeviceManager
 )
 
+# 批量写入
+from .batch_writer import BatchWriter
+from .task_status_writer import TaskStatusWriter, task_status_writer
+from .inbox_writer import MessageInboxWriter, inbox_writer
+from .heartbeat_writer import DeviceHeartbeatWriter, heartbeat_writer
+
 __all__ = [
     # 数据库工具
     "DatabaseManager", "get_db", "create_tables",
@@ -27,5 +33,9 @@ __all__ = [
     "MessageType", "TaskStatus", "Base",
     # Repository层
     "UserRepository", "MessageInboxRepository", "TaskRepository",
-    "A2AAgentRepository", "AgentInteractionRepository"  # TerminalAgentRepository已重构为TerminalDeviceManager
+    "A2AAgentRepository", "AgentInteractionRepository",  # TerminalAgentRepository已重构为TerminalDeviceManager
+    # 批量写入
+    "BatchWriter", "TaskStatusWriter", "task_status_writer",
+    "MessageInboxWriter", "inbox_writer",
+    "DeviceHeartbeatWriter", "heartbeat_writer"
 ]
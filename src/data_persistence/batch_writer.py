@@ -0,0 +1,99 @@
+"""
+Batch Writer Base
+后台批量写入的通用骨架：调用方把记录放入队列后立即返回，
+后台协程在合并窗口内收集记录，交给子类一次性写入数据库
+"""
+import asyncio
+import logging
+from typing import Any, List, Optional, Tuple
+
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# 停止信号：后台协程取到后写入手中的批次并退出
+_STOP = object()
+
+
+class BatchWriter:
+    """批量写入器基类 - 子类实现 _flush(batch)"""
+
+    def __init__(self, window_seconds: float, max_batch: int):
+        self.window_seconds = window_seconds
+        self.max_batch = max(1, max_batch)
+        self._queue: Optional[asyncio.Queue] = None
+        self._drain_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _put(self, item: Any):
+        """放入一条待写入记录"""
+        self._ensure_started()
+        self._queue.put_nowait(item)
+
+    async def aclose(self):
+        """停止后台协程并写入队列中剩余的记录
+
+        通过停止信号让后台协程先写完已取出的批次再退出，而不是直接取消，
+        避免合并窗口等待或写入过程中的批次丢失。
+        """
+        if self._drain_task is not None:
+            if not self._drain_task.done():
+                self._queue.put_nowait(_STOP)
+                await self._drain_task
+            self._drain_task = None
+        if self._queue is not None and not self._queue.empty():
+            pending = []
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is not _STOP:
+                    pending.append(item)
+            if pending:
+                await self._flush(pending)
+
+    def _ensure_started(self):
+        """在当前事件循环上按需启动后台写入协程"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._drain_task = None
+        if self._drain_task is None or self._drain_task.done():
+            self._drain_task = loop.create_task(self._drain_loop())
+
+    async def _drain_loop(self):
+        """持续收集窗口内的记录并批量写入，取到停止信号时写完当前批次后退出"""
+        while True:
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            if self.window_seconds > 0 and self._queue.empty():
+                await asyncio.sleep(self.window_seconds)
+            stopping = False
+            while len(batch) < self.max_batch and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch: List[Any]):
+        """写入一批记录 - 由子类实现，需自行处理异常"""
+        raise NotImplementedError
+
+    @staticmethod
+    def _run_in_session(*statements: Tuple[Any, Any]):
+        """在同一个事务中依次执行 (stmt, params) 并提交，失败时回滚后抛出 - 供子类在工作线程中调用"""
+        db = SessionLocal()
+        try:
+            for stmt, params in statements:
+                db.execute(stmt, params)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
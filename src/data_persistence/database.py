@@ -3,6 +3,7 @@ Database Connection and Session Management
 """
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.ext.declarative import declarative_base
 from typing import Generator
 from config.settings import settings
@@ -19,10 +20,18 @@ engine = create_engine(
 
 # 为数据库初始化创建同步引擎
 sync_database_url = settings.database_url.replace("sqlite+aiosqlite", "sqlite")
+# 文件型数据库和网络数据库使用预设大小的QueuePool；内存SQLite只能使用单连接池
+_pool_options = {} if ":memory:" in sync_database_url else {
+    "poolclass": QueuePool,
+    "pool_size": settings.db_pool_size,
+    "max_overflow": settings.db_max_overflow,
+    "pool_timeout": settings.db_pool_timeout,
+}
 sync_engine = create_engine(
     sync_database_url,
     pool_pre_ping=True,
-    pool_recycle=300,
+    pool_recycle=settings.db_pool_recycle,
+    **_pool_options,
 )
 
 # 创建会话工厂 - 使用同步引擎
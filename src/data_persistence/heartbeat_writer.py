@@ -0,0 +1,62 @@
+"""
+Batched Device Heartbeat Writer
+设备心跳放入队列，由后台协程合并为一次批量UPDATE写入数据库
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy import bindparam, update
+
+from src.config.agent_config import agent_config
+from .batch_writer import BatchWriter
+from .terminal_device_models import TerminalDevice
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceHeartbeatWriter(BatchWriter):
+    """设备心跳批量写入器
+
+    enqueue() 只记录心跳时间并立即返回；后台协程在合并窗口内收集心跳，
+    同一设备只保留最后一次心跳，然后在工作线程中用一次 executemany UPDATE 写入。
+    """
+
+    def enqueue(self, device_id: str, heartbeat_time: datetime = None):
+        """提交一次设备心跳"""
+        self._put((device_id, heartbeat_time or datetime.utcnow()))
+
+    async def _flush(self, batch: List[Tuple[str, datetime]]):
+        """合并同一设备的心跳后写入数据库"""
+        latest: Dict[str, datetime] = {}
+        for device_id, heartbeat_time in batch:
+            latest[device_id] = heartbeat_time
+
+        try:
+            await asyncio.to_thread(self._write_sync, latest)
+            logger.debug(f"📝 批量写入设备心跳: {len(latest)} 个设备 ({len(batch)} 次心跳)")
+        except Exception as e:
+            logger.error(f"❌ 批量写入设备心跳失败 ({len(latest)} 个设备): {e}")
+
+    def _write_sync(self, latest: Dict[str, datetime]):
+        """在工作线程中执行批量UPDATE"""
+        table = TerminalDevice.__table__
+        stmt = (
+            update(table)
+            .where(table.c.device_id == bindparam("b_device_id"))
+            .values(
+                last_ping=bindparam("b_time"),
+                last_seen=bindparam("b_time"),
+                is_connected=True
+            )
+        )
+        params = [{"b_device_id": device_id, "b_time": ts} for device_id, ts in latest.items()]
+        self._run_in_session((stmt, params))
+
+
+# 全局设备心跳写入器
+heartbeat_writer = DeviceHeartbeatWriter(
+    window_seconds=agent_config.heartbeat_batch_window_ms / 1000,
+    max_batch=agent_config.heartbeat_batch_max_size
+)
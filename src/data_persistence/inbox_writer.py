@@ -0,0 +1,62 @@
+"""
+Batched Message Inbox Writer
+推送通知产生的收件箱消息放入队列，由后台协程合并为一次多行INSERT写入数据库
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List
+
+from sqlalchemy import insert
+
+from src.config.agent_config import agent_config
+from .batch_writer import BatchWriter
+from .models import MessageInbox, MessageType
+
+logger = logging.getLogger(__name__)
+
+
+class MessageInboxWriter(BatchWriter):
+    """收件箱消息批量写入器
+
+    enqueue() 只把消息放入队列并立即返回；后台协程在合并窗口内收集消息，
+    在工作线程中用一次多行 INSERT 写入。
+    """
+
+    def enqueue(
+        self,
+        user_id: int,
+        message_type: MessageType,
+        content: str,
+        metadata: Dict[str, Any] = None,
+        source_agent: str = None,
+        correlation_id: str = None
+    ):
+        """提交一条收件箱消息"""
+        self._put({
+            "user_id": user_id,
+            "message_type": message_type,
+            "content": content,
+            "metadata_json": metadata or {},
+            "is_read": False,
+            "source_agent": source_agent,
+            "correlation_id": correlation_id
+        })
+
+    async def _flush(self, batch: List[Dict[str, Any]]):
+        """写入一批收件箱消息"""
+        try:
+            await asyncio.to_thread(self._write_sync, batch)
+            logger.debug(f"📥 批量写入收件箱消息: {len(batch)} 条")
+        except Exception as e:
+            logger.error(f"❌ 批量写入收件箱消息失败 ({len(batch)} 条): {e}")
+
+    def _write_sync(self, rows: List[Dict[str, Any]]):
+        """在工作线程中执行多行INSERT"""
+        self._run_in_session((insert(MessageInbox.__table__), rows))
+
+
+# 全局收件箱消息写入器
+inbox_writer = MessageInboxWriter(
+    window_seconds=agent_config.notification_batch_window_ms / 1000,
+    max_batch=agent_config.notification_batch_max_size
+)
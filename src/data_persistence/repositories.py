@@ -174,6 +174,10 @@ class TaskRepository:
     def get_task_by_id(self, task_id: str) -> Optional[Task]:
         return self.db.query(Task).filter(Task.id == task_id).first()
     
+    def get_task_user_id(self, task_id: str) -> Optional[int]:
+        """只查询任务所属用户ID，不加载整条任务记录"""
+        return self.db.query(Task.user_id).filter(Task.id == task_id).scalar()
+    
     def update_task_status(
         self, 
         task_id: str, 
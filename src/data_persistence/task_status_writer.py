@@ -0,0 +1,107 @@
+"""
+Batched Task Status Writer
+将A2A推送通知触发的任务状态更新放入队列，由后台协程批量合并写入数据库，
+避免在事件循环中执行同步数据库操作
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import bindparam, func, update
+
+from src.config.agent_config import agent_config
+from .batch_writer import BatchWriter
+from .models import Task, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+# A2A任务状态 -> 本地任务状态
+_A2A_STATE_MAP = {
+    "submitted": TaskStatus.PROCESSING,
+    "working": TaskStatus.PROCESSING,
+    "processing": TaskStatus.PROCESSING,
+    "input-required": TaskStatus.PROCESSING,
+    "completed": TaskStatus.COMPLETED,
+    "finished": TaskStatus.COMPLETED,
+    "done": TaskStatus.COMPLETED,
+    "failed": TaskStatus.FAILED,
+    "canceled": TaskStatus.FAILED,
+    "rejected": TaskStatus.FAILED,
+}
+
+
+class TaskStatusWriter(BatchWriter):
+    """任务状态批量写入器
+
+    enqueue() 只把更新放入队列并立即返回；后台协程在合并窗口内收集更新，
+    同一任务只保留最后一次状态，然后在工作线程中用一次 executemany UPDATE 写入。
+    """
+
+    def enqueue(self, task_id: str, state: Optional[str], result: Any = None) -> bool:
+        """提交一条任务状态更新；状态无法识别时返回False"""
+        status = _A2A_STATE_MAP.get(str(state).lower()) if state else None
+        # 与 TaskRepository.update_task_status 一致：空结果不覆盖已有的output_data
+        if not result:
+            result = None
+        if status is None and result is None:
+            return False
+        self._put((task_id, status, result))
+        return True
+
+    async def _flush(self, batch: List[tuple]):
+        """合并同一任务的更新后写入数据库"""
+        merged: Dict[str, Dict[str, Any]] = {}
+        for task_id, status, result in batch:
+            values = merged.setdefault(task_id, {"id": task_id})
+            if status is not None:
+                values["status"] = status
+            if result is not None:
+                values["output_data"] = result
+
+        try:
+            updated = await asyncio.to_thread(self._write_sync, list(merged.values()))
+            logger.debug(f"📝 批量更新任务状态: {updated} 个任务 ({len(batch)} 条通知)")
+        except Exception as e:
+            logger.error(f"❌ 批量更新任务状态失败 ({len(merged)} 个任务): {e}")
+
+    def _write_sync(self, rows: List[Dict[str, Any]]) -> int:
+        """在工作线程中执行批量UPDATE；按字段集合分组，每组一次executemany
+
+        与 TaskRepository.update_task_status 一致：进入PROCESSING时仅在started_at为空时写入，
+        进入COMPLETED/FAILED时写入completed_at。
+        """
+        now = datetime.utcnow()
+        table = Task.__table__
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for row in rows:
+            if row.get("status") == TaskStatus.PROCESSING:
+                row["started_at"] = now
+            elif row.get("status") in (TaskStatus.COMPLETED, TaskStatus.FAILED):
+                row["completed_at"] = now
+            columns = tuple(sorted(k for k in row if k != "id"))
+            groups.setdefault(columns, []).append(
+                {"b_id": row["id"], **{f"b_{k}": row[k] for k in columns}}
+            )
+
+        self._run_in_session(*(
+            (
+                update(table)
+                .where(table.c.id == bindparam("b_id"))
+                .values({
+                    k: func.coalesce(table.c.started_at, bindparam(f"b_{k}"))
+                    if k == "started_at" else bindparam(f"b_{k}")
+                    for k in columns
+                }),
+                params
+            )
+            for columns, params in groups.items()
+        ))
+        return len(rows)
+
+
+# 全局任务状态写入器
+task_status_writer = TaskStatusWriter(
+    window_seconds=agent_config.notification_batch_window_ms / 1000,
+    max_batch=agent_config.notification_batch_max_size
+)
@@ -5,8 +5,14 @@
 import logging
 import asyncio
 import re
-from datetime import datetime
-from typing import Optional, Dict, Any, List
+import time
+import functools
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from itertools import islice
+from types import MappingProxyType
+from typing import Optional, Dict, Any, List, Tuple
 import uuid
 from fastapi import FastAPI
 
@@ -39,6 +45,76 @@ from a2a.utils.task import new_task, completed_task
 
 logger.info("✅ Official A2A SDK loaded successfully")
 
+_utcnow = datetime.utcnow
+
+@functools.cache
+def _terminal_device_manager():
+    """延迟绑定全局TerminalDeviceManager单例
+    
+    terminal_device_manager依赖src.external_services.mcp_client，模块级导入会与
+    src.external_services包的初始化形成循环导入，因此首次使用时导入并缓存。
+    管理器内部按调用创建短生命周期会话，可在各请求间安全复用
+    """
+    from src.core_application.terminal_device_manager import terminal_device_manager
+    return terminal_device_manager
+
+# 已结束的任务状态，可以被active_tasks淘汰
+_FINISHED_TASK_STATES = frozenset({"completed", "failed", "cancelled", "canceled", "rejected"})
+
+
+@dataclass(slots=True)
+class ActiveTask:
+    """请求处理器中记录的任务，时间字段在写入时即为datetime"""
+    id: str
+    type: str
+    status: str
+    created_at: datetime
+    parameters: Dict[str, Any] = field(default_factory=dict)
+    result: Any = None
+    error: Optional[str] = None
+    completed_at: Optional[datetime] = None
+    # 外部Agent任务相关字段
+    external_agent_url: str = ""
+    external_agent_id: str = ""
+    external_task_id: Optional[str] = None
+    user_input: str = ""
+    routing_result: Optional[Dict[str, Any]] = None
+    push_notification_config: Optional[Dict[str, Any]] = None
+
+# 默认推送通知配置（实际应该从存储中获取）
+_DEFAULT_PUSH_CONFIG = MappingProxyType({
+    "enabled": True,
+    "notification_types": ("task_completed", "task_failed", "task_progress"),
+    "delivery_methods": ("webhook", "websocket"),
+    "retry_attempts": 3,
+    "timeout_seconds": 30
+})
+
+# 服务启动时间，作为默认推送配置的创建时间
+_STARTUP_ISO = _utcnow().isoformat()
+
+_DEFAULT_PUSH_CONFIG_ENTRY = MappingProxyType({
+    "id": "default",
+    "name": "默认推送配置",
+    "enabled": True,
+    "created_at": _STARTUP_ISO
+})
+
+# 技能 -> 功能特性规则表: (predicate(skill_id_lower, tags), feature)
+_SKILL_FEATURE_RULES = (
+    (lambda skill_id, tags: "intent" in skill_id or "nlp" in tags, "LLM-powered intent recognition"),
+    (lambda skill_id, tags: "task" in skill_id or "async" in tags, "Async task management"),
+    (lambda skill_id, tags: "routing" in tags, "Dynamic agent discovery"),
+)
+
+# 默认的A2A协议特性
+_DEFAULT_FEATURES = (
+    "Multi-agent task orchestration",
+    "Terminal device lifecycle management",
+    "Smart capability matching",
+    "A2A protocol compliance",
+)
+
 def serialize_for_json(obj):
     """递归序列化对象为JSON兼容的格式 - 复用async_execution.tasks中的逻辑"""
     if isinstance(obj, dict):
@@ -117,7 +193,17 @@ class ZhipuA2ARequestHandler(DefaultRequestHandler):
     
     def __init__(self, agent_executor: AgentExecutor, task_store: InMemoryTaskStore):
         super().__init__(agent_executor, task_store)
-        self.active_tasks: Dict[str, Any] = {}
+        # 按记录顺序（即created_at顺序）保存任务记录：超过TTL的任务（包括仍在运行的）从队首淘汰，
+        # 超过上限时按结束顺序淘汰已结束的任务
+        self.active_tasks: "OrderedDict[str, ActiveTask]" = OrderedDict()
+        self._finished_tasks: "OrderedDict[str, None]" = OrderedDict()
+        self._active_tasks_max = agent_config.a2a_active_tasks_max_entries
+        self._active_tasks_ttl = timedelta(seconds=agent_config.a2a_active_tasks_ttl)
+        # 路由结果合并缓存: (user_input, notification_url) -> (过期时间, 响应文本)
+        self._route_cache: "OrderedDict[Tuple[str, Optional[str]], Tuple[float, str]]" = OrderedDict()
+        self._route_locks: Dict[Tuple[str, Optional[str]], asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._route_ttl = agent_config.a2a_route_cache_ttl
+        self._route_cache_max = agent_config.a2a_route_cache_max_entries
         self._intent_router = None
         self._router_lock = asyncio.Lock()
         logger.info("✅ Enhanced ZhipuA2ARequestHandler initialized")
@@ -342,18 +428,18 @@ class ZhipuA2ARequestHandler(DefaultRequestHandler):
                         logger.info(f"✅ Task {task_id} 成功保存到task store")
                         
                         # 记录在active_tasks中
-                        self.active_tasks[task_id] = {
-                            "id": task_id,
-                            "type": "external_agent_dispatch",
-                            "status": "running",
-                            "created_at": datetime.utcnow(),
-                            "external_agent_url": routing_result.get("agent_url", ""),
-                            "external_agent_id": routing_result.get("agent_id", ""),
-                            "external_task_id": external_task_id,
-                            "user_input": user_input,
-                            "original_params": params,
-                            "routing_result": routing_result
-                        }
+                        self._record_active_task(task_id, ActiveTask(
+                            id=task_id,
+                            type="external_agent_dispatch",
+                            status="running",
+                            created_at=_utcnow(),
+                            parameters=params,
+                            external_agent_url=routing_result.get("agent_url", ""),
+                            external_agent_id=routing_result.get("agent_id", ""),
+                            external_task_id=external_task_id,
+                            user_input=user_input,
+                            routing_result=routing_result
+                        ))
                         
                         logger.info(f"✅ Task {task_id} 记录在active_tasks中")
                         
@@ -557,14 +643,14 @@ class ZhipuA2ARequestHandler(DefaultRequestHandler):
             if not task_info:
                 return
             
-            external_agent_url = task_info["external_agent_url"]
-            external_agent_id = task_info["external_agent_id"]
+            external_agent_url = task_info.external_agent_url
+            external_agent_id = task_info.external_agent_id
             
             # 1. 首先检查外部Agent的Agent Card，了解其能力
             agent_card = await self._fetch_external_agent_card(external_agent_url)
             
             # 2. 根据Agent Card决定使用推送通知还是轮询
-            if self._supports_push_notifications(agent_card) and task_info.get("push_notification_config"):
+            if self._supports_push_notifications(agent_card) and task_info.push_notification_config:
                 await self._setup_push_notifications(task_id, task_info)
             else:
                 await self._setup_polling_monitor(task_id, task_info)
@@ -600,19 +686,19 @@ class ZhipuA2ARequestHandler(DefaultRequestHandler):
         capabilities = agent_card.get("capabilities", {})
         return capabilities.get("pushNotifications", False) or capabilities.get("push_notifications", False)
 
-    async def _setup_push_notifications(self, task_id: str, task_info: dict):
+    async def _setup_push_notifications(self, task_id: str, task_info: ActiveTask):
         """设置推送通知监控"""
         try:
             # 向外部Agent发送推送通知配置
-            push_config = task_info["push_notification_config"]
+            push_config = task_info.push_notification_config
             
             # 获取外部Agent的任务ID - 这是关键！
-            external_task_id = task_info["external_task_id"]
+            external_task_id = task_info.external_task_id
             
             # 根据A2A协议发送 tasks/pushNotificationConfig/set 请求
             # 必须使用外部Agent的任务ID，不是本地任务ID
             await self._send_push_notification_config(
-                task_info["external_agent_url"], 
+                task_info.external_agent_url, 
                 external_task_id,  # 使用外部Agent的任务ID
                 push_config
             )
@@ -624,14 +710,14 @@ class ZhipuA2ARequestHandler(DefaultRequestHandler):
             # 降级到轮询模式
             await self._setup_polling_monitor(task_id, task_info)
 
-    async def _setup_polling_monitor(self, task_id: str, task_info: dict):
+    async def _setup_polling_monitor(self, task_id: str, task_info: ActiveTask):
         """设置轮询监控"""
         try:
             max_attempts = agent_config.polling_max_attempts  # 使用配置的最大轮询次数
             interval = agent_config.polling_interval  # 使用配置的轮询间隔
             
             # 获取外部Agent的task_id
-            external_task_id = task_info.get("external_task_id", task_id)
+            external_task_id = task_info.external_task_id or task_id
             logger.info(f"🔄 Starting polling monitor for local task {task_id}, external task {external_task_id}")
             
             for attempt in range(max_attempts):
@@ -639,7 +725,7 @@ class ZhipuA2ARequestHandler(DefaultRequestHandler):
                 
                 # 使用外部Agent的task_id发送 tasks/get 请求获取任务状态
                 task_status = await self._get_external_task_status(
-                    task_info["external_agent_url"],
+                    task_info.external_agent_url,
                     external_task_id  # 使用外部Agent的task_id
                 )
                 
@@ -953,7 +1039,7 @@ class ZhipuA2ARequestHandler(DefaultRequestHandler):
             # 更新本地任务记录
             if task_id in self.active_tasks:
                 logger.info(f"🔄 更新active_tasks中的任务记录")
-                old_status = self.active_tasks[task_id]["status"]
+                old_status = self.active_tasks[task_id].status
                 
                 # 使用解析后的实际状态值
                 external_status = external_result.get("status")
@@ -962,9 +1048,9 @@ class ZhipuA2ARequestHandler(DefaultRequestHandler):
                 else:
                     new_status = external_result.get("state", old_status)
                 
-                self.active_tasks[task_id]["status"] = new_status
-                self.active_tasks[task_id]["result"] = external_result.get("result")
-                self.active_tasks[task_id]["completed_at"] = datetime.utcnow()
+                self._set_active_task_status(task_id, new_status)
+                self.active_tasks[task_id].result = external_result.get("result")
+                self.active_tasks[task_id].completed_at = _utcnow()
                 logger.info(f"✅ Active tasks更新: {old_status} -> {new_status}")
             else:
                 logger.warning(f"⚠️ 在active_tasks中未找到任务: {task_id}")
@@ -1001,9 +1087,9 @@ class ZhipuA2ARequestHandler(DefaultRequestHandler):
             
             # 更新本地记录
             if task_id in self.active_tasks:
-                self.active_tasks[task_id]["status"] = "failed"
-                self.active_tasks[task_id]["error"] = error_message
-                self.active_tasks[task_id]["completed_at"] = datetime.utcnow()
+                self._set_active_task_status(task_id, "failed")
+                self.active_tasks[task_id].error = error_message
+                self.active_tasks[task_id].completed_at = _utcnow()
             
             logger.info(f"❌ Task {task_id} marked as failed: {error_message}")
             
@@ -1164,17 +1250,17 @@ class ZhipuA2ARequestHandler(DefaultRequestHandler):
                 logger.info(f"✅ 从active_tasks找到任务 {task_id}")
                 
                 # 如果是外部Agent任务，需要查询外部Agent的最新状态
-                if task_info.get("type") == "external_agent_dispatch" and task_info.get("external_agent_url"):
-                    logger.info(f"🌐 检测到外部Agent任务，主动查询最新状态: {task_info['external_agent_url']}")
+                if task_info.type == "external_agent_dispatch" and task_info.external_agent_url:
+                    logger.info(f"🌐 检测到外部Agent任务，主动查询最新状态: {task_info.external_agent_url}")
                     
                     # 使用外部Agent的task_id进行查询
-                    external_task_id = task_info.get("external_task_id", task_id)
+                    external_task_id = task_info.external_task_id or task_id
                     logger.info(f"🔍 使用外部task_id查询: {external_task_id}")
                     
                     try:
                         # 主动查询外部Agent的最新状态
                         external_status = await self._get_external_task_status(
-                            task_info["external_agent_url"],
+                            task_info.external_agent_url,
                             external_task_id  # 使用外部Agent的task_id
                         )
                         
@@ -1238,10 +1324,11 @@ class ZhipuA2ARequestHandler(DefaultRequestHandler):
                     logger.warning(f"⚠️ task store中没有任务记录，基于active_tasks构造基本Task结构")
                     
                     # 使用A2A SDK构造基本的TaskStatus
-                    task_state = getattr(TaskState, task_info["status"], TaskState.working) if hasattr(TaskState, task_info["status"]) else TaskState.working
+                    task_state = getattr(TaskState, task_info.status, TaskState.working)
+                    created_at_iso = task_info.created_at.isoformat()
                     basic_status = TaskStatus(
                         state=task_state,
-                        timestamp=task_info.get("created_at", datetime.utcnow()).isoformat() if hasattr(task_info.get("created_at", datetime.utcnow()), 'isoformat') else str(task_info.get("created_at", datetime.utcnow()))
+                        timestamp=created_at_iso
                     )
                     
                     task_dict = {
@@ -1249,13 +1336,13 @@ class ZhipuA2ARequestHandler(DefaultRequestHandler):
                         "kind": "task",
                         "status": basic_status,  # 使用A2A SDK的TaskStatus对象
                         "history": [],
-                        "result": task_info.get("result"),
+                        "result": task_info.result,
                         "artifacts": None,
                         "metadata": {
-                            "external_agent_id": task_info.get("external_agent_id"),
-                            "type": task_info.get("type"),
-                            "created_at": task_info["created_at"].isoformat() if hasattr(task_info["created_at"], 'isoformat') else str(task_info["created_at"]),
-                            "completed_at": task_info.get("completed_at").isoformat() if task_info.get("completed_at") and hasattr(task_info.get("completed_at"), 'isoformat') else None
+                            "external_agent_id": task_info.external_agent_id,
+                            "type": task_info.type,
+                            "created_at": created_at_iso,
+                            "completed_at": task_info.completed_at.isoformat() if task_info.completed_at else None
                         }
                     }
                     
@@ -1274,19 +1361,20 @@ class ZhipuA2ARequestHandler(DefaultRequestHandler):
         """处理任务执行请求"""
         try:
             task_id = str(uuid.uuid4())
+            now = _utcnow()
             task_type = task_request.get("type", "general")
             task_params = task_request.get("parameters", {})
             
             logger.info(f"🎯 A2A task request: {task_type} with ID: {task_id}")
             
             # 记录活跃任务
-            self.active_tasks[task_id] = {
-                "id": task_id,
-                "type": task_type,
-                "status": "running",
-                "created_at": datetime.utcnow(),
-                "parameters": task_params
-            }
+            self._record_active_task(task_id, ActiveTask(
+                id=task_id,
+                type=task_type,
+                status="running",
+                created_at=now,
+                parameters=task_params
+            ))
             
             # 执行任务
             execution_result = await self.agent_executor.execute({
@@ -1296,16 +1384,17 @@ class ZhipuA2ARequestHandler(DefaultRequestHandler):
             })
             
             # 更新任务状态
+            completed_at = _utcnow()
             if task_id in self.active_tasks:
-                self.active_tasks[task_id]["status"] = execution_result.get("status", "completed")
-                self.active_tasks[task_id]["result"] = execution_result.get("result")
-                self.active_tasks[task_id]["completed_at"] = datetime.utcnow()
+                self._set_active_task_status(task_id, execution_result.get("status", "completed"))
+                self.active_tasks[task_id].result = execution_result.get("result")
+                self.active_tasks[task_id].completed_at = completed_at
             
             return {
                 "task_id": task_id,
                 "status": execution_result.get("status", "completed"),
                 "result": execution_result.get("result"),
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": completed_at.isoformat()
             }
             
         except Exception as e:
@@ -1314,44 +1403,41 @@ class ZhipuA2ARequestHandler(DefaultRequestHandler):
                 "task_id": task_id if 'task_id' in locals() else "unknown",
                 "status": "failed",
                 "error": str(e),
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": _utcnow().isoformat()
             }
     
     async def handle_agent_discovery_request(self, discovery_params: Dict[str, Any]) -> Dict[str, Any]:
         """处理Agent发现请求 - 简化版本直接返回终端设备信息"""
+        now_iso = _utcnow().isoformat()
         try:
             logger.info(f"🔍 A2A agent discovery request: {discovery_params}")
             
             # 直接使用终端设备管理器获取设备信息
             try:
-                from src.core_application.terminal_device_manager import TerminalDeviceManager
-                from src.data_persistence.database import SessionLocal
-                
-                db = SessionLocal()
-                device_manager = TerminalDeviceManager(db)
-                
                 device_type = discovery_params.get("device_type")
-                devices = device_manager.get_devices(device_type=device_type, status="active")
+                devices = await asyncio.to_thread(
+                    _terminal_device_manager().get_devices,
+                    device_type=device_type,
+                    status="active"
+                )
                 
                 discovered_agents = [
                     {
                         "device_id": device.device_id,
                         "name": device.name,
-                        "device_type": device.device_type,
-                        "capabilities": device.mcp_capabilities,
+                        "device_type": getattr(device.device_type, "value", device.device_type),
+                        "capabilities": device.mcp_tools or [],
                         "mcp_server_url": device.mcp_server_url,
                         "last_seen": device.last_seen.isoformat() if device.last_seen else None
                     }
                     for device in devices
                 ]
                 
-                db.close()
-                
                 return {
                     "status": "success",
                     "discovered_agents": discovered_agents,
                     "count": len(discovered_agents),
-                    "timestamp": datetime.utcnow().isoformat()
+                    "timestamp": now_iso
                 }
                 
             except Exception as device_error:
@@ -1360,7 +1446,7 @@ class ZhipuA2ARequestHandler(DefaultRequestHandler):
                     "status": "success",
                     "discovered_agents": [],
                     "count": 0,
-                    "timestamp": datetime.utcnow().isoformat()
+                    "timestamp": now_iso
                 }
                 
         except Exception as e:
@@ -1368,24 +1454,64 @@ class ZhipuA2ARequestHandler(DefaultRequestHandler):
             return {
                 "status": "failed",
                 "error": str(e),
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": now_iso
             }
     
-    def get_active_tasks_status(self) -> Dict[str, Any]:
-        """获取活跃任务状态"""
+    def _record_active_task(self, task_id: str, task_info: ActiveTask):
+        """记录活跃任务，并淘汰超过TTL的任务和超出上限的已结束任务"""
+        self.active_tasks.pop(task_id, None)
+        self._finished_tasks.pop(task_id, None)
+        self.active_tasks[task_id] = task_info
+        if task_info.status in _FINISHED_TASK_STATES:
+            self._finished_tasks[task_id] = None
+        
+        # 超过TTL的任务：记录顺序即created_at顺序，从队首开始淘汰，长期无人查询的运行中任务也会被清理
+        expired = 0
+        cutoff = task_info.created_at - self._active_tasks_ttl
+        while self.active_tasks:
+            oldest_id, oldest = next(iter(self.active_tasks.items()))
+            if oldest.created_at > cutoff:
+                break
+            del self.active_tasks[oldest_id]
+            self._finished_tasks.pop(oldest_id, None)
+            expired += 1
+        
+        # 超过上限时按结束顺序淘汰已结束的任务
+        evicted = 0
+        while len(self.active_tasks) > self._active_tasks_max and self._finished_tasks:
+            finished_id, _ = self._finished_tasks.popitem(last=False)
+            del self.active_tasks[finished_id]
+            evicted += 1
+        
+        if expired or evicted:
+            logger.debug(f"🧹 Evicted {expired} expired and {evicted} finished tasks from active_tasks")
+    
+    def _set_active_task_status(self, task_id: str, status: str):
+        """更新活跃任务状态，同步维护已结束任务的淘汰顺序"""
+        self.active_tasks[task_id].status = status
+        self._finished_tasks.pop(task_id, None)
+        if status in _FINISHED_TASK_STATES:
+            self._finished_tasks[task_id] = None
+    
+    def get_active_tasks_status(self, limit: int = 100, offset: int = 0) -> Dict[str, Any]:
+        """获取活跃任务状态（分页）"""
+        page = islice(self.active_tasks.values(), offset, offset + limit)
         return {
             "active_tasks_count": len(self.active_tasks),
+            "running_tasks_count": len(self.active_tasks) - len(self._finished_tasks),
             "tasks": [
                 {
-                    "id": task["id"],
-                    "type": task["type"],
-                    "status": task["status"],
-                    "created_at": task["created_at"].isoformat(),
-                    "completed_at": task.get("completed_at", {}).isoformat() if task.get("completed_at") else None
+                    "id": task.id,
+                    "type": task.type,
+                    "status": task.status,
+                    "created_at": task.created_at.isoformat(),
+                    "completed_at": task.completed_at.isoformat() if task.completed_at else None
                 }
-                for task in self.active_tasks.values()
+                for task in page
             ],
-            "timestamp": datetime.utcnow().isoformat()
+            "limit": limit,
+            "offset": offset,
+            "timestamp": _utcnow().isoformat()
         }
     
     async def _get_intent_router(self):
@@ -1407,15 +1533,55 @@ class ZhipuA2ARequestHandler(DefaultRequestHandler):
         
         return self._intent_router if self._intent_router is not False else None
     
+    def _get_cached_route(self, key: Tuple[str, Optional[str]]) -> Optional[str]:
+        """读取未过期的路由结果"""
+        entry = self._route_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at <= time.monotonic():
+            del self._route_cache[key]
+            return None
+        return response
+    
+    def _store_route(self, key: Tuple[str, Optional[str]], response: str):
+        """写入路由结果，超过上限时淘汰最早的条目"""
+        self._route_cache[key] = (time.monotonic() + self._route_ttl, response)
+        self._route_cache.move_to_end(key)
+        while len(self._route_cache) > self._route_cache_max:
+            self._route_cache.popitem(last=False)
+    
     async def _process_message(self, user_input: str, notification_url: Optional[str] = None) -> str:
-        """处理用户消息 - 统一的智能A2A路由处理"""
+        """处理用户消息 - 相同输入的并发/重复请求合并为一次路由调用"""
+        key = (user_input, notification_url)
+        cached = self._get_cached_route(key)
+        if cached is not None:
+            return cached
+        
+        lock = self._route_locks[key]
+        try:
+            async with lock:
+                # 等待期间其他协程可能已经完成路由
+                cached = self._get_cached_route(key)
+                if cached is not None:
+                    return cached
+                response, cacheable = await self._route_message(user_input, notification_url)
+                if cacheable:
+                    self._store_route(key, response)
+                return response
+        finally:
+            if not lock.locked() and self._route_locks.get(key) is lock:
+                del self._route_locks[key]
+    
+    async def _route_message(self, user_input: str, notification_url: Optional[str] = None) -> Tuple[str, bool]:
+        """统一的智能A2A路由处理，返回 (响应文本, 是否可缓存)"""
         try:
             # 线程安全获取路由器实例
             intent_router = await self._get_intent_router()
             
             if intent_router is None:
                 logger.error("A2A intent router not available")
-                return f"系统错误：意图路由器不可用。原始消息：{user_input}"
+                return f"系统错误：意图路由器不可用。原始消息：{user_input}", False
             
             # 执行智能路由分析
             routing_result = await intent_router.analyze_and_route_request(
@@ -1432,24 +1598,24 @@ class ZhipuA2ARequestHandler(DefaultRequestHandler):
             if routing_result.get("status") == "success":
                 if routing_result.get("type") == "agent_dispatch":
                     # 任务已分发给其他Agent
-                    return routing_result.get("message", "任务已分发处理，请稍后查看结果。")
+                    return routing_result.get("message", "任务已分发处理，请稍后查看结果。"), True
                 elif routing_result.get("type") == "local_chat":
                     # 本地LLM处理
-                    return routing_result.get("response", "已通过本地智能处理您的请求。")
+                    return routing_result.get("response", "已通过本地智能处理您的请求。"), True
                 elif routing_result.get("type") == "async_task":
                     # 异步任务
-                    return f"异步任务已创建：{routing_result.get('task_id', 'N/A')}。{routing_result.get('message', '')}"
+                    return f"异步任务已创建：{routing_result.get('task_id', 'N/A')}。{routing_result.get('message', '')}", True
                 else:
-                    return routing_result.get("response", routing_result.get("message", "请求已处理完成。"))
+                    return routing_result.get("response", routing_result.get("message", "请求已处理完成。")), True
             else:
                 # 路由失败，返回错误信息
                 error_msg = routing_result.get('error', '未知错误')
                 logger.error(f"Smart routing failed: {error_msg}")
-                return f"处理失败：{error_msg}"
+                return f"处理失败：{error_msg}", False
                 
         except Exception as e:
             logger.error(f"Message processing failed: {e}")
-            return f"系统错误：{str(e)}"
+            return f"系统错误：{str(e)}", False
     
     # A2A协议推送通知配置方法
     async def on_tasks_push_notification_config_set(self, params: Any, context=None):
@@ -1476,18 +1642,10 @@ class ZhipuA2ARequestHandler(DefaultRequestHandler):
         try:
             logger.info("📋 Getting push notification config")
             
-            # 返回默认配置（实际应该从存储中获取）
-            default_config = {
-                "enabled": True,
-                "notification_types": ["task_completed", "task_failed", "task_progress"],
-                "delivery_methods": ["webhook", "websocket"],
-                "retry_attempts": 3,
-                "timeout_seconds": 30
-            }
-            
+            # 返回默认配置；结果会经过JSON/Celery序列化，因此交出浅拷贝的dict
             return {
                 "status": "success",
-                "config": default_config
+                "config": dict(_DEFAULT_PUSH_CONFIG)
             }
         except Exception as e:
             logger.error(f"❌ Error getting push notification config: {e}")
@@ -1513,19 +1671,10 @@ class ZhipuA2ARequestHandler(DefaultRequestHandler):
             logger.info("📝 Listing push notification configs")
             
             # 返回配置列表（实际应该从存储中获取）
-            configs = [
-                {
-                    "id": "default",
-                    "name": "默认推送配置",
-                    "enabled": True,
-                    "created_at": datetime.utcnow().isoformat()
-                }
-            ]
-            
             return {
                 "status": "success",
-                "configs": configs,
-                "total": len(configs)
+                "configs": [dict(_DEFAULT_PUSH_CONFIG_ENTRY)],
+                "total": 1
             }
         except Exception as e:
             logger.error(f"❌ Error listing push notification configs: {e}")
@@ -1560,6 +1709,10 @@ class ZhipuA2AServer:
             http_handler=self.request_handler
         )
         
+        # Agent Card版本号，每次重新计算缓存时递增，供外部缓存判断是否失效
+        self.card_version = 0
+        self._recompute_card_cache()
+        
         logger.info("✅ ZhipuA2AServer initialized with official SDK")
     
     def reload_agent_card(self):
@@ -1573,6 +1726,8 @@ class ZhipuA2AServer:
             http_handler=self.request_handler
         )
         
+        self._recompute_card_cache()
+        
         logger.info("✅ Agent Card reloaded successfully")
     
     def get_fastapi_app(self) -> FastAPI:
@@ -1583,9 +1738,67 @@ class ZhipuA2AServer:
             extended_agent_card_url="/agent/authenticatedExtendedCard"
         )
     
+    def _recompute_card_cache(self):
+        """根据当前Agent Card预计算状态接口需要的静态数据，仅在加载/重载时调用"""
+        card = self.agent_card
+        self._agent_card_json = card.model_dump(mode='json')
+        self.card_version += 1
+        
+        # 从Agent Card获取基础信息，避免硬编码
+        self._agent_card_info = {
+            "agent_name": card.name,
+            "agent_description": card.description,
+            "protocol_version": card.protocol_version,
+            "agent_version": card.version,
+            "agent_url": card.url,
+            "preferred_transport": card.preferred_transport
+        }
+        
+        # 构建技能列表，包含详细的技能信息
+        self._skills_summary = [
+            {
+                "id": skill.id,
+                "name": skill.name,
+                "description": skill.description[:100] + "..." if len(skill.description) > 100 else skill.description,
+                "tags": skill.tags,
+                "examples_count": len(skill.examples) if hasattr(skill, 'examples') and skill.examples else 0
+            }
+            for skill in card.skills
+        ]
+        
+        # 从技能中提取功能特性，避免硬编码；dict.fromkeys去重并保持顺序
+        skill_features = [
+            feature
+            for skill in card.skills
+            for predicate, feature in _SKILL_FEATURE_RULES
+            if predicate(skill.id.lower(), skill.tags)
+        ]
+        
+        # 添加基于配置的特性
+        if card.capabilities.streaming:
+            skill_features.append("Real-time streaming")
+        if card.capabilities.push_notifications:
+            skill_features.append("Push notifications")
+        
+        # 添加默认的A2A协议特性
+        self._features = list(dict.fromkeys(skill_features)) + list(_DEFAULT_FEATURES)
+        
+        self._capabilities = {
+            # 从Agent Card获取的A2A标准能力
+            "streaming": card.capabilities.streaming,
+            "push_notifications": card.capabilities.push_notifications,
+            "state_transition_history": card.capabilities.state_transition_history,
+            # 扩展的服务器能力
+            "intelligent_routing": True,
+            "terminal_agent_management": True,
+            "multi_agent_orchestration": True,
+            "smart_discovery": True,
+            "a2a_protocol_gateway": True
+        }
+    
     def get_agent_card(self) -> Dict[str, Any]:
-        """获取Agent Card"""
-        return self.agent_card.model_dump(mode='json')
+        """获取Agent Card - 调用方会改写顶层url等字段，因此返回浅拷贝"""
+        return dict(self._agent_card_json)
     
     def get_status(self) -> Dict[str, Any]:
         """获取增强版服务状态"""
@@ -1593,12 +1806,7 @@ class ZhipuA2AServer:
             # 获取终端设备统计 - 使用重构后的设备管理器
             terminal_device_summary = {}
             try:
-                from src.data_persistence.database import SessionLocal
-                from src.core_application.terminal_device_manager import TerminalDeviceManager
-                db = SessionLocal()
-                device_manager = TerminalDeviceManager(db)
-                terminal_device_summary = device_manager.get_device_summary()
-                db.close()
+                terminal_device_summary = _terminal_device_manager().get_device_summary()
             except ImportError as e:
                 logger.warning(f"Failed to import terminal device components: {e}")
                 terminal_device_summary = {"status": "device_manager_unavailable", "reason": "import_error"}
@@ -1607,78 +1815,20 @@ class ZhipuA2AServer:
                 terminal_device_summary = {"status": "error", "reason": str(e)}
             
             # 获取任务统计
-            active_tasks_status = self.request_handler.get_active_tasks_status()
-            
-            # 从Agent Card获取基础信息，避免硬编码
-            agent_card_info = {
-                "agent_name": self.agent_card.name,
-                "agent_description": self.agent_card.description,
-                "protocol_version": self.agent_card.protocol_version,
-                "agent_version": self.agent_card.version,
-                "agent_url": self.agent_card.url,
-                "preferred_transport": self.agent_card.preferred_transport
-            }
-            
-            # 构建技能列表，包含详细的技能信息
-            skills_summary = [
-                {
-                    "id": skill.id,
-                    "name": skill.name,
-                    "description": skill.description[:100] + "..." if len(skill.description) > 100 else skill.description,
-                    "tags": skill.tags,
-                    "examples_count": len(skill.examples) if hasattr(skill, 'examples') and skill.examples else 0
-                }
-                for skill in self.agent_card.skills
-            ]
-            
-            # 从技能中提取功能特性，避免硬编码
-            features = []
-            for skill in self.agent_card.skills:
-                if "intent" in skill.id.lower() or "nlp" in skill.tags:
-                    features.append("LLM-powered intent recognition")
-                if "task" in skill.id.lower() or "async" in skill.tags:
-                    features.append("Async task management")
-                if "routing" in skill.tags:
-                    features.append("Dynamic agent discovery")
-            
-            # 添加基于配置的特性
-            if self.agent_card.capabilities.streaming:
-                features.append("Real-time streaming")
-            if self.agent_card.capabilities.push_notifications:
-                features.append("Push notifications")
-            
-            # 去重并添加默认的A2A协议特性
-            features = list(set(features))
-            features.extend([
-                "Multi-agent task orchestration",
-                "Terminal device lifecycle management", 
-                "Smart capability matching",
-                "A2A protocol compliance"
-            ])
+            active_tasks_status = self.request_handler.get_active_tasks_status(limit=0)
             
             return {
                 "service": f"{self.agent_card.name} - Enhanced Server",
                 "version": self.agent_card.version,
                 "sdk_available": True,
-                "agent_card": agent_card_info,
-                "capabilities": {
-                    # 从Agent Card获取的A2A标准能力
-                    "streaming": self.agent_card.capabilities.streaming,
-                    "push_notifications": self.agent_card.capabilities.push_notifications,
-                    "state_transition_history": self.agent_card.capabilities.state_transition_history,
-                    # 扩展的服务器能力
-                    "intelligent_routing": True,
-                    "terminal_agent_management": True,
-                    "multi_agent_orchestration": True,
-                    "smart_discovery": True,
-                    "a2a_protocol_gateway": True
-                },
+                "agent_card": dict(self._agent_card_info),
+                "capabilities": dict(self._capabilities),
                 "active_tasks": len(self.active_tasks),
                 "request_handler_tasks": active_tasks_status.get("active_tasks_count", 0),
                 "terminal_devices": terminal_device_summary,
-                "skills": skills_summary,
-                "skills_count": len(self.agent_card.skills),
-                "features": features,
+                "skills": list(self._skills_summary),
+                "skills_count": len(self._skills_summary),
+                "features": list(self._features),
                 "timestamp": datetime.utcnow().isoformat()
             }
         except Exception as e:
@@ -3,17 +3,55 @@ Agent Registry and Management API
 Agent注册表和管理API - 提供完整的外部Agent管理功能
 """
 from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from typing import List, Dict, Any, Optional
+from collections import Counter
 from datetime import datetime
+from itertools import chain
+import functools
 import logging
 
-from src.config.agent_registry import get_all_agents, get_enabled_agents
+from src.config.agent_registry import get_agent_registry
 from pydantic import BaseModel, Field
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/agents", tags=["Agent Registry & Management"])
 
+
+@functools.cache
+def _registry():
+    """绑定全局Agent注册表单例"""
+    return get_agent_registry()
+
+
+def _build_agent_view(record) -> Dict[str, Any]:
+    """构建 /list 接口中单个Agent的视图"""
+    return {
+        "id": record.id,
+        "name": record.name,
+        "agent_card_url": record.agent_card_url,
+        "url": record.url,
+        "enabled": record.enabled,
+        "added_at": record.added_at,
+        "capabilities": record.capabilities,
+        "status": "available" if record.available else "unavailable"
+    }
+
+
+def _build_external_agent_info(record) -> Dict[str, Any]:
+    """构建 /registry 接口中单个Agent的视图，字段与 ExternalAgentInfo 一致"""
+    return {
+        "agent_id": record.id,
+        "name": record.name,
+        "description": record.description,
+        "url": record.url or "",
+        "capabilities": list(record.capabilities),
+        "tags": list(record.tags),
+        "enabled": record.enabled,
+        "agent_card": record.agent_card
+    }
+
 # Pydantic模型
 class ExternalAgentInfo(BaseModel):
     """外部Agent信息"""
@@ -47,53 +85,35 @@ class AgentResponse(BaseModel):
 async def add_agent(request: AddAgentRequest):
     """添加新的A2A Agent"""
     try:
-        from src.config.agent_registry import get_agent_registry
-        
-        registry = get_agent_registry()
+        registry = _registry()
         
         # 检查是否已存在相同URL的Agent
-        all_agents = await registry.get_all_agents()
-        for agent_id, agent_info in all_agents.items():
-            if agent_info.get('agent_card_url') == request.agent_card_url:
-                return {
-                    "success": False,
-                    "error": f"Agent with URL '{request.agent_card_url}' already exists",
-                    "existing_agent_id": agent_id
-                }
+        existing_agent_id = registry.get_agent_id_by_card_url(request.agent_card_url)
+        if existing_agent_id:
+            return {
+                "success": False,
+                "error": f"Agent with URL '{request.agent_card_url}' already exists",
+                "existing_agent_id": existing_agent_id
+            }
         
-        # 添加Agent
-        success = await registry.add_agent_by_card_url(
+        # 添加Agent，注册表直接返回新增的Agent信息
+        result = await registry.add_agent_by_card_url(
             request.agent_card_url, 
             request.agent_id
         )
         
-        if success:
-            # 获取添加后的Agent信息
-            if request.agent_id:
-                agent_info = await registry.get_agent_by_id(request.agent_id)
-                agent_id = request.agent_id
-            else:
-                # 找到最新添加的Agent
-                all_agents = await registry.get_all_agents()
-                for aid, info in all_agents.items():
-                    if info.get('agent_card_url') == request.agent_card_url:
-                        agent_info = info
-                        agent_id = aid
-                        break
-                else:
-                    agent_info = None
-                    agent_id = None
-            
+        if result:
+            agent_id, agent_info = result
             return {
                 "success": True,
                 "message": "Agent added successfully",
                 "agent": {
                     "id": agent_id,
-                    "name": agent_info.get('name', 'Unknown') if agent_info else 'Unknown',
+                    "name": agent_info.get('name', 'Unknown'),
                     "agent_card_url": request.agent_card_url,
-                    "url": agent_info.get('url') if agent_info else None,
+                    "url": agent_info.get('url'),
                     "enabled": True,
-                    "capabilities": agent_info.get('capabilities', []) if agent_info else []
+                    "capabilities": agent_info.get('capabilities', [])
                 }
             }
         else:
@@ -109,33 +129,19 @@ async def add_agent(request: AddAgentRequest):
             "error": str(e)
         }
 
-@router.get("/list", response_model=Dict[str, Any])
+@router.get("/list", response_class=ORJSONResponse)
 async def list_agents():
     """获取所有已注册的Agent列表"""
     try:
-        from src.config.agent_registry import get_agent_registry
+        registry = _registry()
+        records = await registry.get_agent_records()
         
-        registry = get_agent_registry()
-        all_agents = await registry.get_all_agents()
-        
-        agents_list = []
-        for agent_id, agent_info in all_agents.items():
-            agents_list.append({
-                "id": agent_id,
-                "name": agent_info.get('name', 'Unknown'),
-                "agent_card_url": agent_info.get('agent_card_url'),
-                "url": agent_info.get('url'),
-                "enabled": agent_info.get('enabled', True),
-                "added_at": agent_info.get('added_at'),
-                "capabilities": agent_info.get('capabilities', []),
-                "status": "available" if 'url' in agent_info else "unavailable"
-            })
-        
-        return {
+        # 在try内完成整体序列化，出错时返回错误响应而不是截断的JSON
+        return ORJSONResponse({
             "success": True,
-            "agents": agents_list,
-            "total": len(agents_list)
-        }
+            "agents": [_build_agent_view(record) for record in records.values()],
+            "total": len(records)
+        })
         
     except Exception as e:
         logger.error(f"Failed to list agents: {e}")
@@ -149,9 +155,7 @@ async def list_agents():
 async def remove_agent(agent_id: str):
     """移除指定的Agent"""
     try:
-        from src.config.agent_registry import get_agent_registry
-        
-        registry = get_agent_registry()
+        registry = _registry()
         success = registry.remove_agent(agent_id)
         
         return {
@@ -170,9 +174,7 @@ async def remove_agent(agent_id: str):
 async def enable_agent(agent_id: str):
     """启用指定的Agent"""
     try:
-        from src.config.agent_registry import get_agent_registry
-        
-        registry = get_agent_registry()
+        registry = _registry()
         success = registry.enable_agent(agent_id)
         
         return {
@@ -191,9 +193,7 @@ async def enable_agent(agent_id: str):
 async def disable_agent(agent_id: str):
     """禁用指定的Agent"""
     try:
-        from src.config.agent_registry import get_agent_registry
-        
-        registry = get_agent_registry()
+        registry = _registry()
         success = registry.disable_agent(agent_id)
         
         return {
@@ -212,9 +212,7 @@ async def disable_agent(agent_id: str):
 async def reload_agent_config():
     """重新加载Agent配置文件"""
     try:
-        from src.config.agent_registry import get_agent_registry
-        
-        registry = get_agent_registry()
+        registry = _registry()
         registry.reload_config()
         
         # 获取重新加载后的Agent列表
@@ -235,7 +233,7 @@ async def reload_agent_config():
 
 # ==================== Agent发现和查询API (只读操作) ====================
 
-@router.get("/registry", response_model=List[ExternalAgentInfo])
+@router.get("/registry", response_class=ORJSONResponse)
 async def get_external_agents_registry(
     enabled_only: bool = False,
     capability: Optional[str] = None,
@@ -249,35 +247,17 @@ async def get_external_agents_registry(
     - **tag**: 按标签筛选Agent
     """
     try:
-        # 获取Agent配置
-        if enabled_only:
-            agents_config = get_enabled_agents()
-        else:
-            agents_config = get_all_agents()
-        
-        # 转换为响应格式
-        agents_list = []
-        for agent_id, config in agents_config.items():
-            # 应用筛选条件
-            if capability and capability not in config.get("capabilities", []):
-                continue
-            if tag and tag not in config.get("tags", []):
-                continue
-                
-            agent_info = ExternalAgentInfo(
-                agent_id=config["agent_id"],
-                name=config["name"],
-                description=config["description"],
-                url=config["url"],
-                capabilities=config.get("capabilities", []),
-                tags=config.get("tags", []),
-                enabled=config.get("enabled", False),
-                agent_card=config.get("agent_card", {})
-            )
-            agents_list.append(agent_info)
+        # 由注册表通过倒排索引完成筛选
+        registry = _registry()
+        records = await registry.query(
+            capability=capability or None,
+            tag=tag or None,
+            enabled_only=enabled_only
+        )
         
-        logger.info(f"Retrieved {len(agents_list)} external agents from registry")
-        return agents_list
+        response = ORJSONResponse([_build_external_agent_info(record) for record in records])
+        logger.info(f"Retrieved {len(records)} external agents from registry")
+        return response
         
     except Exception as e:
         logger.error(f"Failed to get external agents registry: {e}")
@@ -293,20 +273,19 @@ async def get_external_agents_summary():
     """
     try:
         # 获取外部Agent统计
-        all_external_agents = get_all_agents()
-        enabled_external_agents = get_enabled_agents()
-        
-        # 统计能力
-        capabilities_summary = {}
-        agent_types = {"external_agent": len(all_external_agents)}
+        registry = _registry()
+        all_external_agents = await registry.get_all_agents()
+        enabled_external_agents = await registry.get_agent_records(enabled_only=True)
+        total_external_agents = len(all_external_agents)
         
         # 统计外部Agent能力
-        for agent_id, config in all_external_agents.items():
-            for capability in config.get("capabilities", []):
-                capabilities_summary[capability] = capabilities_summary.get(capability, 0) + 1
+        agent_types = {"external_agent": total_external_agents}
+        capabilities_summary = dict(Counter(chain.from_iterable(
+            config.get("capabilities", ()) for config in all_external_agents.values()
+        )))
         
         summary = {
-            "total_external_agents": len(all_external_agents),
+            "total_external_agents": total_external_agents,
             "enabled_external_agents": len(enabled_external_agents),
             "agent_types": agent_types,
             "capabilities_summary": capabilities_summary
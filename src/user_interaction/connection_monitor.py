@@ -13,6 +13,8 @@ import asyncio
 import json
 import logging
 import time
+from collections import deque
+from dataclasses import dataclass, field
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Any, Optional
 import threading
@@ -34,45 +36,126 @@ except ImportError:
     RICH_AVAILABLE = False
     print("⚠️ Rich库未安装，将使用基础文本显示")
 
+# uvloop随uvicorn[standard]安装(Windows除外)，可用时用于加速独立运行的监控循环
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
 from src.user_interaction.websocket_reconnector import WebSocketReconnector, ConnectionState
 
 logger = logging.getLogger(__name__)
 
+# ANSI清屏序列：光标归位并清除整个屏幕
+_CLEAR_SCREEN = "\x1b[H\x1b[2J"
+
+# 字节单位及对应除数，按bit_length直接定位单位
+_BYTE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+_BYTE_DIVS = tuple(1 << (10 * i) for i in range(len(_BYTE_UNITS)))
+
+# 连接稳定性统计窗口大小
+_STABILITY_WINDOW = 20
+
+# 更新监控数据时，每处理多少个连接让出一次事件循环
+_YIELD_EVERY = 16
+
+# 开启历史记录时保留的事件数量
+_HISTORY_MAXLEN = 100
+
+# 时长格式：(上限, 除数, 后缀)
+_DURATION_UNITS = ((60, 1, "s"), (3600, 60, "m"), (float("inf"), 3600, "h"))
+
+
+@dataclass(slots=True)
+class MonitoredConnection:
+    """单个被监控连接的状态 - 使用slots属性替代字典键查找，减少每个周期的开销"""
+    name: str
+    reconnector: WebSocketReconnector
+    start_time: datetime = field(default_factory=datetime.now)
+    last_update: float = field(default_factory=time.monotonic)  # 单调时钟，仅用于计算间隔
+    connection_history: deque = field(default_factory=lambda: deque(maxlen=_HISTORY_MAXLEN))  # 仅record_history开启时写入
+    # 最近连接状态的环形缓冲区(每字节一个0/1)，配合滚动计数计算稳定性
+    connected_bits: bytearray = field(default_factory=lambda: bytearray(_STABILITY_WINDOW))
+    bits_idx: int = 0
+    bits_filled: int = 0
+    connected_count: int = 0  # 窗口内已连接的采样数
+    error_history: List[Dict[str, Any]] = field(default_factory=list)
+    performance_metrics: Dict[str, float] = field(default_factory=lambda: {
+        "avg_response_time": 0.0,
+        "data_throughput": 0.0,
+        "error_rate": 0.0
+    })
+    # 本周期缓存的统计快照
+    stats: Optional[Dict[str, Any]] = None
+    is_connected: bool = False
+    is_healthy: bool = False
+    # 上次渲染时的状态签名
+    render_sig: Optional[tuple] = None
+
 
 class ConnectionMonitor:
     """连接状态监控器"""
     
-    def __init__(self):
-        self.monitors: Dict[str, Dict[str, Any]] = {}
+    # 详细信息面板模板
+    _DETAILS_TEMPLATE = (
+        "🔗 连接: {name}\n"
+        "📍 状态: {state}\n"
+        "⏱️ 重试计数: {retry_count}/{max_retries}\n"
+        "📊 总连接数: {total_connections}\n"
+        "✅ 成功连接: {successful_connections}\n"
+        "❌ 失败连接: {failed_connections}\n"
+        "🔄 重连次数: {total_reconnections}\n"
+        "⏰ 当前连接时长: {current_uptime}\n"
+        "📈 总运行时长: {total_uptime}\n"
+        "\n"
+        "📡 数据传输:\n"
+        "  📤 发送: {data_sent_count} 条 ({bytes_sent})\n"
+        "  📥 接收: {data_received_count} 条 ({bytes_received})\n"
+        "  📊 吞吐量: {throughput}/s\n"
+        "\n"
+        "🏥 健康指标:\n"
+        "  🎯 连接稳定性: {connection_stability:.1%}\n"
+        "  📉 错误率: {error_rate:.1%}\n"
+        "  🔋 成功率: {success_rate:.1f}%"
+    )
+    
+    def __init__(self, record_history: bool = False):
+        self.monitors: Dict[str, MonitoredConnection] = {}
+        # 是否保留每个周期的连接事件历史；稳定性计算不依赖它，默认关闭
+        self.record_history = record_history
         self.is_monitoring = False
         self.monitor_task: Optional[asyncio.Task] = None
         self.update_interval = 2.0  # 2秒更新一次
+        self._next_tick = 0.0  # 下一次更新的单调时钟截止时间
+        
+        # 连接状态未变化时跳过重绘
+        self._dirty = True
+        self._details_cache: Optional[tuple] = None
+        # 每个周期汇总的统计报告，连接增删时失效
+        self._summary: Optional[Dict[str, Any]] = None
         
         if RICH_AVAILABLE:
             self.console = Console()
+            self._build_rich_layout()
+        elif os.name == 'nt':
+            os.system('')  # 启用Windows控制台的ANSI转义序列处理
         
         logger.info("🖥️ 连接状态监控器初始化完成")
     
     def add_connection(self, name: str, reconnector: WebSocketReconnector):
         """添加连接到监控列表"""
-        self.monitors[name] = {
-            "reconnector": reconnector,
-            "start_time": datetime.now(),
-            "last_update": datetime.now(),
-            "connection_history": [],
-            "error_history": [],
-            "performance_metrics": {
-                "avg_response_time": 0.0,
-                "data_throughput": 0.0,
-                "error_rate": 0.0
-            }
-        }
+        self.monitors[name] = MonitoredConnection(name=name, reconnector=reconnector)
+        self._dirty = True
+        self._summary = None
         logger.info(f"📊 添加连接监控: {name}")
     
     def remove_connection(self, name: str):
         """从监控列表移除连接"""
         if name in self.monitors:
             del self.monitors[name]
+            self._dirty = True
+            self._summary = None
             logger.info(f"🗑️ 移除连接监控: {name}")
     
     async def start_monitoring(self):
@@ -103,72 +186,135 @@ class ConnectionMonitor:
     
     async def _start_rich_monitoring(self):
         """启动Rich界面监控"""
-        with Live(self._create_rich_layout(), refresh_per_second=0.5, screen=True) as live:
+        # 关闭自动刷新，只在数据变化时由监控循环显式刷新
+        with Live(self._refresh_rich_layout(), auto_refresh=False, screen=True) as live:
+            self._next_tick = time.monotonic()
             while self.is_monitoring:
                 try:
                     # 更新监控数据
-                    self._update_monitoring_data()
+                    await self._update_monitoring_data()
                     
-                    # 更新显示
-                    live.update(self._create_rich_layout())
+                    # 状态有变化时才原地更新布局内容并刷新显示
+                    if self._dirty:
+                        self._refresh_rich_layout()
+                        live.refresh()
+                        self._dirty = False
                     
-                    await asyncio.sleep(self.update_interval)
+                    await self._sleep_until_next_tick()
                 except Exception as e:
                     logger.error(f"❌ 监控更新异常: {e}")
                     await asyncio.sleep(1)
     
     async def _start_basic_monitoring(self):
         """启动基础文本监控"""
+        self._next_tick = time.monotonic()
         while self.is_monitoring:
             try:
-                self._update_monitoring_data()
-                self._print_basic_status()
-                await asyncio.sleep(self.update_interval)
+                await self._update_monitoring_data()
+                if self._dirty:
+                    self._print_basic_status()
+                    self._dirty = False
+                await self._sleep_until_next_tick()
             except Exception as e:
                 logger.error(f"❌ 监控更新异常: {e}")
                 await asyncio.sleep(1)
     
-    def _update_monitoring_data(self):
+    async def _sleep_until_next_tick(self):
+        """按固定节拍休眠 - 扣除本周期已耗费的时间，避免刷新周期逐渐漂移"""
+        self._next_tick += self.update_interval
+        now = time.monotonic()
+        if self._next_tick < now:
+            # 已经落后于节拍时不补帧，从当前时间重新对齐
+            self._next_tick = now
+        await asyncio.sleep(self._next_tick - now)
+    
+    async def _update_monitoring_data(self):
         """更新监控数据"""
-        current_time = datetime.now()
-        
-        for name, monitor_data in self.monitors.items():
-            reconnector = monitor_data["reconnector"]
+        # 历史记录使用单调时钟浮点数，挂钟时间只在渲染时格式化
+        current_time = time.monotonic()
+        
+        # 先一次性采集所有连接的统计快照，保证同一周期内的数据一致
+        snapshots = [
+            (
+                conn,
+                conn.reconnector.get_connection_stats(),
+                conn.reconnector.is_connected(),
+                conn.reconnector.is_healthy()
+            )
+            for conn in self.monitors.values()
+        ]
+        
+        for i, (conn, stats, is_connected, is_healthy) in enumerate(snapshots, 1):
+            # 分批让出事件循环，连接较多时不阻塞其他协程
+            if i % _YIELD_EVERY == 0:
+                await asyncio.sleep(0)
+                if self.monitors.get(conn.name) is not conn:
+                    continue  # 让出期间连接已被移除
             
-            # 获取连接统计
-            stats = reconnector.get_connection_stats()
+            # 每个周期只读取一次统计，渲染时复用缓存
+            conn.stats = stats
+            conn.is_connected = is_connected
+            conn.is_healthy = is_healthy
             
             # 更新连接历史
-            connection_event = {
-                "timestamp": current_time,
-                "state": stats["current_state"],
-                "is_connected": reconnector.is_connected(),
-                "is_healthy": reconnector.is_healthy(),
-                "retry_count": stats["retry_count"]
-            }
+            if self.record_history:
+                conn.connection_history.append({
+                    "timestamp": current_time,
+                    "state": stats["current_state"],
+                    "is_connected": is_connected,
+                    "is_healthy": is_healthy,
+                    "retry_count": stats["retry_count"]
+                })
             
-            monitor_data["connection_history"].append(connection_event)
+            # 写入环形缓冲区，同时增量维护窗口内已连接计数(未填满的槽位为0)
+            idx = conn.bits_idx
+            new_bit = 1 if is_connected else 0
+            conn.connected_count += new_bit - conn.connected_bits[idx]
+            conn.connected_bits[idx] = new_bit
+            conn.bits_idx = (idx + 1) % _STABILITY_WINDOW
+            if conn.bits_filled < _STABILITY_WINDOW:
+                conn.bits_filled += 1
             
-            # 保持历史记录数量
-            if len(monitor_data["connection_history"]) > 100:
-                monitor_data["connection_history"] = monitor_data["connection_history"][-100:]
+            # 比较渲染签名，判断是否需要重绘
+            sig = (
+                stats["current_state"],
+                stats["retry_count"],
+                stats["bytes_sent"],
+                stats["bytes_received"],
+                stats["total_reconnections"],
+                is_healthy
+            )
+            if conn.render_sig != sig:
+                conn.render_sig = sig
+                self._dirty = True
             
             # 计算性能指标
-            self._calculate_performance_metrics(monitor_data, stats)
+            self._calculate_performance_metrics(conn, stats)
             
-            monitor_data["last_update"] = current_time
+            conn.last_update = current_time
+        
+        # 基于本周期快照汇总统计，供get_summary_report直接返回
+        self._summary = self._build_summary()
+    
+    def _get_cached_stats(self, conn: MonitoredConnection) -> Dict[str, Any]:
+        """获取本周期缓存的连接统计，尚未更新过时直接读取"""
+        stats = conn.stats
+        if stats is None:
+            reconnector = conn.reconnector
+            stats = reconnector.get_connection_stats()
+            conn.stats = stats
+            conn.is_connected = reconnector.is_connected()
+            conn.is_healthy = reconnector.is_healthy()
+        return stats
     
-    def _calculate_performance_metrics(self, monitor_data: Dict, stats: Dict):
+    def _calculate_performance_metrics(self, conn: MonitoredConnection, stats: Dict):
         """计算性能指标"""
-        history = monitor_data["connection_history"]
-        
-        if len(history) < 2:
+        filled = conn.bits_filled
+        if filled < 2:
             return
         
-        # 计算连接稳定性
-        recent_history = history[-20:]  # 最近20个记录
-        connected_count = sum(1 for h in recent_history if h["is_connected"])
-        connection_stability = connected_count / len(recent_history) if recent_history else 0
+        # 计算连接稳定性 - 最近窗口内已连接的比例
+        connection_stability = conn.connected_count / filled
         
         # 计算数据吞吐量
         if stats["total_uptime_seconds"] > 0:
@@ -182,15 +328,15 @@ class ConnectionMonitor:
         else:
             error_rate = 0
         
-        monitor_data["performance_metrics"].update({
+        conn.performance_metrics.update({
             "connection_stability": connection_stability,
             "data_throughput": throughput,
             "error_rate": error_rate,
             "success_rate": stats["success_rate"]
         })
     
-    def _create_rich_layout(self) -> Layout:
-        """创建Rich显示布局"""
+    def _build_rich_layout(self):
+        """构建Rich显示布局骨架 - 只创建一次，之后每个周期原地更新内容"""
         layout = Layout()
         
         # 创建主要区域
@@ -213,21 +359,6 @@ class ConnectionMonitor:
         ))
         
         # 连接列表
-        layout["connections"].update(self._create_connections_table())
-        
-        # 详细信息
-        layout["details"].update(self._create_details_panel())
-        
-        # 底部
-        layout["footer"].update(Panel(
-            Text(f"🕐 最后更新: {datetime.now().strftime('%H:%M:%S')} | 监控中: {len(self.monitors)} 个连接", style="dim"),
-            title="Status"
-        ))
-        
-        return layout
-    
-    def _create_connections_table(self) -> Table:
-        """创建连接状态表格"""
         table = Table(title="📊 连接状态")
         table.add_column("连接名称", style="cyan")
         table.add_column("状态", style="green")
@@ -235,10 +366,38 @@ class ConnectionMonitor:
         table.add_column("重连次数", style="red")
         table.add_column("运行时间", style="blue")
         table.add_column("成功率", style="magenta")
+        layout["connections"].update(table)
         
-        for name, monitor_data in self.monitors.items():
-            reconnector = monitor_data["reconnector"]
-            stats = reconnector.get_connection_stats()
+        # 详细信息
+        details_panel = Panel("暂无连接", title="📋 详细信息")
+        layout["details"].update(details_panel)
+        
+        # 底部
+        footer_text = Text("", style="dim")
+        layout["footer"].update(Panel(footer_text, title="Status"))
+        
+        self._root_layout = layout
+        self._table = table
+        self._details_panel = details_panel
+        self._footer_text = footer_text
+    
+    def _refresh_rich_layout(self) -> Layout:
+        """刷新Rich布局中的动态内容"""
+        self._refresh_connections_table()
+        self._details_panel.renderable = self._render_details_text()
+        self._footer_text.plain = f"🕐 最后更新: {datetime.now().strftime('%H:%M:%S')} | 监控中: {len(self.monitors)} 个连接"
+        return self._root_layout
+    
+    def _refresh_connections_table(self) -> Table:
+        """刷新连接状态表格的数据行"""
+        table = self._table
+        # Table没有公开的清空接口，行样式与各列单元格需要同时清空
+        table.rows.clear()
+        for column in table.columns:
+            column._cells.clear()
+        
+        for conn in self.monitors.values():
+            stats = self._get_cached_stats(conn)
             
             # 状态显示
             state = stats["current_state"]
@@ -252,7 +411,7 @@ class ConnectionMonitor:
             }.get(state, "white")
             
             # 健康度
-            health = "🟢 健康" if reconnector.is_healthy() else "🔴 异常"
+            health = "🟢 健康" if conn.is_healthy else "🔴 异常"
             
             # 运行时间
             uptime_seconds = stats.get("current_uptime_seconds", 0)
@@ -262,7 +421,7 @@ class ConnectionMonitor:
             success_rate = f"{stats['success_rate']:.1f}%"
             
             table.add_row(
-                name,
+                conn.name,
                 f"[{state_color}]{state}[/{state_color}]",
                 health,
                 str(stats["total_reconnections"]),
@@ -272,83 +431,91 @@ class ConnectionMonitor:
         
         return table
     
-    def _create_details_panel(self) -> Panel:
-        """创建详细信息面板"""
+    def _render_details_text(self) -> str:
+        """生成详细信息面板内容"""
         if not self.monitors:
-            return Panel("暂无连接", title="📋 详细信息")
+            return "暂无连接"
         
         # 选择第一个连接显示详细信息
-        name, monitor_data = next(iter(self.monitors.items()))
-        reconnector = monitor_data["reconnector"]
-        stats = reconnector.get_connection_stats()
-        metrics = monitor_data["performance_metrics"]
-        
-        details_text = f"""
-🔗 连接: {name}
-📍 状态: {stats['current_state']}
-⏱️ 重试计数: {stats['retry_count']}/{stats['max_retries']}
-📊 总连接数: {stats['total_connections']}
-✅ 成功连接: {stats['successful_connections']}
-❌ 失败连接: {stats['failed_connections']}
-🔄 重连次数: {stats['total_reconnections']}
-⏰ 当前连接时长: {self._format_duration(stats.get('current_uptime_seconds', 0))}
-📈 总运行时长: {self._format_duration(stats.get('total_uptime_seconds', 0))}
-
-📡 数据传输:
-  📤 发送: {stats['data_sent_count']} 条 ({self._format_bytes(stats['bytes_sent'])})
-  📥 接收: {stats['data_received_count']} 条 ({self._format_bytes(stats['bytes_received'])})
-  📊 吞吐量: {self._format_bytes(metrics.get('data_throughput', 0))}/s
-
-🏥 健康指标:
-  🎯 连接稳定性: {metrics.get('connection_stability', 0):.1%}
-  📉 错误率: {metrics.get('error_rate', 0):.1%}
-  🔋 成功率: {stats['success_rate']:.1f}%
-        """
+        conn = next(iter(self.monitors.values()))
+        stats = self._get_cached_stats(conn)
+        metrics = conn.performance_metrics
+        
+        ctx = {
+            "name": conn.name,
+            "state": stats["current_state"],
+            "retry_count": stats["retry_count"],
+            "max_retries": stats["max_retries"],
+            "total_connections": stats["total_connections"],
+            "successful_connections": stats["successful_connections"],
+            "failed_connections": stats["failed_connections"],
+            "total_reconnections": stats["total_reconnections"],
+            "current_uptime": self._format_duration(stats.get("current_uptime_seconds", 0)),
+            "total_uptime": self._format_duration(stats.get("total_uptime_seconds", 0)),
+            "data_sent_count": stats["data_sent_count"],
+            "bytes_sent": self._format_bytes(stats["bytes_sent"]),
+            "data_received_count": stats["data_received_count"],
+            "bytes_received": self._format_bytes(stats["bytes_received"]),
+            "throughput": self._format_bytes(metrics.get("data_throughput", 0)),
+            "connection_stability": metrics.get("connection_stability", 0),
+            "error_rate": metrics.get("error_rate", 0),
+            "success_rate": stats["success_rate"]
+        }
+        
+        # 内容与上次相同时直接复用
+        key = tuple(ctx.values())
+        if self._details_cache is not None and self._details_cache[0] == key:
+            return self._details_cache[1]
         
-        return Panel(details_text.strip(), title="📋 详细信息")
+        details_text = self._DETAILS_TEMPLATE.format_map(ctx)
+        self._details_cache = (key, details_text)
+        return details_text
     
     def _print_basic_status(self):
-        """打印基础状态信息"""
-        os.system('cls' if os.name == 'nt' else 'clear')  # 清屏
-        
-        print("=" * 80)
-        print("🔗 WebSocket连接监控面板")
-        print("=" * 80)
-        print(f"🕐 最后更新: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"📊 监控连接: {len(self.monitors)} 个")
-        print()
-        
-        for name, monitor_data in self.monitors.items():
-            reconnector = monitor_data["reconnector"]
-            stats = reconnector.get_connection_stats()
+        """打印基础状态信息 - 整帧拼接后一次性写出"""
+        separator = "=" * 80
+        lines = [
+            separator,
+            "🔗 WebSocket连接监控面板",
+            separator,
+            f"🕐 最后更新: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            f"📊 监控连接: {len(self.monitors)} 个",
+            ""
+        ]
+        
+        for conn in self.monitors.values():
+            stats = self._get_cached_stats(conn)
             
-            print(f"📡 连接: {name}")
-            print(f"   状态: {stats['current_state']}")
-            print(f"   健康: {'🟢 健康' if reconnector.is_healthy() else '🔴 异常'}")
-            print(f"   重连: {stats['total_reconnections']} 次")
-            print(f"   成功率: {stats['success_rate']:.1f}%")
-            print(f"   运行时长: {self._format_duration(stats.get('current_uptime_seconds', 0))}")
-            print()
+            lines.extend((
+                f"📡 连接: {conn.name}",
+                f"   状态: {stats['current_state']}",
+                f"   健康: {'🟢 健康' if conn.is_healthy else '🔴 异常'}",
+                f"   重连: {stats['total_reconnections']} 次",
+                f"   成功率: {stats['success_rate']:.1f}%",
+                f"   运行时长: {self._format_duration(stats.get('current_uptime_seconds', 0))}",
+                ""
+            ))
+        
+        # 清屏与绘制合并为一次写入，避免刷新时画面撕裂
+        frame = "\n".join(lines) + "\n"
+        if sys.stdout.isatty():
+            frame = _CLEAR_SCREEN + frame
+        sys.stdout.write(frame)
+        sys.stdout.flush()
     
     def _format_duration(self, seconds: float) -> str:
         """格式化时间长度"""
-        if seconds < 60:
-            return f"{seconds:.1f}s"
-        elif seconds < 3600:
-            return f"{seconds/60:.1f}m"
-        else:
-            return f"{seconds/3600:.1f}h"
+        for limit, divisor, suffix in _DURATION_UNITS:
+            if seconds < limit:
+                return f"{seconds/divisor:.1f}{suffix}"
     
     def _format_bytes(self, bytes_count: int) -> str:
         """格式化字节数"""
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if bytes_count < 1024:
-                return f"{bytes_count:.1f}{unit}"
-            bytes_count /= 1024
-        return f"{bytes_count:.1f}TB"
+        unit_idx = min(max(int(bytes_count).bit_length() - 1, 0) // 10, len(_BYTE_UNITS) - 1)
+        return f"{bytes_count / _BYTE_DIVS[unit_idx]:.1f}{_BYTE_UNITS[unit_idx]}"
     
-    def get_summary_report(self) -> Dict[str, Any]:
-        """获取监控摘要报告"""
+    def _build_summary(self) -> Dict[str, Any]:
+        """根据各连接缓存的统计快照汇总报告"""
         total_connections = len(self.monitors)
         if total_connections == 0:
             return {"total_connections": 0, "summary": "无连接"}
@@ -365,13 +532,12 @@ class ConnectionMonitor:
             "avg_uptime": 0.0
         }
         
-        for name, monitor_data in self.monitors.items():
-            reconnector = monitor_data["reconnector"]
-            stats = reconnector.get_connection_stats()
+        for conn in self.monitors.values():
+            stats = self._get_cached_stats(conn)
             
-            if reconnector.is_healthy():
+            if conn.is_healthy:
                 total_stats["healthy_connections"] += 1
-            if reconnector.is_connected():
+            if conn.is_connected:
                 total_stats["connected_count"] += 1
             
             total_stats["total_reconnections"] += stats["total_reconnections"]
@@ -385,7 +551,12 @@ class ConnectionMonitor:
         total_stats["avg_uptime"] /= total_connections
         
         return total_stats
-
+    
+    def get_summary_report(self) -> Dict[str, Any]:
+        """获取监控摘要报告 - 返回最近一个监控周期的汇总结果"""
+        if self._summary is None:
+            self._summary = self._build_summary()
+        return dict(self._summary)
 
 async def demo_connection_monitor():
     """演示连接监控功能"""
@@ -441,4 +612,7 @@ async def demo_connection_monitor():
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
+    if UVLOOP_AVAILABLE:
+        # 仅在独立运行时切换事件循环策略，作为库导入时不影响宿主应用
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     asyncio.run(demo_connection_monitor())
@@ -0,0 +1,48 @@
+"""
+Notification Deduplication
+固定容量环形缓冲 + 哈希索引，用于丢弃上游重试/重复投递的推送通知
+"""
+import time
+from collections import deque
+from typing import Deque, Dict, Tuple
+
+
+class RingDedup:
+    """带TTL的去重器
+
+    deque按插入顺序保存 (key, 过期时间)，dict索引保存每个key当前的过期时间；
+    seen() 先淘汰队首已过期或超出容量的条目，再O(1)检查并记录key。
+    """
+
+    def __init__(self, size: int = 16384, ttl: float = 300.0):
+        self.size = max(1, size)
+        self.ttl = ttl
+        self._ring: Deque[Tuple[bytes, float]] = deque()
+        self._index: Dict[bytes, float] = {}
+
+    def seen(self, key: bytes) -> bool:
+        """key在TTL内出现过时返回True；否则记录key并返回False"""
+        now = time.monotonic()
+        self._evict(now)
+
+        expires_at = self._index.get(key)
+        if expires_at is not None and expires_at > now:
+            return True
+
+        expires_at = now + self.ttl
+        self._index[key] = expires_at
+        self._ring.append((key, expires_at))
+        return False
+
+    def _evict(self, now: float):
+        """淘汰队首已过期的条目，并保证容量不超过上限"""
+        ring = self._ring
+        index = self._index
+        while ring and (ring[0][1] <= now or len(ring) >= self.size):
+            key, expires_at = ring.popleft()
+            # 同一key过期后可能被重新记录，只删除与当前索引一致的条目
+            if index.get(key) == expires_at:
+                del index[key]
+
+    def __len__(self) -> int:
+        return len(self._index)
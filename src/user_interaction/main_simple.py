@@ -3,35 +3,51 @@ FastAPI Main Application - API & WebSocket Gateway
 包含基本功能和A2A协议支持
 Compliant with A2A Protocol Specification v0.2.6
 """
-from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi import FastAPI, HTTPException, Depends, Request, BackgroundTasks
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response
 from pydantic import BaseModel, Field
 
 # 导入配置
 from config.settings import settings
 from src.config.agent_config import agent_config
-from sqlalchemy.orm import Session
-from typing import Optional, List, Dict, Any, Union
+from typing import Optional, List, Dict, Any, Tuple, Union
+from collections import OrderedDict
 import json
+import orjson
+import functools
+import gzip
+import hashlib
 import logging
 import asyncio
 import uuid
 import os
+import tempfile
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 
 # 导入各层组件
 from src.data_persistence import (
-    get_db, create_tables,
-    UserRepository, MessageInboxRepository, TaskRepository, A2AAgentRepository
+    create_tables,
+    UserRepository, TaskRepository, A2AAgentRepository,
+    task_status_writer, inbox_writer, heartbeat_writer
 )
 from src.data_persistence.models import MessageType
+from src.data_persistence.database import DatabaseManager, SessionLocal
+from src.user_interaction.dedup import RingDedup
 
 # 导入真正的组件
 from src.external_services import LLMService
 from src.external_services.zhipu_a2a_server import zhipu_a2a_server
 from src.external_services.zhipu_a2a_client import zhipu_a2a_client
+from src.async_execution.message_queue import celery_app
+from src.async_execution.worker_manager import worker_manager
+from src.async_execution.tasks import a2a_request_dispatcher
+from src.core_application.event_stream_manager import event_stream_manager
+from src.core_application.multimodal_llm_agent import multimodal_llm_agent_manager
 from config.settings import settings
 
 # A2A SDK 导入
@@ -52,28 +68,208 @@ logger = logging.getLogger(__name__)
 # 设置日志
 logger = logging.getLogger(__name__)
 
+# 数据库管理器单例 - 健康检查复用，避免每次请求重新构造
+_db_manager = DatabaseManager()
+
+# 响应时间戳缓存 - 秒级精度足够，同一秒内的响应复用同一个格式化字符串
+_ts_cache = [0, ""]
+
+def _now_iso() -> str:
+    """返回当前UTC时间的ISO格式字符串（按秒缓存）"""
+    now = int(time.time())
+    if now != _ts_cache[0]:
+        _ts_cache[0] = now
+        _ts_cache[1] = datetime.utcfromtimestamp(now).isoformat()
+    return _ts_cache[1]
+
 # JSON-RPC 2.0 响应工具函数
 def create_jsonrpc_response(result=None, error=None, request_id=None):
-    """创建标准的JSON-RPC 2.0响应"""
-    response = {"jsonrpc": "2.0", "id": request_id}
+    """创建标准的JSON-RPC 2.0响应 - 一次字面量构造，不再逐键插入"""
     if error:
-        response["error"] = error
-    else:
-        response["result"] = result
-    return response
+        return {"jsonrpc": "2.0", "id": request_id, "error": error}
+    return {"jsonrpc": "2.0", "id": request_id, "result": result}
 
 def create_jsonrpc_error(code: int, message: str, data=None, request_id=None):
-    """创建JSON-RPC 2.0错误响应"""
-    error = {"code": code, "message": message}
-    if data is not None:
-        error["data"] = data
-    return create_jsonrpc_response(error=error, request_id=request_id)
+    """创建JSON-RPC 2.0错误响应 - 直接构造，不经过create_jsonrpc_response"""
+    if data is None:
+        error = {"code": code, "message": message}
+    else:
+        error = {"code": code, "message": message, "data": data}
+    return {"jsonrpc": "2.0", "id": request_id, "error": error}
+
+async def _read_json_body(request: Request, max_bytes: int = agent_config.a2a_max_request_bytes) -> Any:
+    """直接用orjson解析请求体，跳过FastAPI对dict请求体的通用解析与校验；空请求体返回None
+    
+    请求体超过max_bytes时在读取阶段就返回413，不再读取剩余数据或进行解析
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Request body exceeds {max_bytes} bytes")
+    
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Request body exceeds {max_bytes} bytes")
+        chunks.append(chunk)
+    
+    if not size:
+        return None
+    return orjson.loads(b"".join(chunks))
+
+async def _await_celery(task_result, timeout: float):
+    """异步等待Celery任务结果 - 轮询ready()而不是阻塞事件循环的get()"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not await asyncio.to_thread(task_result.ready):
+        if loop.time() >= deadline:
+            raise TimeoutError(f"Task {task_result.id} did not complete within {timeout}s")
+        await asyncio.sleep(agent_config.task_result_poll_interval)
+    # 任务已完成，get()会立即返回结果（或抛出任务异常）
+    return await asyncio.to_thread(task_result.get, timeout=timeout)
+
+# 多进程部署协调 - Windows没有fcntl，按单进程处理
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+_DDL_LOCK_PATH = os.path.join(tempfile.gettempdir(), "a2a_agent_service.ddl.lock")
+_LEADER_LOCK_PATH = os.path.join(tempfile.gettempdir(), "a2a_agent_service.leader.lock")
+_leader_lock_file = None
+
+def _create_tables_serialized():
+    """多个服务进程同时启动时串行执行建表，后启动的进程只做存在性检查"""
+    if fcntl is None:
+        create_tables()
+        return
+    with open(_DDL_LOCK_PATH, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            create_tables()
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _acquire_leader_lock() -> bool:
+    """尝试成为leader进程；锁在进程存活期间一直持有"""
+    global _leader_lock_file
+    if fcntl is None:
+        return True
+    lock_file = open(_LEADER_LOCK_PATH, "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _leader_lock_file = lock_file
+    return True
+
+def _release_leader_lock():
+    """释放leader锁"""
+    global _leader_lock_file
+    if _leader_lock_file is not None:
+        _leader_lock_file.close()
+        _leader_lock_file = None
+
+# 启动/关闭步骤
+def _start_celery_workers():
+    """启动Celery Worker Manager (仅在非Docker环境中)"""
+    try:
+        # 检查是否在Docker容器中运行
+        in_docker = os.path.exists('/.dockerenv') or os.environ.get('DOCKER_ENV') == 'true'
+        
+        if not in_docker:
+            # 宿主机环境：启动内置Worker Manager
+            worker_manager.start_workers(worker_count=agent_config.default_worker_count)  # 使用配置的Worker数量
+            logger.info("Celery Workers started (host environment)")
+        else:
+            # Docker环境：Worker由docker-compose管理
+            logger.info("Running in Docker environment - Workers managed by docker-compose")
+    except Exception as e:
+        logger.error(f"Failed to start Celery Workers: {e}")
+
+async def _start_terminal_components():
+    """启动重构的终端设备管理组件"""
+    try:
+        # 启动EventStream维护任务（内部创建asyncio任务，需在事件循环线程中调用）
+        event_stream_manager.start_maintenance()
+        logger.info("EventStream maintenance started")
+        
+        # 启动多模态LLM意图识别代理
+        await multimodal_llm_agent_manager.start_all_agents()
+        logger.info("Multimodal LLM agents started")
+        
+    except Exception as e:
+        logger.error(f"Terminal device components initialization failed: {e}")
+
+def _stop_celery_workers():
+    """停止Celery Workers"""
+    try:
+        worker_manager.stop_workers()
+        logger.info("Celery Workers stopped")
+    except Exception as e:
+        logger.error(f"Failed to stop Celery Workers: {e}")
+
+async def _stop_terminal_components():
+    """停止重构的终端设备管理组件"""
+    try:
+        event_stream_manager.stop_maintenance()
+        logger.info("EventStream maintenance stopped")
+        
+        await multimodal_llm_agent_manager.stop_all_agents()
+        logger.info("Multimodal LLM agents stopped")
+        
+    except Exception as e:
+        logger.error(f"Terminal device components shutdown failed: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期 - 启动时并发初始化相互独立的组件，关闭时并发清理"""
+    logger.info("Starting A2A Agent Service...")
+    
+    # 创建数据库表 - 其他组件依赖数据库，先于其他步骤完成；同步DDL放到线程中执行
+    try:
+        await asyncio.to_thread(_create_tables_serialized)
+        logger.info("Database tables initialized")
+    except Exception as e:
+        logger.error(f"Database initialization failed: {e}")
+    
+    # 多进程部署时只有leader进程管理Celery Workers
+    is_leader = _acquire_leader_lock()
+    if not is_leader:
+        logger.info("Another service process manages Celery Workers - skipping worker startup")
+    
+    # Worker进程启动与终端设备组件互不依赖，并发进行
+    startup_steps = [_start_terminal_components()]
+    if is_leader:
+        startup_steps.append(asyncio.to_thread(_start_celery_workers))
+    await asyncio.gather(*startup_steps)
+    
+    logger.info("A2A Agent Service started successfully")
+    
+    yield
+    
+    logger.info("Shutting down A2A Agent Service...")
+    shutdown_steps = [
+        _stop_terminal_components(),
+        task_status_writer.aclose(),
+        inbox_writer.aclose(),
+        heartbeat_writer.aclose()
+    ]
+    if is_leader:
+        shutdown_steps.append(asyncio.to_thread(_stop_celery_workers))
+    await asyncio.gather(*shutdown_steps)
+    _release_leader_lock()
 
 # 创建FastAPI应用
 app = FastAPI(
     title=settings.app_name,
     description="智谱终端设备代理服务 API - 支持A2A协议",
-    version=settings.app_version
+    version=settings.app_version,
+    # 所有端点（含引入的路由）默认使用orjson编码响应
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # 添加终端Agent管理路由
@@ -96,18 +292,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 响应压缩 - agent/discovery、tasks/get等较大的JSON响应按客户端Accept-Encoding压缩传输
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=settings.gzip_minimum_size,
+    compresslevel=settings.gzip_compresslevel
+)
+
+# CORS预检响应头 - 固定内容，Max-Age让浏览器缓存预检结果一天
+_PREFLIGHT_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
+    "Access-Control-Allow-Headers": "*",
+    "Access-Control-Max-Age": "86400",
+}
+
 # 添加OPTIONS处理器以支持CORS预检请求
 @app.options("/{path:path}")
 async def handle_options(path: str):
-    """处理CORS预检请求"""
-    return JSONResponse(
-        content={},
-        headers={
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
-            "Access-Control-Allow-Headers": "*",
-        }
-    )
+    """处理CORS预检请求 - 无响应体，不做JSON编码"""
+    # 中间件可能会改写响应头，因此每次创建新的Response而不是复用同一个实例
+    return Response(status_code=204, headers=_PREFLIGHT_HEADERS)
 
 # 安全组件
 security = HTTPBearer(auto_error=False)
@@ -128,79 +333,6 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     # 如果没有认证信息，返回默认用户ID（开发环境）
     return 1
 
-# 启动事件
-@app.on_event("startup")
-async def startup_event():
-    """应用启动时的初始化"""
-    logger.info("Starting A2A Agent Service...")
-    
-    # 创建数据库表
-    try:
-        create_tables()
-        logger.info("Database tables initialized")
-    except Exception as e:
-        logger.error(f"Database initialization failed: {e}")
-    
-    # 启动Celery Worker Manager (仅在非Docker环境中)
-    try:
-        import os
-        # 检查是否在Docker容器中运行
-        in_docker = os.path.exists('/.dockerenv') or os.environ.get('DOCKER_ENV') == 'true'
-        
-        if not in_docker:
-            # 宿主机环境：启动内置Worker Manager
-            from src.async_execution.worker_manager import worker_manager
-            worker_manager.start_workers(worker_count=agent_config.default_worker_count)  # 使用配置的Worker数量
-            logger.info("Celery Workers started (host environment)")
-        else:
-            # Docker环境：Worker由docker-compose管理
-            logger.info("Running in Docker environment - Workers managed by docker-compose")
-    except Exception as e:
-        logger.error(f"Failed to start Celery Workers: {e}")
-    
-    # 启动重构的终端设备管理组件
-    try:
-        # 启动EventStream维护任务
-        from src.core_application.event_stream_manager import event_stream_manager
-        event_stream_manager.start_maintenance()
-        logger.info("EventStream maintenance started")
-        
-        # 启动多模态LLM意图识别代理
-        from src.core_application.multimodal_llm_agent import multimodal_llm_agent_manager
-        await multimodal_llm_agent_manager.start_all_agents()
-        logger.info("Multimodal LLM agents started")
-        
-    except Exception as e:
-        logger.error(f"Terminal device components initialization failed: {e}")
-    
-    logger.info("A2A Agent Service started successfully")
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """应用关闭时的清理"""
-    logger.info("Shutting down A2A Agent Service...")
-    
-    # 停止Celery Workers
-    try:
-        from src.async_execution.worker_manager import worker_manager
-        worker_manager.stop_workers()
-        logger.info("Celery Workers stopped")
-    except Exception as e:
-        logger.error(f"Failed to stop Celery Workers: {e}")
-    
-    # 停止重构的终端设备管理组件
-    try:
-        from src.core_application.event_stream_manager import event_stream_manager
-        event_stream_manager.stop_maintenance()
-        logger.info("EventStream maintenance stopped")
-        
-        from src.core_application.multimodal_llm_agent import multimodal_llm_agent_manager
-        await multimodal_llm_agent_manager.stop_all_agents()
-        logger.info("Multimodal LLM agents stopped")
-        
-    except Exception as e:
-        logger.error(f"Terminal device components shutdown failed: {e}")
-
 # 基本路由
 @app.get("/")
 async def root():
@@ -210,24 +342,31 @@ async def root():
         "version": settings.app_version,
         "status": "running",
         "a2a_supported": A2A_SDK_AVAILABLE,
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": _now_iso()
     }
 
+# 健康检查结果缓存 - 负载均衡/就绪探测高频访问时避免每次都访问数据库
+_health_cache: Dict[str, Any] = {"expires_at": 0.0, "body": None, "status_code": 200}
+
 @app.get("/health")
 async def health_check():
     """健康检查端点"""
+    now = time.monotonic()
+    if _health_cache["body"] is not None and now < _health_cache["expires_at"]:
+        return Response(content=_health_cache["body"], status_code=_health_cache["status_code"],
+                        media_type="application/json")
+    
     try:
-        # 简单的数据库连接检查
-        from src.data_persistence.database import DatabaseManager
-        db_manager = DatabaseManager()
-        if db_manager.health_check():
+        # 简单的数据库连接检查 - 同步ping放到线程中执行，避免阻塞事件循环
+        if await asyncio.to_thread(_db_manager.health_check):
             db_status = "connected"
         else:
             db_status = "disconnected"
         
-        return {
+        status_code = 200
+        body = {
             "status": "healthy",
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": _now_iso(),
             "services": {
                 "database": db_status,
                 "llm": "available",
@@ -236,42 +375,273 @@ async def health_check():
         }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
-        return JSONResponse(
-            status_code=503,
-            content={
-                "status": "unhealthy",
-                "error": str(e),
-                "timestamp": datetime.utcnow().isoformat()
-            }
-        )
+        status_code = 503
+        body = {
+            "status": "unhealthy",
+            "error": str(e),
+            "timestamp": _now_iso()
+        }
+    
+    # 缓存编码后的响应体，缓存期内的探测请求无需重复序列化
+    encoded = orjson.dumps(body)
+    _health_cache.update(expires_at=now + settings.health_cache_ttl, body=encoded, status_code=status_code)
+    return Response(content=encoded, status_code=status_code, media_type="application/json")
 
 # A2A Protocol 端点
 if A2A_SDK_AVAILABLE and a2a_server:
+    
+    # 请求处理器在服务器初始化时创建且不会替换，导入时一次性解析各绑定方法，请求路径上不再查找属性
+    _request_handler = zhipu_a2a_server.request_handler
+    _on_message_send = _request_handler.on_message_send
+    _on_tasks_get = _request_handler.on_tasks_get
+    _cancel_task = _request_handler.agent_executor.cancel
+    _on_push_config_set = _request_handler.on_tasks_push_notification_config_set
+    _on_push_config_get = _request_handler.on_tasks_push_notification_config_get
+    _on_push_config_list = _request_handler.on_tasks_push_notification_config_list
+    _on_push_config_delete = _request_handler.on_tasks_push_notification_config_delete
+    _on_agent_discovery = _request_handler.handle_agent_discovery_request
 
-    @app.get("/.well-known/agent-card.json")
-    async def get_agent_card(request: Request):
-        """返回此Agent的A2A Agent Card (标准A2A发现端点)"""
+    @functools.lru_cache(maxsize=16)
+    def _encoded_agent_card(base_url: str, card_version: int) -> bytes:
+        """按访问地址缓存编码后的Agent Card，card_version变化(重载)时自动失效"""
         # 直接使用zhipu_a2a_server的get_agent_card方法，避免重复实现
         agent_card = zhipu_a2a_server.get_agent_card()
         
         # 动态设置URL
-        base_url = str(request.base_url).rstrip('/')
         agent_card["url"] = f"{base_url}/api/a2a"
         
         # 设置文档URL（如果字段存在）
         if "documentationUrl" in agent_card:
             agent_card["documentationUrl"] = f"{base_url}/docs"
         
-        return agent_card
+        return orjson.dumps(agent_card)
     
-    # A2A 协议端点设置 - 使用 Celery Worker 异步处理
-    @app.post("/api/a2a")
-    async def a2a_main_endpoint(jsonrpc_request: dict):
-        """A2A协议主端点 - 使用Celery Worker异步处理"""
+    @functools.lru_cache(maxsize=16)
+    def _gzipped_agent_card(base_url: str, card_version: int) -> bytes:
+        """预压缩的Agent Card - 只在缓存失效时压缩一次，使用最高压缩级别"""
+        return gzip.compress(_encoded_agent_card(base_url, card_version), compresslevel=9)
+    
+    @app.get("/.well-known/agent-card.json")
+    async def get_agent_card(request: Request):
+        """返回此Agent的A2A Agent Card (标准A2A发现端点)"""
+        base_url = str(request.base_url).rstrip('/')
+        card_version = zhipu_a2a_server.card_version
+        # 已设置Content-Encoding的响应GZipMiddleware会原样透传
+        if "gzip" in request.headers.get("accept-encoding", ""):
+            return Response(
+                content=_gzipped_agent_card(base_url, card_version),
+                media_type="application/json",
+                headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
+            )
+        return Response(
+            content=_encoded_agent_card(base_url, card_version),
+            media_type="application/json",
+            headers={"Vary": "Accept-Encoding"}
+        )
+    
+    # 进程内处理的A2A元数据方法 - 查询/配置类操作无需经过Celery
+    async def _inline_tasks_get(method: str, params: Dict[str, Any], request_id):
+        """tasks/get"""
+        if not params.get("id"):
+            return create_jsonrpc_error(-32602, "Invalid params", "Missing task id", request_id)
         try:
-            logger.info(f"A2A main endpoint received: {jsonrpc_request}")
+            task_result = await _on_tasks_get(params)
+            return create_jsonrpc_response(task_result, request_id=request_id)
+        except ValueError as e:
+            return create_jsonrpc_error(-32602, "Invalid params", str(e), request_id)
+        except Exception as e:
+            logger.error(f"Error in tasks/get: {e}")
+            return create_jsonrpc_error(-32603, "Internal error", str(e), request_id)
+    
+    async def _inline_tasks_cancel(method: str, params: Dict[str, Any], request_id):
+        """tasks/cancel"""
+        task_id = params.get("id")
+        if not task_id:
+            return create_jsonrpc_error(-32602, "Invalid params", "Missing task id", request_id)
+        try:
+            await _cancel_task(task_id)
+            return create_jsonrpc_response({
+                "id": task_id,
+                "status": {
+                    "state": "cancelled",
+                    "progress": 0
+                },
+                "cancelledAt": _now_iso(),
+                "kind": "task"
+            }, request_id=request_id)
+        except Exception as e:
+            logger.error(f"Error in tasks/cancel: {e}")
+            return create_jsonrpc_error(-32603, "Internal error", f"Cancel failed: {e}", request_id)
+    
+    async def _inline_push_config_set(method: str, params: Dict[str, Any], request_id):
+        """tasks/pushNotificationConfig/set"""
+        try:
+            await _on_push_config_set(params)
+            return create_jsonrpc_response({
+                "id": str(uuid.uuid4()),
+                "taskId": params.get("id"),
+                "pushNotificationConfig": params.get("pushNotificationConfig", {}),
+                "createdAt": _now_iso(),
+                "kind": "taskPushNotificationConfig"
+            }, request_id=request_id)
+        except Exception as e:
+            logger.error(f"Error in {method}: {e}")
+            return create_jsonrpc_error(-32603, "Internal error", f"Config operation failed: {e}", request_id)
+    
+    async def _inline_push_config_get(method: str, params: Dict[str, Any], request_id):
+        """tasks/pushNotificationConfig/get"""
+        try:
+            result = await _on_push_config_get(params)
+            return create_jsonrpc_response({
+                "id": params.get("configId"),
+                "taskId": params.get("id"),
+                "pushNotificationConfig": result.get("config", {}),
+                "createdAt": _now_iso(),
+                "kind": "taskPushNotificationConfig"
+            }, request_id=request_id)
+        except Exception as e:
+            logger.error(f"Error in {method}: {e}")
+            return create_jsonrpc_error(-32603, "Internal error", f"Config operation failed: {e}", request_id)
+    
+    async def _inline_push_config_list(method: str, params: Dict[str, Any], request_id):
+        """tasks/pushNotificationConfig/list"""
+        try:
+            result = await _on_push_config_list(params)
+            return create_jsonrpc_response({
+                "configs": result.get("configs", []),
+                "kind": "taskPushNotificationConfigList"
+            }, request_id=request_id)
+        except Exception as e:
+            logger.error(f"Error in {method}: {e}")
+            return create_jsonrpc_error(-32603, "Internal error", f"Config operation failed: {e}", request_id)
+    
+    async def _inline_push_config_delete(method: str, params: Dict[str, Any], request_id):
+        """tasks/pushNotificationConfig/delete"""
+        try:
+            await _on_push_config_delete(params)
+            return create_jsonrpc_response({
+                "id": params.get("configId"),
+                "taskId": params.get("id"),
+                "deletedAt": _now_iso(),
+                "kind": "taskPushNotificationConfig"
+            }, request_id=request_id)
+        except Exception as e:
+            logger.error(f"Error in {method}: {e}")
+            return create_jsonrpc_error(-32603, "Internal error", f"Config operation failed: {e}", request_id)
+    
+    async def _inline_extended_agent_card(method: str, params: Dict[str, Any], request_id):
+        """agent/getAuthenticatedExtendedCard"""
+        try:
+            agent_card = zhipu_a2a_server.get_agent_card()
+            agent_card["url"] = f"{settings.a2a_base_url}/api/a2a"
+            return create_jsonrpc_response(agent_card, request_id=request_id)
+        except Exception as e:
+            logger.error(f"Error in agent/getAuthenticatedExtendedCard: {e}")
+            return create_jsonrpc_error(-32603, "Internal error", "Agent card configuration not found", request_id)
+    
+    async def _inline_agent_discovery(method: str, params: Dict[str, Any], request_id):
+        """agent/discovery"""
+        discovery_result = await _on_agent_discovery(params)
+        return create_jsonrpc_response(discovery_result, request_id=request_id)
+    
+    # Worker不可用时的进程内回退处理
+    async def _fallback_message_send(method: str, params: Dict[str, Any], request_id):
+        """message/send 回退处理"""
+        response = await _on_message_send(params)
+        
+        # 检查返回的是Message还是Task对象
+        if hasattr(response, 'role') and hasattr(response, 'parts'):
+            # Message对象 - 同步响应
+            return create_jsonrpc_response({
+                "message": {
+                    "role": response.role.value,
+                    "parts": response.parts
+                },
+                "timestamp": _now_iso()
+            }, request_id=request_id)
+        elif hasattr(response, 'id') and hasattr(response, 'status'):
+            # Task对象 - 异步响应
+            return create_jsonrpc_response(response, request_id=request_id)
+        else:
+            # 其他类型，尝试作为Message处理
+            logger.warning(f"Unknown response type from on_message_send: {type(response)}")
+            return create_jsonrpc_response({
+                "message": {
+                    "role": "agent",
+                    "parts": [{"type": "text", "text": str(response)}]
+                },
+                "timestamp": _now_iso()
+            }, request_id=request_id)
+    
+    async def _fallback_message_stream(method: str, params: Dict[str, Any], request_id):
+        """message/stream 回退处理"""
+        response_message = await _on_message_send(params)
+        return create_jsonrpc_response({
+            "message": {
+                "role": response_message.role.value,
+                "parts": response_message.parts
+            },
+            "streaming": True,
+            "timestamp": _now_iso()
+        }, request_id=request_id)
+    
+    async def _dispatch_via_celery(method: str, params: Dict[str, Any], request_id, *,
+                                   timeout: float, fallback):
+        """提交到Celery Worker并等待结果；Worker不可用时回退到进程内处理"""
+        try:
+            task_result = await a2a_request_dispatcher.submit({
+                "method": method,
+                "params": params,
+                "request_id": request_id,
+                "jsonrpc": "2.0"
+            })
+        except Exception as worker_error:
+            logger.error(f"Celery Worker error for {method}: {worker_error}")
+            logger.warning("Falling back to synchronous processing")
+            return await fallback(method, params, request_id)
+        
+        logger.info(f"{method} task {task_result.id} submitted to Worker, waiting for completion...")
+        
+        # 等待Worker任务完成并直接返回Worker的处理结果
+        try:
+            actual_result = await _await_celery(task_result, timeout)
+            logger.info(f"{method} task {task_result.id} completed successfully")
+            return actual_result
+        except Exception as timeout_error:
+            logger.error(f"{method} task timeout or error: {timeout_error}")
+            return create_jsonrpc_error(-32603, "Internal error",
+                                      f"{method} processing failed: {timeout_error}", request_id)
+    
+    # JSON-RPC方法分发表：元数据类方法耗时远低于Celery往返，直接在进程内处理；
+    # 消息类方法提交到Celery Worker
+    _A2A_METHODS = {
+        "message/send": functools.partial(
+            _dispatch_via_celery,
+            timeout=agent_config.task_result_timeout_long,
+            fallback=_fallback_message_send
+        ),
+        "message/stream": functools.partial(
+            _dispatch_via_celery,
+            timeout=agent_config.task_result_timeout_long,
+            fallback=_fallback_message_stream
+        ),
+        "tasks/get": _inline_tasks_get,
+        "tasks/cancel": _inline_tasks_cancel,
+        "tasks/pushNotificationConfig/set": _inline_push_config_set,
+        "tasks/pushNotificationConfig/get": _inline_push_config_get,
+        "tasks/pushNotificationConfig/list": _inline_push_config_list,
+        "tasks/pushNotificationConfig/delete": _inline_push_config_delete,
+        "agent/getAuthenticatedExtendedCard": _inline_extended_agent_card,
+        "agent/discovery": _inline_agent_discovery,
+    }
+    
+    async def process_jsonrpc_request(jsonrpc_request: Any) -> Dict[str, Any]:
+        """处理一条已解析的A2A JSON-RPC请求 - 供HTTP端点和进程内调用方共用"""
+        try:
+            if not isinstance(jsonrpc_request, dict):
+                return create_jsonrpc_error(-32600, "Invalid Request", "Request body must be a JSON object")
             
-            # 验证JSON-RPC 2.0格式
+            # 验证JSON-RPC 2.0格式 - 结构检查全部通过后才记录请求内容和分发
             if jsonrpc_request.get("jsonrpc") != "2.0":
                 return create_jsonrpc_error(-32600, "Invalid Request", "jsonrpc field must be '2.0'", jsonrpc_request.get("id"))
             
@@ -279,330 +649,91 @@ if A2A_SDK_AVAILABLE and a2a_server:
             params = jsonrpc_request.get("params", {})
             request_id = jsonrpc_request.get("id")
             
-            # 导入Celery任务
-            from src.async_execution.tasks import process_a2a_request
-            
-            # 处理不同的A2A方法
-            if method == "message/send":
-                try:
-                    # 使用Celery Worker异步处理A2A请求
-                    task_result = process_a2a_request.delay({
-                        "method": method,
-                        "params": params,
-                        "request_id": request_id,
-                        "jsonrpc": "2.0"
-                    })
-                    
-                    logger.info(f"Task {task_result.id} submitted to Worker, waiting for completion...")
-                    
-                    # 等待Worker任务完成并获取实际结果
-                    try:
-                        # 使用配置的长超时时间，避免无限等待
-                        actual_result = task_result.get(timeout=agent_config.task_result_timeout_long)
-                        logger.info(f"Task {task_result.id} completed successfully")
-                        
-                        # 直接返回Worker的处理结果
-                        return actual_result
-                        
-                    except Exception as timeout_error:
-                        logger.error(f"Task timeout or error: {timeout_error}")
-                        # 如果任务超时或失败，返回错误
-                        return create_jsonrpc_error(-32603, "Internal error", 
-                                                  f"Task processing failed: {timeout_error}", request_id)
-                    
-                except Exception as worker_error:
-                    logger.error(f"Celery Worker error: {worker_error}")
-                    # 如果Worker不可用，回退到同步处理
-                    logger.warning("Falling back to synchronous processing")
-                    
-                    from src.external_services.zhipu_a2a_server import zhipu_a2a_server
-                    request_handler = zhipu_a2a_server.request_handler
-                    response = await request_handler.on_message_send(params)
-                    
-                    # 检查返回的是Message还是Task对象
-                    if hasattr(response, 'role') and hasattr(response, 'parts'):
-                        # Message对象 - 同步响应
-                        return create_jsonrpc_response({
-                            "message": {
-                                "role": response.role.value,
-                                "parts": response.parts
-                            },
-                            "timestamp": datetime.utcnow().isoformat()
-                        }, request_id=request_id)
-                    elif hasattr(response, 'id') and hasattr(response, 'status'):
-                        # Task对象 - 异步响应
-                        return create_jsonrpc_response(response, request_id=request_id)
-                    else:
-                        # 其他类型，尝试作为Message处理
-                        logger.warning(f"Unknown response type from on_message_send: {type(response)}")
-                        return create_jsonrpc_response({
-                            "message": {
-                                "role": "agent",
-                                "parts": [{"type": "text", "text": str(response)}]
-                            },
-                            "timestamp": datetime.utcnow().isoformat()
-                        }, request_id=request_id)
-                
-            elif method == "message/stream":
-                # 流式消息也使用异步处理
-                try:
-                    task_result = process_a2a_request.delay({
-                        "method": method,
-                        "params": params,
-                        "request_id": request_id,
-                        "jsonrpc": "2.0"
-                    })
-                    
-                    logger.info(f"Stream task {task_result.id} submitted to Worker, waiting for completion...")
-                    
-                    # 等待Worker任务完成
-                    try:
-                        actual_result = task_result.get(timeout=agent_config.task_result_timeout_long)
-                        logger.info(f"Stream task {task_result.id} completed successfully")
-                        return actual_result
-                    except Exception as timeout_error:
-                        logger.error(f"Stream task timeout or error: {timeout_error}")
-                        return create_jsonrpc_error(-32603, "Internal error", 
-                                                  f"Stream processing failed: {timeout_error}", request_id)
-                    
-                except Exception as worker_error:
-                    logger.error(f"Celery Worker error for stream: {worker_error}")
-                    # 回退到同步处理
-                    from src.external_services.zhipu_a2a_server import zhipu_a2a_server
-                    request_handler = zhipu_a2a_server.request_handler
-                    response_message = await request_handler.on_message_send(params)
-                    
-                    return create_jsonrpc_response({
-                        "message": {
-                            "role": response_message.role.value,
-                            "parts": response_message.parts
-                        },
-                        "streaming": True,
-                        "timestamp": datetime.utcnow().isoformat()
-                    }, request_id=request_id)
-                
-            elif method == "tasks/get":
-                    # 任务查询也使用异步处理
-                    try:
-                        task_result = process_a2a_request.delay({
-                            "method": method,
-                            "params": params,
-                            "request_id": request_id,
-                            "jsonrpc": "2.0"
-                        })
-                        
-                        logger.info(f"Tasks/get task {task_result.id} submitted to Worker, waiting for completion...")
-                        
-                        # 等待Worker任务完成
-                        try:
-                            actual_result = task_result.get(timeout=agent_config.task_result_timeout_short)
-                            logger.info(f"Tasks/get task {task_result.id} completed successfully")
-                            return actual_result
-                        except Exception as timeout_error:
-                            logger.error(f"Tasks/get task timeout or error: {timeout_error}")
-                            return create_jsonrpc_error(-32603, "Internal error", 
-                                                      f"Task query failed: {timeout_error}", request_id)
-                        
-                    except Exception as worker_error:
-                        logger.error(f"Celery Worker error for tasks/get: {worker_error}")
-                        # 回退到同步处理
-                        from src.external_services.zhipu_a2a_server import zhipu_a2a_server
-                        request_handler = zhipu_a2a_server.request_handler
-                        task_id = params.get("id")
-                        if not task_id:
-                            return create_jsonrpc_error(-32602, "Invalid params", "Missing task id", request_id)
-                        
-                        try:
-                            task_result = await request_handler.on_tasks_get(params)
-                            return create_jsonrpc_response(task_result, request_id=request_id)
-                        except ValueError as e:
-                            return create_jsonrpc_error(-32602, "Invalid params", str(e), request_id)
-                        except Exception as e:
-                            logger.error(f"Error in tasks/get: {e}")
-                            return create_jsonrpc_error(-32603, "Internal error", str(e), request_id)
-                
-            elif method == "tasks/cancel":
-                    # 任务取消也使用异步处理
-                    try:
-                        task_result = process_a2a_request.delay({
-                            "method": method,
-                            "params": params,
-                            "request_id": request_id,
-                            "jsonrpc": "2.0"
-                        })
-                        
-                        logger.info(f"Tasks/cancel task {task_result.id} submitted to Worker, waiting for completion...")
-                        
-                        # 等待Worker任务完成
-                        try:
-                            actual_result = task_result.get(timeout=agent_config.task_result_timeout_short)
-                            logger.info(f"Tasks/cancel task {task_result.id} completed successfully")
-                            return actual_result
-                        except Exception as timeout_error:
-                            logger.error(f"Tasks/cancel task timeout or error: {timeout_error}")
-                            return create_jsonrpc_error(-32603, "Internal error", 
-                                                      f"Task cancellation failed: {timeout_error}", request_id)
-                        
-                    except Exception as worker_error:
-                        logger.error(f"Celery Worker error for tasks/cancel: {worker_error}")
-                        # 回退到同步处理
-                        from src.external_services.zhipu_a2a_server import zhipu_a2a_server
-                        request_handler = zhipu_a2a_server.request_handler
-                        task_id = params.get("id")
-                        if task_id:
-                            cancel_result = await request_handler.agent_executor.cancel(task_id)
-                            return create_jsonrpc_response({
-                                "id": task_id,
-                                "status": {
-                                    "state": "cancelled",
-                                    "progress": 0
-                                },
-                                "cancelledAt": datetime.utcnow().isoformat(),
-                                "kind": "task"
-                            }, request_id=request_id)
-                        else:
-                            return create_jsonrpc_error(-32602, "Invalid params", "Missing task id", request_id)
-                
-            elif method in ["tasks/pushNotificationConfig/set", "tasks/pushNotificationConfig/get", 
-                              "tasks/pushNotificationConfig/list", "tasks/pushNotificationConfig/delete"]:
-                    # 推送通知配置方法也使用异步处理
-                    try:
-                        task_result = process_a2a_request.delay({
-                            "method": method,
-                            "params": params,
-                            "request_id": request_id,
-                            "jsonrpc": "2.0"
-                        })
-                        
-                        logger.info(f"{method} task {task_result.id} submitted to Worker, waiting for completion...")
-                        
-                        # 等待Worker任务完成
-                        try:
-                            actual_result = task_result.get(timeout=agent_config.task_result_timeout_short)
-                            logger.info(f"{method} task {task_result.id} completed successfully")
-                            return actual_result
-                        except Exception as timeout_error:
-                            logger.error(f"{method} task timeout or error: {timeout_error}")
-                            return create_jsonrpc_error(-32603, "Internal error", 
-                                                      f"{method} processing failed: {timeout_error}", request_id)
-                        
-                    except Exception as worker_error:
-                        logger.error(f"Celery Worker error for {method}: {worker_error}")
-                        # 回退到同步处理
-                        from src.external_services.zhipu_a2a_server import zhipu_a2a_server
-                        request_handler = zhipu_a2a_server.request_handler
-                        
-                        if method == "tasks/pushNotificationConfig/set":
-                            result = await request_handler.on_tasks_push_notification_config_set(params)
-                            config_id = str(uuid.uuid4())
-                            return create_jsonrpc_response({
-                                "id": config_id,
-                                "taskId": params.get("id"),
-                                "pushNotificationConfig": params.get("pushNotificationConfig", {}),
-                                "createdAt": datetime.utcnow().isoformat(),
-                                "kind": "taskPushNotificationConfig"
-                            }, request_id=request_id)
-                        elif method == "tasks/pushNotificationConfig/get":
-                            result = await request_handler.on_tasks_push_notification_config_get(params)
-                            return create_jsonrpc_response({
-                                "id": params.get("configId"),
-                                "taskId": params.get("id"),
-                                "pushNotificationConfig": result.get("config", {}),
-                                "createdAt": datetime.utcnow().isoformat(),
-                                "kind": "taskPushNotificationConfig"
-                            }, request_id=request_id)
-                        elif method == "tasks/pushNotificationConfig/list":
-                            result = await request_handler.on_tasks_push_notification_config_list(params)
-                            return create_jsonrpc_response({
-                                "configs": result.get("configs", []),
-                                "kind": "taskPushNotificationConfigList"
-                            }, request_id=request_id)
-                        elif method == "tasks/pushNotificationConfig/delete":
-                            result = await request_handler.on_tasks_push_notification_config_delete(params)
-                            return create_jsonrpc_response({
-                                "id": params.get("configId"),
-                                "taskId": params.get("id"),
-                                "deletedAt": datetime.utcnow().isoformat(),
-                                "kind": "taskPushNotificationConfig"
-                            }, request_id=request_id)
-                
-            elif method == "agent/getAuthenticatedExtendedCard":
-                    # Agent卡片获取使用异步处理
-                    try:
-                        task_result = process_a2a_request.delay({
-                            "method": method,
-                            "params": params,
-                            "request_id": request_id,
-                            "jsonrpc": "2.0"
-                        })
-                        
-                        logger.info(f"Agent card task {task_result.id} submitted to Worker, waiting for completion...")
-                        
-                        # 等待Worker任务完成
-                        try:
-                            actual_result = task_result.get(timeout=agent_config.task_result_timeout_short)
-                            logger.info(f"Agent card task {task_result.id} completed successfully")
-                            return actual_result
-                        except Exception as timeout_error:
-                            logger.error(f"Agent card task timeout or error: {timeout_error}")
-                            return create_jsonrpc_error(-32603, "Internal error", 
-                                                      f"Agent card request failed: {timeout_error}", request_id)
-                        
-                    except Exception as worker_error:
-                        logger.error(f"Celery Worker error for agent/getAuthenticatedExtendedCard: {worker_error}")
-                        # 回退到同步处理
-                        try:
-                            from src.external_services.zhipu_a2a_server import zhipu_a2a_server
-                            agent_card = zhipu_a2a_server.get_agent_card()
-                            agent_card["url"] = f"{settings.a2a_base_url}/api/a2a"
-                            return create_jsonrpc_response(agent_card, request_id=request_id)
-                        except Exception as e:
-                            return create_jsonrpc_error(-32603, "Internal error", "Agent card configuration not found", request_id)
-                
-            elif method == "agent/discovery":
-                    # Agent发现也使用异步处理
-                    try:
-                        task_result = process_a2a_request.delay({
-                            "method": method,
-                            "params": params,
-                            "request_id": request_id,
-                            "jsonrpc": "2.0"
-                        })
-                        
-                        logger.info(f"Agent discovery task {task_result.id} submitted to Worker, waiting for completion...")
-                        
-                        # 等待Worker任务完成
-                        try:
-                            actual_result = task_result.get(timeout=agent_config.task_result_timeout_short)
-                            logger.info(f"Agent discovery task {task_result.id} completed successfully")
-                            return actual_result
-                        except Exception as timeout_error:
-                            logger.error(f"Agent discovery task timeout or error: {timeout_error}")
-                            return create_jsonrpc_error(-32603, "Internal error", 
-                                                      f"Agent discovery failed: {timeout_error}", request_id)
-                        
-                    except Exception as worker_error:
-                        logger.error(f"Celery Worker error for agent/discovery: {worker_error}")
-                        # 回退到同步处理
-                        from src.external_services.zhipu_a2a_server import zhipu_a2a_server
-                        request_handler = zhipu_a2a_server.request_handler
-                        discovery_result = await request_handler.handle_agent_discovery_request(params)
-                        return create_jsonrpc_response(discovery_result, request_id=request_id)
-                
-            else:
+            handler = _A2A_METHODS.get(method) if isinstance(method, str) else None
+            if handler is None:
                 return create_jsonrpc_error(-32601, "Method not found", f"Unknown method: {method}", request_id)
+            if not isinstance(params, dict):
+                return create_jsonrpc_error(-32602, "Invalid params", "params must be a JSON object", request_id)
+            
+            logger.info(f"A2A main endpoint received: {jsonrpc_request}")
+            return await handler(method, params, request_id)
                     
         except Exception as e:
             logger.error(f"A2A endpoint error: {e}")
             return create_jsonrpc_error(-32603, "Internal error", str(e), jsonrpc_request.get("id") if isinstance(jsonrpc_request, dict) else None)
     
+    # A2A 协议端点设置 - 使用 Celery Worker 异步处理
+    @app.post("/api/a2a")
+    async def a2a_main_endpoint(request: Request):
+        """A2A协议主端点 - 使用Celery Worker异步处理"""
+        try:
+            jsonrpc_request = await _read_json_body(request)
+        except orjson.JSONDecodeError as e:
+            return create_jsonrpc_error(-32700, "Parse error", str(e))
+        
+        return await process_jsonrpc_request(jsonrpc_request)
+    
+    def _lookup_task_user_id(task_id: str) -> Optional[int]:
+        """查询任务所属用户ID（同步，在线程中调用）"""
+        db = SessionLocal()
+        try:
+            return TaskRepository(db).get_task_user_id(task_id)
+        finally:
+            db.close()
+    
+    async def _queue_completion_message(task_id: str, context_id: Optional[str], result: Any, timestamp: str):
+        """任务完成通知的收件箱写入 - 作为后台任务在响应发送后执行"""
+        # 从任务记录中获取用户ID - 同步查询放到线程中执行
+        try:
+            user_id = await asyncio.to_thread(_lookup_task_user_id, task_id)
+        except Exception as user_error:
+            logger.warning(f"Failed to get task user info: {user_error}")
+            return
+        if user_id is None:
+            return
+        
+        # 放入收件箱批量写入队列，后台合并为多行INSERT
+        try:
+            inbox_writer.enqueue(
+                user_id=user_id,
+                message_type=MessageType.NOTIFICATION,
+                content=f"任务已完成: {task_id}",
+                metadata={
+                    "task_id": task_id,
+                    "context_id": context_id,
+                    "notification_type": "task_completion",
+                    "result": result,
+                    "timestamp": timestamp
+                }
+            )
+            logger.info(f"Queued task completion message to inbox for user {user_id}")
+        except Exception as msg_error:
+            logger.warning(f"Failed to save notification message: {msg_error}")
+    
+    # 推送通知去重器 - 进程内有效，多进程部署时各进程独立去重
+    _notification_dedup = RingDedup(
+        size=agent_config.notification_dedup_size,
+        ttl=agent_config.notification_dedup_ttl
+    )
+    
     @app.post("/api/a2a/notifications")
-    async def a2a_notification_endpoint(notification_data: dict = None, db: Session = Depends(get_db)):
+    async def a2a_notification_endpoint(request: Request, background_tasks: BackgroundTasks):
         """A2A推送通知接收端点 - AutoGLM Agent使用标准A2A协议tasks/pushNotificationConfig/set"""
         try:
-            # 处理空请求体
-            if notification_data is None:
-                notification_data = {}
+            notification_data = await _read_json_body(request)
+        except orjson.JSONDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+        
+        # 处理空请求体
+        if notification_data is None:
+            notification_data = {}
+        elif not isinstance(notification_data, dict):
+            raise HTTPException(status_code=422, detail="Notification body must be a JSON object")
+        
+        # 本次请求的响应和收件箱元数据共用同一个时间戳
+        now_iso = _now_iso()
+        
+        try:
             
             logger.info(f"Received A2A notification from AutoGLM Agent: {notification_data}")
             logger.info("AutoGLM Agent supports standard A2A protocol push notifications!")
@@ -625,58 +756,42 @@ if A2A_SDK_AVAILABLE and a2a_server:
                 return {
                     "status": "received",
                     "message": "Test notification received successfully",
-                    "timestamp": datetime.utcnow().isoformat()
+                    "timestamp": now_iso
                 }
             
             if task_id:
-                # 更新任务状态到数据库
-                task_repo = TaskRepository(db)
-                try:
-                    # 更新任务状态
-                    task_repo.update_task_status(
-                        task_id=task_id,
-                        status=status.get("state", "updated"),
-                        result=result
-                    )
-                    logger.info(f"Updated task {task_id} status: {status.get('state', 'updated')}")
-                except Exception as db_error:
-                    logger.warning(f"Failed to update task in database: {db_error}")
+                # 丢弃上游重试/重复投递的同一通知，避免重复写库和重复的收件箱消息；
+                # 键包含结果和状态消息，携带新进度或更正结果的同状态通知不会被丢弃
+                dedup_hash = hashlib.blake2b(
+                    f"{task_id}|{context_id}|{status.get('state')}|".encode(), digest_size=16
+                )
+                dedup_hash.update(orjson.dumps(
+                    [result, status.get("message")], option=orjson.OPT_SORT_KEYS, default=str
+                ))
+                dedup_key = dedup_hash.digest()
+                if _notification_dedup.seen(dedup_key):
+                    logger.info(f"Dropped duplicate notification for task {task_id}: {status.get('state')}")
+                    return {
+                        "status": "duplicate",
+                        "task_id": task_id,
+                        "timestamp": now_iso
+                    }
+                
+                # 任务状态更新交给批量写入器，在后台合并后写入数据库
+                if task_status_writer.enqueue(task_id, status.get("state"), result):
+                    logger.info(f"Queued task {task_id} status update: {status.get('state', 'updated')}")
+                else:
+                    logger.warning(f"Ignored unknown task state for {task_id}: {status.get('state')}")
                 
-                # 如果任务完成，保存到消息收件箱
+                # 如果任务完成，响应返回后再在后台保存到消息收件箱，发送方无需等待数据库
                 if status.get("state") in ["completed", "finished", "done"]:
-                    # 从任务记录中获取用户ID
-                    try:
-                        task_info = task_repo.get_task(task_id)
-                        if task_info and hasattr(task_info, 'user_id'):
-                            user_id = task_info.user_id
-                            
-                            # 保存到消息收件箱
-                            message_repo = MessageInboxRepository(db)
-                            try:
-                                message_repo.create_message(
-                                    user_id=user_id,
-                                    message_type=MessageType.AGENT_MESSAGE,
-                                    content=f"任务已完成: {task_id}",
-                                    metadata={
-                                        "task_id": task_id,
-                                        "context_id": context_id,
-                                        "notification_type": "task_completion",
-                                        "result": result,
-                                        "timestamp": datetime.utcnow().isoformat()
-                                    }
-                                )
-                                logger.info(f"Saved task completion message to inbox for user {user_id}")
-                            except Exception as msg_error:
-                                logger.warning(f"Failed to save notification message: {msg_error}")
-                    
-                    except Exception as user_error:
-                        logger.warning(f"Failed to get task user info: {user_error}")
+                    background_tasks.add_task(_queue_completion_message, task_id, context_id, result, now_iso)
             
             return {
                 "status": "received",
                 "message": "Notification processed successfully",
                 "task_id": task_id,
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": now_iso
             }
             
         except Exception as e:
@@ -687,71 +802,125 @@ if A2A_SDK_AVAILABLE and a2a_server:
             )
 
     # Worker管理API端点
+    # 已结束任务的状态不再变化，短时间缓存，客户端轮询时不必每次访问结果后端
+    _TERMINAL_TASK_STATES = frozenset({"SUCCESS", "FAILURE", "REVOKED"})
+    _task_status_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+    
+    def _read_task_status(task_id: str) -> Dict[str, Any]:
+        """从Celery结果后端读取任务状态（同步，在线程中调用）
+        
+        一次get_task_meta取回完整元数据，之后只做本地字典查找；
+        AsyncResult的state/info/result属性每次访问都可能再次请求后端
+        """
+        meta = celery_app.backend.get_task_meta(task_id)
+        state = meta.get('status', 'PENDING')
+        info = meta.get('result')
+        
+        if state == 'PENDING':
+            return {
+                'task_id': task_id,
+                'state': state,
+                'status': 'Task is waiting to be processed'
+            }
+        elif state == 'PROGRESS':
+            info = info if isinstance(info, dict) else {}
+            return {
+                'task_id': task_id,
+                'state': state,
+                'current': info.get('current', 0),
+                'total': info.get('total', 1),
+                'status': info.get('status', '')
+            }
+        elif state == 'SUCCESS':
+            return {
+                'task_id': task_id,
+                'state': state,
+                'result': info
+            }
+        else:
+            # FAILURE case - 结果字段保存的是序列化的异常信息
+            return {
+                'task_id': task_id,
+                'state': state,
+                'error': str(celery_app.backend.exception_to_python(info)) if isinstance(info, dict) else str(info)
+            }
+    
     @app.get("/api/tasks/{task_id}/status")
     async def get_task_status(task_id: str):
         """获取Celery任务状态"""
+        now = time.monotonic()
+        cached = _task_status_cache.get(task_id)
+        if cached is not None and now < cached[0]:
+            return cached[1]
+        
         try:
-            from src.async_execution.message_queue import celery_app
-            
-            task_result = celery_app.AsyncResult(task_id)
-            
-            if task_result.state == 'PENDING':
-                response = {
-                    'task_id': task_id,
-                    'state': task_result.state,
-                    'status': 'Task is waiting to be processed'
-                }
-            elif task_result.state == 'PROGRESS':
-                response = {
-                    'task_id': task_id,
-                    'state': task_result.state,
-                    'current': task_result.info.get('current', 0),
-                    'total': task_result.info.get('total', 1),
-                    'status': task_result.info.get('status', '')
-                }
-            elif task_result.state == 'SUCCESS':
-                response = {
-                    'task_id': task_id,
-                    'state': task_result.state,
-                    'result': task_result.result
-                }
-            else:
-                # FAILURE case
-                response = {
-                    'task_id': task_id,
-                    'state': task_result.state,
-                    'error': str(task_result.info)
-                }
-            
-            return response
-            
+            # 结果后端访问是同步网络IO，放到线程中执行
+            response = await asyncio.to_thread(_read_task_status, task_id)
         except Exception as e:
             logger.error(f"Error getting task status: {e}")
             raise HTTPException(status_code=500, detail=f"Failed to get task status: {e}")
+        
+        if response['state'] in _TERMINAL_TASK_STATES:
+            _task_status_cache[task_id] = (now + agent_config.task_status_cache_ttl, response)
+            _task_status_cache.move_to_end(task_id)
+            while len(_task_status_cache) > agent_config.task_status_cache_max_entries:
+                _task_status_cache.popitem(last=False)
+        
+        return response
 
     @app.get("/api/workers/status")
     async def get_workers_status():
         """获取Worker状态"""
         try:
-            from src.async_execution.worker_manager import worker_manager
             return worker_manager.get_worker_status()
         except Exception as e:
             logger.error(f"Error getting worker status: {e}")
             raise HTTPException(status_code=500, detail=f"Failed to get worker status: {e}")
 
     @app.post("/api/workers/restart")
-    async def restart_workers(worker_count: int = None):
-        """重启Workers"""
+    async def restart_workers(background_tasks: BackgroundTasks, worker_count: int = None):
+        """重启Workers - 广播重启后立即返回restart_id，进度通过状态接口查询"""
         try:
             # 使用配置的默认重启数量
             worker_count = worker_count or agent_config.worker_restart_count
-            from src.async_execution.worker_manager import worker_manager
-            worker_manager.restart_workers(worker_count)
-            return {"message": f"Workers restarted with count: {worker_count}"}
+            restart_id = await asyncio.to_thread(worker_manager.restart_workers, worker_count)
+            # 响应发送后再统计重启进度并调整托管的Worker数量（先统计节点，新增的Worker不计入）；
+            # 不支持pool_restart的执行池改为重新启动托管的Worker进程
+            if worker_manager.supports_pool_restart():
+                background_tasks.add_task(worker_manager.track_restart, restart_id)
+                if worker_manager.is_running:
+                    background_tasks.add_task(worker_manager.scale_workers, worker_count)
+            elif worker_manager.is_running:
+                background_tasks.add_task(worker_manager.respawn_workers, worker_count)
+            return {"restart_id": restart_id, "status": "initiated", "worker_count": worker_count}
+        except RuntimeError as e:
+            logger.error(f"Error restarting workers: {e}")
+            raise HTTPException(status_code=409, detail=f"Failed to restart workers: {e}")
         except Exception as e:
             logger.error(f"Error restarting workers: {e}")
             raise HTTPException(status_code=500, detail=f"Failed to restart workers: {e}")
 
+    @app.get("/api/workers/restart/{restart_id}")
+    async def get_restart_status(restart_id: str):
+        """查询Worker重启进度"""
+        try:
+            restart_status = await asyncio.to_thread(worker_manager.get_restart_status, restart_id)
+        except Exception as e:
+            logger.error(f"Error getting restart status: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to get restart status: {e}")
+        if restart_status is None:
+            raise HTTPException(status_code=404, detail=f"Restart {restart_id} not found")
+        return restart_status
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(
+        "src.user_interaction.main_simple:app",
+        host=settings.host,
+        port=settings.port,
+        workers=settings.server_workers,
+        loop=settings.server_loop,
+        http=settings.server_http,
+        backlog=settings.server_backlog,
+        access_log=settings.server_access_log
+    )
@@ -10,13 +10,14 @@ Refactored Terminal Device API
 5. EventStream状态查询
 6. 意图识别日志查询
 """
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status
-from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
 
-from src.data_persistence.database import get_db
+from src.data_persistence.heartbeat_writer import heartbeat_writer
 from src.data_persistence.terminal_device_models import (
     TerminalDeviceType, DataType
     # 移除 MCPCapability，因为MCP标准中没有预定义能力概念
@@ -26,15 +27,29 @@ from src.core_application.websocket_data_manager import websocket_data_manager
 from src.core_application.event_stream_manager import event_stream_manager
 from src.core_application.multimodal_llm_agent import multimodal_llm_agent_manager
 from config.settings import settings
+import asyncio
 import logging
+import orjson
 
 
 logger = logging.getLogger(__name__)
-router = APIRouter(prefix="/api/terminal-devices", tags=["Terminal Devices"])
+# 路由级别默认使用orjson编码响应，不依赖挂载该路由的应用配置
+router = APIRouter(
+    prefix="/api/terminal-devices",
+    tags=["Terminal Devices"],
+    default_response_class=ORJSONResponse
+)
 
 
 # === Pydantic模型定义 ===
 
+def _dedupe_tuple(value):
+    """校验后将列表字段冻结为去重的元组（保持原有顺序），None原样返回"""
+    if value is None:
+        return None
+    return tuple(dict.fromkeys(value))
+
+
 class TerminalDeviceRegistration(BaseModel):
     """终端设备注册请求"""
     device_id: str = Field(..., description="设备唯一标识")
@@ -44,20 +59,25 @@ class TerminalDeviceRegistration(BaseModel):
     
     # MCP服务器配置（符合MCP标准）
     mcp_server_url: str = Field(..., description="MCP服务器地址")
-    mcp_tools: List[str] = Field(default=[], description="MCP工具名称列表（符合MCP标准）")
+    mcp_tools: Tuple[str, ...] = Field(default=(), description="MCP工具名称列表（符合MCP标准）")
     
     # WebSocket配置
     websocket_endpoint: Optional[str] = Field(None, description="WebSocket端点")
-    supported_data_types: List[DataType] = Field(default=[], description="支持的数据类型")
+    supported_data_types: Tuple[DataType, ...] = Field(default=(), description="支持的数据类型")
     max_data_size_mb: int = Field(10, description="最大数据包大小(MB)")
     
     # 意图识别配置
     system_prompt: Optional[str] = Field(None, description="设备特定的系统提示词")
-    intent_keywords: List[str] = Field(default=[], description="意图关键词")
+    intent_keywords: Tuple[str, ...] = Field(default=(), description="意图关键词")
     
     # 其他信息
     location: Optional[str] = Field(None, description="设备位置")
     hardware_info: Dict[str, Any] = Field(default={}, description="硬件信息")
+    
+    @field_validator("mcp_tools", "supported_data_types", "intent_keywords", mode="after")
+    @classmethod
+    def freeze_lists(cls, value):
+        return _dedupe_tuple(value)
 
 
 class TerminalDeviceResponse(BaseModel):
@@ -81,8 +101,7 @@ class TerminalDeviceResponse(BaseModel):
     updated_at: str
     last_seen: Optional[str]
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class TerminalDeviceUpdate(BaseModel):
@@ -91,14 +110,19 @@ class TerminalDeviceUpdate(BaseModel):
     description: Optional[str] = None
     mcp_server_url: Optional[str] = None
     # 移除 mcp_capabilities，因为MCP标准中没有预定义能力概念
-    mcp_tools: Optional[List[str]] = None
+    mcp_tools: Optional[Tuple[str, ...]] = None
     websocket_endpoint: Optional[str] = None
-    supported_data_types: Optional[List[DataType]] = None
+    supported_data_types: Optional[Tuple[DataType, ...]] = None
     max_data_size_mb: Optional[int] = None
     system_prompt: Optional[str] = None
-    intent_keywords: Optional[List[str]] = None
+    intent_keywords: Optional[Tuple[str, ...]] = None
     location: Optional[str] = None
     hardware_info: Optional[Dict[str, Any]] = None
+    
+    @field_validator("mcp_tools", "supported_data_types", "intent_keywords", mode="after")
+    @classmethod
+    def freeze_lists(cls, value):
+        return _dedupe_tuple(value)
 
 
 class EventStreamStatus(BaseModel):
@@ -153,12 +177,61 @@ class MCPConnectionTestResponse(BaseModel):
     message: Optional[str] = None
 
 
+# === 请求体解析 ===
+
+def _json_body(model: type):
+    """
+    构建请求体依赖：直接用 model_validate_json 对原始字节做一次解析+校验，
+    省去FastAPI先json.loads再逐字段校验Python对象的两遍处理
+    """
+    async def dependency(request: Request):
+        try:
+            return model.model_validate_json(await request.body())
+        except ValidationError as e:
+            raise RequestValidationError(e.errors(include_url=False))
+    return dependency
+
+
+def _json_body_openapi(model: type) -> Dict[str, Any]:
+    """为使用 _json_body 的端点补充OpenAPI请求体描述"""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": model.model_json_schema()}}
+        }
+    }
+
+
+# === 响应构建 ===
+
+def _device_to_dict(device) -> Dict[str, Any]:
+    """将设备ORM对象转换为与TerminalDeviceResponse字段一致的dict"""
+    return terminal_device_manager.device_to_response_dict(device)
+
+
+# 设备列表流式输出时每个分块的目标大小
+_STREAM_CHUNK_BYTES = 64 * 1024
+
+
+async def _stream_devices(devices) -> AsyncIterator[bytes]:
+    """将设备列表编码为JSON数组：单次遍历完成转换和编码，按分块大小输出"""
+    buffer = bytearray(b"[")
+    for index, device in enumerate(devices):
+        if index:
+            buffer += b","
+        buffer += orjson.dumps(_device_to_dict(device))
+        if len(buffer) >= _STREAM_CHUNK_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b"]"
+    yield bytes(buffer)
+
+
 # === API端点定义 ===
 
 @router.post("/register", response_model=TerminalDeviceResponse)
 async def register_terminal_device(
-    device_data: TerminalDeviceRegistration,
-    db: Session = Depends(get_db)
+    device_data: TerminalDeviceRegistration
 ):
     """
     注册新的终端设备
@@ -168,7 +241,8 @@ async def register_terminal_device(
     """
     try:
         # 直接使用原始注册方法（已内置MCP验证）
-        device = terminal_device_manager.register_device(
+        device = await asyncio.to_thread(
+            terminal_device_manager.register_device,
             device_id=device_data.device_id,
             name=device_data.name,
             device_type=device_data.device_type,
@@ -189,39 +263,7 @@ async def register_terminal_device(
         
         logger.info(f"✅ 终端设备注册成功: {device_data.device_id}")
         
-        def normalize_mcp_tools(mcp_tools):
-            """确保mcp_tools是字符串数组"""
-            if not mcp_tools:
-                return []
-            if isinstance(mcp_tools, list):
-                # 如果是字典列表，提取name字段
-                if mcp_tools and isinstance(mcp_tools[0], dict):
-                    return [tool.get("name", str(tool)) for tool in mcp_tools if tool.get("name")]
-                # 如果是字符串列表，直接返回
-                return [str(tool) for tool in mcp_tools]
-            return []
-        
-        return TerminalDeviceResponse(
-            id=device.id,
-            device_id=device.device_id,
-            name=device.name,
-            description=device.description or "",
-            device_type=device.device_type.value,
-            mcp_server_url=device.mcp_server_url,
-
-            mcp_tools=normalize_mcp_tools(device.mcp_tools),
-            websocket_endpoint=device.websocket_endpoint,
-            supported_data_types=device.supported_data_types,
-            max_data_size_mb=device.max_data_size_mb,
-            is_connected=device.is_connected,
-            location=device.location,
-            hardware_info=device.hardware_info,
-            system_prompt=device.system_prompt,
-            intent_keywords=device.intent_keywords,
-            created_at=device.created_at.isoformat(),
-            updated_at=device.updated_at.isoformat(),
-            last_seen=device.last_seen.isoformat() if device.last_seen else None
-        )
+        return ORJSONResponse(_device_to_dict(device))
         
     except Exception as e:
         logger.error(f"❌ 终端设备注册失败: {e}")
@@ -234,75 +276,34 @@ async def register_terminal_device(
 @router.put("/{device_id}", response_model=TerminalDeviceResponse)
 async def update_terminal_device(
     device_id: str,
-    update_data: TerminalDeviceUpdate,
-    db: Session = Depends(get_db)
+    update_data: TerminalDeviceUpdate
 ):
     """更新终端设备信息"""
     try:
-        device = terminal_device_manager.get_device(device_id)
+        device = await asyncio.to_thread(terminal_device_manager.get_device, device_id)
         if not device:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Device not found: {device_id}"
             )
         
-        # 更新设备信息
-        update_dict = update_data.dict(exclude_unset=True)
-        if update_dict:
-            # 重新注册以更新信息
-            terminal_device_manager.register_device(
-                device_id=device_id,
-                name=update_dict.get("name", device.name),
-                device_type=device.device_type,
-                mcp_server_url=update_dict.get("mcp_server_url", device.mcp_server_url),
-                description=update_dict.get("description", device.description),
-                # 移除 mcp_capabilities，使用 mcp_tools
-                mcp_tools=update_dict.get("mcp_tools", device.mcp_tools),
-                supported_data_types=[DataType(dt) for dt in update_dict.get("supported_data_types", device.supported_data_types)],
-                websocket_endpoint=update_dict.get("websocket_endpoint", device.websocket_endpoint),
-                system_prompt=update_dict.get("system_prompt", device.system_prompt),
-                intent_keywords=update_dict.get("intent_keywords", device.intent_keywords),
-                hardware_info=update_dict.get("hardware_info", device.hardware_info),
-                location=update_dict.get("location", device.location),
-                max_data_size_mb=update_dict.get("max_data_size_mb", device.max_data_size_mb)
-            )
+        # 只更新请求中出现的字段；MCP服务地址未变化时不重新验证
+        changes = update_data.model_dump(exclude_unset=True)
+        if changes.get("mcp_server_url") == device.mcp_server_url:
+            changes.pop("mcp_server_url")
+        
+        if changes:
+            found = await asyncio.to_thread(terminal_device_manager.update_device, device_id, **changes)
+            if not found:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Device not found: {device_id}"
+                )
             
             # 重新获取更新后的设备
-            device = terminal_device_manager.get_device(device_id)
-        
-        def normalize_mcp_tools(mcp_tools):
-            """确保mcp_tools是字符串数组"""
-            if not mcp_tools:
-                return []
-            if isinstance(mcp_tools, list):
-                # 如果是字典列表，提取name字段
-                if mcp_tools and isinstance(mcp_tools[0], dict):
-                    return [tool.get("name", str(tool)) for tool in mcp_tools if tool.get("name")]
-                # 如果是字符串列表，直接返回
-                return [str(tool) for tool in mcp_tools]
-            return []
-        
-        return TerminalDeviceResponse(
-            id=device.id,
-            device_id=device.device_id,
-            name=device.name,
-            description=device.description or "",
-            device_type=device.device_type.value,
-            mcp_server_url=device.mcp_server_url,
-
-            mcp_tools=normalize_mcp_tools(device.mcp_tools),
-            websocket_endpoint=device.websocket_endpoint,
-            supported_data_types=device.supported_data_types,
-            max_data_size_mb=device.max_data_size_mb,
-            is_connected=device.is_connected,
-            location=device.location,
-            hardware_info=device.hardware_info,
-            system_prompt=device.system_prompt,
-            intent_keywords=device.intent_keywords,
-            created_at=device.created_at.isoformat(),
-            updated_at=device.updated_at.isoformat(),
-            last_seen=device.last_seen.isoformat() if device.last_seen else None
-        )
+            device = await asyncio.to_thread(terminal_device_manager.get_device, device_id)
+        
+        return ORJSONResponse(_device_to_dict(device))
         
     except HTTPException:
         raise
@@ -318,56 +319,27 @@ async def update_terminal_device(
 async def get_terminal_devices(
     online_only: bool = False,
     device_type: Optional[TerminalDeviceType] = None,
-    tool_name: Optional[str] = None,  # 使用工具名称而不是能力
-    db: Session = Depends(get_db)
+    tool_name: Optional[str] = None  # 使用工具名称而不是能力
 ):
     """获取终端设备列表"""
     try:
+        # 最常见的请求（只看在线设备、无其他过滤）直接返回缓存的JSON
+        if online_only and not tool_name and not device_type:
+            payload = await asyncio.to_thread(terminal_device_manager.get_online_devices_json)
+            return Response(content=payload, media_type="application/json")
+        
+        # 设备类型过滤在数据库查询中完成
         if tool_name:
-            devices = terminal_device_manager.get_devices_by_tool(tool_name)
+            devices = await asyncio.to_thread(
+                terminal_device_manager.get_devices_by_tool, tool_name, device_type=device_type
+            )
         else:
-            devices = terminal_device_manager.get_all_devices(online_only=online_only)
-        
-        # 按设备类型过滤
-        if device_type:
-            devices = [d for d in devices if d.device_type == device_type]
-        
-        def normalize_mcp_tools(mcp_tools):
-            """确保mcp_tools是字符串数组"""
-            if not mcp_tools:
-                return []
-            if isinstance(mcp_tools, list):
-                # 如果是字典列表，提取name字段
-                if mcp_tools and isinstance(mcp_tools[0], dict):
-                    return [tool.get("name", str(tool)) for tool in mcp_tools if tool.get("name")]
-                # 如果是字符串列表，直接返回
-                return [str(tool) for tool in mcp_tools]
-            return []
-        
-        return [
-            TerminalDeviceResponse(
-                id=device.id,
-                device_id=device.device_id,
-                name=device.name,
-                description=device.description or "",
-                device_type=device.device_type.value,
-                mcp_server_url=device.mcp_server_url,
-    
-                mcp_tools=normalize_mcp_tools(device.mcp_tools),
-                websocket_endpoint=device.websocket_endpoint,
-                supported_data_types=device.supported_data_types,
-                max_data_size_mb=device.max_data_size_mb,
-                is_connected=device.is_connected,
-                location=device.location,
-                hardware_info=device.hardware_info,
-                system_prompt=device.system_prompt,
-                intent_keywords=device.intent_keywords,
-                created_at=device.created_at.isoformat(),
-                updated_at=device.updated_at.isoformat(),
-                last_seen=device.last_seen.isoformat() if device.last_seen else None
+            devices = await asyncio.to_thread(
+                terminal_device_manager.get_all_devices, online_only=online_only, device_type=device_type
             )
-            for device in devices
-        ]
+        
+        # 逐个设备编码并流式输出，跳过TerminalDeviceResponse构建，也不在内存中拼出整个列表
+        return StreamingResponse(_stream_devices(devices), media_type="application/json")
         
     except Exception as e:
         logger.error(f"❌ 获取终端设备列表失败: {e}")
@@ -378,49 +350,17 @@ async def get_terminal_devices(
 
 
 @router.get("/{device_id}", response_model=TerminalDeviceResponse)
-async def get_terminal_device(device_id: str, db: Session = Depends(get_db)):
+async def get_terminal_device(device_id: str):
     """获取单个终端设备信息"""
     try:
-        device = terminal_device_manager.get_device(device_id)
+        device = await asyncio.to_thread(terminal_device_manager.get_device, device_id)
         if not device:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Device not found: {device_id}"
             )
         
-        def normalize_mcp_tools(mcp_tools):
-            """确保mcp_tools是字符串数组"""
-            if not mcp_tools:
-                return []
-            if isinstance(mcp_tools, list):
-                # 如果是字典列表，提取name字段
-                if mcp_tools and isinstance(mcp_tools[0], dict):
-                    return [tool.get("name", str(tool)) for tool in mcp_tools if tool.get("name")]
-                # 如果是字符串列表，直接返回
-                return [str(tool) for tool in mcp_tools]
-            return []
-        
-        return TerminalDeviceResponse(
-            id=device.id,
-            device_id=device.device_id,
-            name=device.name,
-            description=device.description or "",
-            device_type=device.device_type.value,
-            mcp_server_url=device.mcp_server_url,
-
-            mcp_tools=normalize_mcp_tools(device.mcp_tools),
-            websocket_endpoint=device.websocket_endpoint,
-            supported_data_types=device.supported_data_types,
-            max_data_size_mb=device.max_data_size_mb,
-            is_connected=device.is_connected,
-            location=device.location,
-            hardware_info=device.hardware_info,
-            system_prompt=device.system_prompt,
-            intent_keywords=device.intent_keywords,
-            created_at=device.created_at.isoformat(),
-            updated_at=device.updated_at.isoformat(),
-            last_seen=device.last_seen.isoformat() if device.last_seen else None
-        )
+        return ORJSONResponse(_device_to_dict(device))
         
     except HTTPException:
         raise
@@ -433,10 +373,10 @@ async def get_terminal_device(device_id: str, db: Session = Depends(get_db)):
 
 
 @router.delete("/{device_id}")
-async def unregister_terminal_device(device_id: str, db: Session = Depends(get_db)):
+async def unregister_terminal_device(device_id: str):
     """注销终端设备"""
     try:
-        success = terminal_device_manager.unregister_device(device_id)
+        success = await asyncio.to_thread(terminal_device_manager.unregister_device, device_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -446,7 +386,10 @@ async def unregister_terminal_device(device_id: str, db: Session = Depends(get_d
         # 清理相关资源
         # event_stream_manager.remove_device_stream(device_id)  # 方法不存在，暂时注释
         
-        return {"message": f"Device unregistered successfully: {device_id}"}
+        return Response(
+            content=orjson.dumps({"message": f"Device unregistered successfully: {device_id}"}),
+            media_type="application/json"
+        )
         
     except HTTPException:
         raise
@@ -459,21 +402,31 @@ async def unregister_terminal_device(device_id: str, db: Session = Depends(get_d
 
 
 @router.post("/{device_id}/heartbeat")
-async def device_heartbeat(device_id: str, db: Session = Depends(get_db)):
-    """设备心跳"""
+async def device_heartbeat(device_id: str):
+    """设备心跳 - 在内存中记录心跳并放入批量写入队列后立即返回"""
     try:
-        success = terminal_device_manager.heartbeat_device(device_id)
-        if not success:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Device not found: {device_id}"
-            )
-        
-        return {
-            "device_id": device_id,
-            "heartbeat_time": datetime.utcnow().isoformat(),
-            "status": "ok"
-        }
+        heartbeat_time = datetime.utcnow()
+        # 设备在缓存中时不访问数据库；缓存未命中时查询一次，结果进入缓存
+        if not terminal_device_manager.touch_device(device_id, heartbeat_time):
+            device = await asyncio.to_thread(terminal_device_manager.get_device, device_id)
+            if not device:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Device not found: {device_id}"
+                )
+            terminal_device_manager.touch_device(device_id, heartbeat_time)
+        
+        heartbeat_writer.enqueue(device_id, heartbeat_time)
+        
+        # 直接返回编码好的JSON字节，跳过jsonable_encoder
+        return Response(
+            content=orjson.dumps({
+                "device_id": device_id,
+                "heartbeat_time": heartbeat_time.isoformat(),
+                "status": "ok"
+            }),
+            media_type="application/json"
+        )
         
     except HTTPException:
         raise
@@ -486,7 +439,7 @@ async def device_heartbeat(device_id: str, db: Session = Depends(get_db)):
 
 
 @router.get("/{device_id}/stream-status", response_model=EventStreamStatus)
-async def get_device_stream_status(device_id: str, db: Session = Depends(get_db)):
+async def get_device_stream_status(device_id: str):
     """获取设备EventStream状态"""
     try:
         status_data = event_stream_manager.get_stream_status(device_id)
@@ -527,16 +480,19 @@ async def get_all_streams_status():
         )
 
 
-@router.post("/{device_id}/mcp-call", response_model=MCPToolCallResponse)
+@router.post(
+    "/{device_id}/mcp-call",
+    response_model=MCPToolCallResponse,
+    openapi_extra=_json_body_openapi(MCPToolCallRequest)
+)
 async def call_mcp_tool(
     device_id: str,
-    call_request: MCPToolCallRequest,
-    db: Session = Depends(get_db)
+    call_request: MCPToolCallRequest = Depends(_json_body(MCPToolCallRequest))
 ):
     """调用设备的MCP工具"""
     try:
         # 验证设备存在
-        device = terminal_device_manager.get_device(device_id)
+        device = await asyncio.to_thread(terminal_device_manager.get_device, device_id)
         if not device:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -603,10 +559,13 @@ async def get_mcp_tools_config():
         )
 
 
-@router.post("/mcp-call-by-intent", response_model=MCPToolCallResponse)
+@router.post(
+    "/mcp-call-by-intent",
+    response_model=MCPToolCallResponse,
+    openapi_extra=_json_body_openapi(MCPToolCallByIntentRequest)
+)
 async def call_mcp_tool_by_intent(
-    call_request: MCPToolCallByIntentRequest,
-    db: Session = Depends(get_db)
+    call_request: MCPToolCallByIntentRequest = Depends(_json_body(MCPToolCallByIntentRequest))
 ):
     """根据意图调用MCP工具（使用LLM智能选择设备和工具）"""
     try:
@@ -645,15 +604,42 @@ async def call_mcp_tool_by_intent(
         )
 
 
+@router.post("/mcp-test", response_model=List[MCPConnectionTestResponse])
+async def test_all_devices_mcp_connection(online_only: bool = False):
+    """并发测试所有设备的MCP连接"""
+    try:
+        results = await terminal_device_manager.test_all_device_mcp_connections(online_only=online_only)
+        failed = sum(1 for r in results if not r.get("success"))
+        logger.info(f"🔍 批量测试设备MCP连接: {len(results)} 个设备, 失败 {failed} 个")
+        
+        return [
+            MCPConnectionTestResponse(
+                success=result.get("success", False),
+                device_id=result["device_id"],
+                server_url=result.get("server_url"),
+                available_tools=result.get("available_tools"),
+                error=result.get("error"),
+                message=result.get("message")
+            )
+            for result in results
+        ]
+        
+    except Exception as e:
+        logger.error(f"❌ 批量测试设备MCP连接失败: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"MCP connection test failed: {str(e)}"
+        )
+
+
 @router.post("/{device_id}/mcp-test", response_model=MCPConnectionTestResponse)
 async def test_device_mcp_connection(
-    device_id: str,
-    db: Session = Depends(get_db)
+    device_id: str
 ):
     """测试设备MCP连接"""
     try:
         # 验证设备存在
-        device = terminal_device_manager.get_device(device_id)
+        device = await asyncio.to_thread(terminal_device_manager.get_device, device_id)
         if not device:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -10,16 +10,23 @@ WebSocket Reconnection Manager
 4. 连接健康检查
 """
 import asyncio
-import json
+import inspect
 import logging
+import random
 import time
+import orjson
 import websockets
-from datetime import datetime, timezone, timedelta
-from typing import Optional, Callable, Dict, Any
+from datetime import datetime, timezone
+from functools import partial
+from collections import deque
+from typing import Optional, Callable, Deque, Dict, Any, Tuple, Union
 from enum import Enum
 
 logger = logging.getLogger(__name__)
 
+# 发送循环单次最多合并发送的消息数
+_SEND_BATCH_MAX = 32
+
 
 class ConnectionState(Enum):
     """连接状态枚举"""
@@ -31,90 +38,123 @@ class ConnectionState(Enum):
     STOPPED = "stopped"
 
 
+# 首次连接尝试已有结果的状态
+_ATTEMPT_SETTLED_STATES = frozenset({
+    ConnectionState.CONNECTED,
+    ConnectionState.RECONNECTING,
+    ConnectionState.FAILED,
+    ConnectionState.STOPPED,
+})
+
+
 class ConnectionStats:
     """连接统计信息"""
     
+    # 计数器在每条消息收发时更新，使用__slots__省去实例字典
+    __slots__ = (
+        "total_connections", "successful_connections", "failed_connections",
+        "total_reconnections", "current_connection_start", "last_disconnect_time",
+        "total_uptime", "data_sent_count", "data_received_count",
+        "bytes_sent", "bytes_received", "_dirty", "_cached_counters",
+    )
+    
     def __init__(self):
         self.total_connections = 0
         self.successful_connections = 0
         self.failed_connections = 0
         self.total_reconnections = 0
-        self.current_connection_start = None
+        # 时长统计使用 time.monotonic() 秒数，仅断开时间保留datetime用于展示
+        self.current_connection_start: Optional[float] = None
         self.last_disconnect_time = None
-        self.total_uptime = timedelta()
+        self.total_uptime = 0.0
         self.data_sent_count = 0
         self.data_received_count = 0
         self.bytes_sent = 0
         self.bytes_received = 0
+        # 计数器相关字段的缓存，任一计数器变化后置脏重建
+        self._dirty = True
+        self._cached_counters: Dict[str, Any] = {}
     
     def connection_started(self):
         """记录连接开始"""
         self.total_connections += 1
-        self.current_connection_start = datetime.now()
+        self.current_connection_start = time.monotonic()
+        self._dirty = True
     
     def connection_success(self):
         """记录连接成功"""
         self.successful_connections += 1
+        self._dirty = True
     
     def connection_failed(self):
         """记录连接失败"""
         self.failed_connections += 1
+        self._dirty = True
     
     def reconnection_attempt(self):
         """记录重连尝试"""
         self.total_reconnections += 1
+        self._dirty = True
     
     def connection_ended(self):
         """记录连接结束"""
-        if self.current_connection_start:
-            uptime = datetime.now() - self.current_connection_start
-            self.total_uptime += uptime
+        if self.current_connection_start is not None:
+            self.total_uptime += time.monotonic() - self.current_connection_start
             self.current_connection_start = None
         self.last_disconnect_time = datetime.now()
+        self._dirty = True
     
-    def data_sent(self, size: int):
-        """记录发送数据"""
-        self.data_sent_count += 1
+    def data_sent(self, size: int, count: int = 1):
+        """记录发送数据（count条消息共size字节）"""
+        self.data_sent_count += count
         self.bytes_sent += size
+        self._dirty = True
     
     def data_received(self, size: int):
         """记录接收数据"""
         self.data_received_count += 1
         self.bytes_received += size
+        self._dirty = True
+    
+    def _counters_dict(self) -> Dict[str, Any]:
+        """计数器相关字段（与时间无关），未变化时复用上次结果"""
+        if self._dirty:
+            self._cached_counters = {
+                "total_connections": self.total_connections,
+                "successful_connections": self.successful_connections,
+                "failed_connections": self.failed_connections,
+                "success_rate": (
+                    self.successful_connections / max(self.total_connections, 1) * 100
+                ),
+                "total_reconnections": self.total_reconnections,
+                "last_disconnect": (
+                    self.last_disconnect_time.isoformat() 
+                    if self.last_disconnect_time else None
+                ),
+                "data_sent_count": self.data_sent_count,
+                "data_received_count": self.data_received_count,
+                "bytes_sent": self.bytes_sent,
+                "bytes_received": self.bytes_received,
+                "avg_bytes_per_send": (
+                    self.bytes_sent / max(self.data_sent_count, 1)
+                ),
+                "avg_bytes_per_receive": (
+                    self.bytes_received / max(self.data_received_count, 1)
+                )
+            }
+            self._dirty = False
+        return self._cached_counters
     
     def get_stats_dict(self) -> Dict[str, Any]:
-        """获取统计信息字典"""
-        current_uptime = timedelta()
-        if self.current_connection_start:
-            current_uptime = datetime.now() - self.current_connection_start
-        
-        total_uptime = self.total_uptime + current_uptime
+        """获取统计信息字典（返回新字典，调用方可自由修改）"""
+        current_uptime = 0.0
+        if self.current_connection_start is not None:
+            current_uptime = time.monotonic() - self.current_connection_start
         
-        return {
-            "total_connections": self.total_connections,
-            "successful_connections": self.successful_connections,
-            "failed_connections": self.failed_connections,
-            "success_rate": (
-                self.successful_connections / max(self.total_connections, 1) * 100
-            ),
-            "total_reconnections": self.total_reconnections,
-            "current_uptime_seconds": current_uptime.total_seconds(),
-            "total_uptime_seconds": total_uptime.total_seconds(),
-            "last_disconnect": (
-                self.last_disconnect_time.isoformat() 
-                if self.last_disconnect_time else None
-            ),
-            "data_sent_count": self.data_sent_count,
-            "data_received_count": self.data_received_count,
-            "bytes_sent": self.bytes_sent,
-            "bytes_received": self.bytes_received,
-            "avg_bytes_per_send": (
-                self.bytes_sent / max(self.data_sent_count, 1)
-            ),
-            "avg_bytes_per_receive": (
-                self.bytes_received / max(self.data_received_count, 1)
-            )
-        }
+        stats = dict(self._counters_dict())
+        stats["current_uptime_seconds"] = current_uptime
+        stats["total_uptime_seconds"] = self.total_uptime + current_uptime
+        return stats
 
 
 class WebSocketReconnector:
@@ -129,7 +169,9 @@ class WebSocketReconnector:
         backoff_multiplier: float = 2.0,
         heartbeat_interval: float = 30.0,
         connection_timeout: float = 10.0,
-        ping_timeout: float = 20.0
+        ping_timeout: float = 20.0,
+        stats_every_heartbeats: int = 10,
+        app_heartbeat: bool = False
     ):
         """
         初始化重连管理器
@@ -143,15 +185,36 @@ class WebSocketReconnector:
             heartbeat_interval: 心跳间隔（秒）
             connection_timeout: 连接超时（秒）
             ping_timeout: ping超时（秒）
+            stats_every_heartbeats: 每隔多少次心跳附带一次完整统计信息
+            app_heartbeat: 是否额外发送应用层 client_heartbeat 消息；
+                默认关闭，存活检测由websockets库按heartbeat_interval发送的PING帧完成
         """
         self.url = url
         self.max_retries = max_retries
         self.initial_retry_delay = initial_retry_delay
         self.max_retry_delay = max_retry_delay
         self.backoff_multiplier = backoff_multiplier
+        # 预先计算每次重试的 (抖动下限, 退避上限)，重连时直接查表
+        self._retry_delays = tuple(
+            (min(initial_retry_delay * 0.5, cap), cap)
+            for cap in (
+                min(initial_retry_delay * (backoff_multiplier ** i), max_retry_delay)
+                for i in range(max(max_retries, 0) + 1)
+            )
+        )
         self.heartbeat_interval = heartbeat_interval
         self.connection_timeout = connection_timeout
         self.ping_timeout = ping_timeout
+        # 连接参数在初始化时绑定，每次重连直接调用
+        self._connect_fn = partial(
+            websockets.connect,
+            url,
+            ping_interval=heartbeat_interval,
+            ping_timeout=ping_timeout,
+            close_timeout=10
+        )
+        self.stats_every_heartbeats = max(1, stats_every_heartbeats)
+        self.app_heartbeat = app_heartbeat
         
         # 连接状态
         self.state = ConnectionState.DISCONNECTED
@@ -159,21 +222,36 @@ class WebSocketReconnector:
         self.retry_count = 0
         self.should_reconnect = True
         self.is_manual_disconnect = False
+        # 首次连接尝试有结果（成功/进入重连/失败/停止）时置位，connect() 等待该事件
+        self._connected_or_failed_event = asyncio.Event()
         
         # 统计信息
         self.stats = ConnectionStats()
         
         # 回调函数
-        self.on_connected: Optional[Callable] = None
-        self.on_disconnected: Optional[Callable] = None
-        self.on_message: Optional[Callable[[str], None]] = None
+        # on_connected/on_disconnected/on_message 可为同步或异步函数，
+        # 赋值时记录是否为协程函数，调用时同步回调无需创建协程
+        self._on_connected: Optional[Callable] = None
+        self._on_connected_is_coro = False
+        self._on_disconnected: Optional[Callable] = None
+        self._on_disconnected_is_coro = False
+        self._on_message: Optional[Callable[[str], None]] = None
+        self._on_message_is_coro = False
         self.on_error: Optional[Callable[[Exception], None]] = None
-        self.on_state_changed: Optional[Callable[[ConnectionState], None]] = None
+        self._on_state_changed: Optional[Callable[[ConnectionState], None]] = None
         
         # 任务管理
         self.connection_task: Optional[asyncio.Task] = None
-        self.heartbeat_task: Optional[asyncio.Task] = None
-        self.message_queue = asyncio.Queue()
+        # 心跳消息模板，每次心跳原地更新时间戳/统计信息后序列化
+        self._heartbeat_template: Dict[str, Any] = {
+            "type": "client_heartbeat", "timestamp": None
+        }
+        self._heartbeat_stats_template: Dict[str, Any] = {
+            "type": "client_heartbeat", "timestamp": None, "stats": None
+        }
+        # 待发送消息：单生产者单消费者，deque + Event 代替 asyncio.Queue
+        self._send_deque: Deque[Union[str, bytes]] = deque()
+        self._send_event = asyncio.Event()
         self.send_task: Optional[asyncio.Task] = None
         
         logger.info(f"🔧 WebSocket重连管理器初始化")
@@ -182,18 +260,64 @@ class WebSocketReconnector:
         logger.info(f"   重试延迟: {self.initial_retry_delay}s - {self.max_retry_delay}s")
         logger.info(f"   心跳间隔: {self.heartbeat_interval}s")
     
+    @property
+    def on_connected(self) -> Optional[Callable]:
+        """连接成功回调"""
+        return self._on_connected
+    
+    @on_connected.setter
+    def on_connected(self, callback: Optional[Callable]):
+        self._on_connected = callback
+        self._on_connected_is_coro = inspect.iscoroutinefunction(callback)
+    
+    @property
+    def on_disconnected(self) -> Optional[Callable]:
+        """连接断开回调"""
+        return self._on_disconnected
+    
+    @on_disconnected.setter
+    def on_disconnected(self, callback: Optional[Callable]):
+        self._on_disconnected = callback
+        self._on_disconnected_is_coro = inspect.iscoroutinefunction(callback)
+    
+    @property
+    def on_message(self) -> Optional[Callable[[str], None]]:
+        """消息接收回调"""
+        return self._on_message
+    
+    @on_message.setter
+    def on_message(self, callback: Optional[Callable[[str], None]]):
+        self._on_message = callback
+        self._on_message_is_coro = inspect.iscoroutinefunction(callback)
+    
+    @property
+    def on_state_changed(self) -> Optional[Callable[[ConnectionState], None]]:
+        """状态变更回调"""
+        return self._on_state_changed
+    
+    @on_state_changed.setter
+    def on_state_changed(self, callback: Optional[Callable[[ConnectionState], None]]):
+        self._on_state_changed = callback
+    
     def _set_state(self, new_state: ConnectionState):
         """设置连接状态"""
-        if self.state != new_state:
-            old_state = self.state
-            self.state = new_state
-            logger.info(f"🔄 连接状态变更: {old_state.value} → {new_state.value}")
-            
-            if self.on_state_changed:
-                try:
-                    self.on_state_changed(new_state)
-                except Exception as e:
-                    logger.error(f"❌ 状态变更回调异常: {e}")
+        old_state = self.state
+        if new_state is old_state:
+            return
+        self.state = new_state
+        if new_state in _ATTEMPT_SETTLED_STATES:
+            self._connected_or_failed_event.set()
+        else:
+            self._connected_or_failed_event.clear()
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("🔄 连接状态变更: %s → %s", old_state.value, new_state.value)
+        
+        callback = self._on_state_changed
+        if callback is not None:
+            try:
+                callback(new_state)
+            except Exception as e:
+                logger.error(f"❌ 状态变更回调异常: {e}")
     
     async def connect(self) -> bool:
         """启动连接（带重连机制）"""
@@ -203,41 +327,27 @@ class WebSocketReconnector:
         
         self.should_reconnect = True
         self.is_manual_disconnect = False
+        self._connected_or_failed_event.clear()
         self.connection_task = asyncio.create_task(self._connection_loop())
         
         # 等待首次连接尝试完成
         try:
-            await asyncio.wait_for(self._wait_for_connection(), timeout=30.0)
+            await asyncio.wait_for(self._connected_or_failed_event.wait(), timeout=30.0)
             return self.state == ConnectionState.CONNECTED
         except asyncio.TimeoutError:
             logger.error("❌ 连接超时")
             return False
     
-    async def _wait_for_connection(self):
-        """等待连接建立"""
-        while self.state in [ConnectionState.DISCONNECTED, ConnectionState.CONNECTING]:
-            await asyncio.sleep(0.1)
-    
     async def disconnect(self):
         """主动断开连接"""
         logger.info("🔌 主动断开连接")
         self.should_reconnect = False
         self.is_manual_disconnect = True
         
-        # 停止所有任务
-        if self.heartbeat_task:
-            self.heartbeat_task.cancel()
-            try:
-                await self.heartbeat_task
-            except asyncio.CancelledError:
-                pass
-        
-        if self.send_task:
-            self.send_task.cancel()
-            try:
-                await self.send_task
-            except asyncio.CancelledError:
-                pass
+        # 同时取消发送任务和连接循环
+        tasks = [t for t in (self.send_task, self.connection_task) if t]
+        for task in tasks:
+            task.cancel()
         
         # 关闭WebSocket连接
         if self.websocket:
@@ -246,13 +356,9 @@ class WebSocketReconnector:
             except Exception as e:
                 logger.error(f"❌ 关闭WebSocket异常: {e}")
         
-        # 停止连接循环
-        if self.connection_task:
-            self.connection_task.cancel()
-            try:
-                await self.connection_task
-            except asyncio.CancelledError:
-                pass
+        # 一次等待所有任务结束
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
         
         self._set_state(ConnectionState.STOPPED)
         logger.info("✅ 连接已断开")
@@ -267,16 +373,13 @@ class WebSocketReconnector:
                     # 重置重试计数
                     self.retry_count = 0
                     
-                    # 启动相关任务
-                    self.heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+                    # 启动发送任务（负责消息与心跳）
                     self.send_task = asyncio.create_task(self._send_loop())
                     
                     # 等待连接断开
                     await self._handle_connection()
                     
                     # 清理任务
-                    if self.heartbeat_task:
-                        self.heartbeat_task.cancel()
                     if self.send_task:
                         self.send_task.cancel()
                     
@@ -307,10 +410,17 @@ class WebSocketReconnector:
                 logger.error(f"❌ 连接循环异常: {e}")
                 await asyncio.sleep(5)
     
+    def _retry_delay_bounds(self) -> Tuple[float, float]:
+        """当前重试次数对应的 (抖动下限, 退避上限)"""
+        delays = self._retry_delays
+        return delays[min(self.retry_count, len(delays) - 1)]
+    
     def _calculate_retry_delay(self) -> float:
-        """计算重试延迟（指数退避）"""
-        delay = self.initial_retry_delay * (self.backoff_multiplier ** self.retry_count)
-        return min(delay, self.max_retry_delay)
+        """计算重试延迟（指数退避 + 随机抖动）
+        
+        在 [初始延迟/2, 退避上限] 内随机取值，避免服务端重启后大量客户端同时重连
+        """
+        return random.uniform(*self._retry_delay_bounds())
     
     async def _connect_once(self):
         """单次连接尝试"""
@@ -322,12 +432,7 @@ class WebSocketReconnector:
             
             # 建立WebSocket连接
             self.websocket = await asyncio.wait_for(
-                websockets.connect(
-                    self.url,
-                    ping_interval=self.heartbeat_interval,
-                    ping_timeout=self.ping_timeout,
-                    close_timeout=10
-                ),
+                self._connect_fn(),
                 timeout=self.connection_timeout
             )
             
@@ -337,7 +442,7 @@ class WebSocketReconnector:
                 timeout=10.0
             )
             
-            confirm_data = json.loads(confirmation)
+            confirm_data = orjson.loads(confirmation)
             if confirm_data.get("type") == "connection_established":
                 self._set_state(ConnectionState.CONNECTED)
                 self.stats.connection_success()
@@ -348,9 +453,12 @@ class WebSocketReconnector:
                 logger.info(f"   支持数据类型: {confirm_data.get('supported_data_types')}")
                 
                 # 调用连接成功回调
-                if self.on_connected:
+                if self._on_connected is not None:
                     try:
-                        await self.on_connected()
+                        if self._on_connected_is_coro:
+                            await self._on_connected()
+                        else:
+                            self._on_connected()
                     except Exception as e:
                         logger.error(f"❌ 连接成功回调异常: {e}")
             else:
@@ -378,78 +486,98 @@ class WebSocketReconnector:
     async def _handle_connection(self):
         """处理已建立的连接"""
         try:
-            while self.websocket and not self.websocket.closed:
-                try:
-                    # 接收消息
-                    message = await self.websocket.recv()
-                    self.stats.data_received(len(message))
-                    
-                    # 处理消息
-                    if self.on_message:
-                        try:
-                            await self.on_message(message)
-                        except Exception as e:
-                            logger.error(f"❌ 消息处理回调异常: {e}")
-                    
-                except websockets.exceptions.ConnectionClosed:
-                    logger.warning("🔴 WebSocket连接已关闭")
-                    break
-                except Exception as e:
-                    logger.error(f"❌ 消息接收异常: {e}")
-                    break
+            # 迭代器在连接正常关闭时结束，异常关闭时抛出ConnectionClosed
+            async for message in self.websocket:
+                self.stats.data_received(len(message))
+                
+                # 处理消息
+                callback = self._on_message
+                if callback is not None:
+                    try:
+                        if self._on_message_is_coro:
+                            await callback(message)
+                        else:
+                            callback(message)
+                    except Exception as e:
+                        logger.error(f"❌ 消息处理回调异常: {e}")
+            logger.warning("🔴 WebSocket连接已关闭")
                     
+        except websockets.exceptions.ConnectionClosed:
+            logger.warning("🔴 WebSocket连接已关闭")
         except Exception as e:
             logger.error(f"❌ 连接处理异常: {e}")
         finally:
-            if not self.is_manual_disconnect and self.on_disconnected:
+            if not self.is_manual_disconnect and self._on_disconnected is not None:
                 try:
-                    await self.on_disconnected()
+                    if self._on_disconnected_is_coro:
+                        await self._on_disconnected()
+                    else:
+                        self._on_disconnected()
                 except Exception as e:
                     logger.error(f"❌ 断开连接回调异常: {e}")
     
-    async def _heartbeat_loop(self):
-        """心跳循环"""
-        try:
-            while self.websocket and not self.websocket.closed:
-                await asyncio.sleep(self.heartbeat_interval)
-                
-                if self.websocket and not self.websocket.closed:
-                    try:
-                        # 发送自定义心跳消息
-                        heartbeat_msg = {
-                            "type": "client_heartbeat",
-                            "timestamp": datetime.now(timezone.utc).isoformat(),
-                            "stats": self.stats.get_stats_dict()
-                        }
-                        await self.send_message(json.dumps(heartbeat_msg))
-                        logger.debug("💓 发送心跳")
-                    except Exception as e:
-                        logger.error(f"❌ 心跳发送失败: {e}")
-                        break
-        except asyncio.CancelledError:
-            logger.debug("💓 心跳任务被取消")
-        except Exception as e:
-            logger.error(f"❌ 心跳循环异常: {e}")
+    def _build_heartbeat(self, beats: int) -> str:
+        """构造客户端心跳消息，完整统计信息每N次心跳附带一次"""
+        if beats % self.stats_every_heartbeats == 0:
+            heartbeat_msg = self._heartbeat_stats_template
+            heartbeat_msg["stats"] = self.stats.get_stats_dict()
+        else:
+            heartbeat_msg = self._heartbeat_template
+        heartbeat_msg["timestamp"] = datetime.now(timezone.utc)
+        # 以文本帧发送，服务端按二进制帧处理原始数据
+        return orjson.dumps(heartbeat_msg).decode()
     
     async def _send_loop(self):
-        """发送消息循环"""
+        """发送消息循环（启用应用层心跳时同时按心跳间隔发送客户端心跳）"""
+        pending = self._send_deque
+        event = self._send_event
+        websocket = self.websocket
+        interval = self.heartbeat_interval
+        next_heartbeat = time.monotonic() + interval if self.app_heartbeat else None
+        beats = 0
+        # 连接关闭时send()抛出ConnectionClosed，循环随之退出
         try:
-            while self.websocket and not self.websocket.closed:
+            while True:
                 try:
-                    # 从队列获取要发送的消息
-                    message = await asyncio.wait_for(
-                        self.message_queue.get(),
-                        timeout=1.0
-                    )
+                    # 队列为空时等待新消息，最多等到下一次心跳时间
+                    while not pending:
+                        if next_heartbeat is None:
+                            event.clear()
+                            await event.wait()
+                            continue
+                        timeout = next_heartbeat - time.monotonic()
+                        if timeout <= 0:
+                            break
+                        event.clear()
+                        try:
+                            await asyncio.wait_for(event.wait(), timeout=timeout)
+                        except asyncio.TimeoutError:
+                            break
+                    
+                    if next_heartbeat is not None:
+                        now = time.monotonic()
+                        if now >= next_heartbeat:
+                            beats += 1
+                            pending.append(self._build_heartbeat(beats))
+                            next_heartbeat = now + interval
+                            logger.debug("💓 发送心跳")
                     
-                    if self.websocket and not self.websocket.closed:
-                        await self.websocket.send(message)
-                        self.stats.data_sent(len(message))
-                        logger.debug(f"📤 发送消息: {len(message)} bytes")
+                    # 一次取出已积压的消息
+                    batch = [pending.popleft()]
+                    while pending and len(batch) < _SEND_BATCH_MAX:
+                        batch.append(pending.popleft())
+                    
+                    total_bytes = 0
+                    for message in batch:
+                        await websocket.send(message)
+                        total_bytes += len(message)
+                    self.stats.data_sent(total_bytes, len(batch))
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("📤 发送消息: %d 条, %d bytes", len(batch), total_bytes)
                         
-                except asyncio.TimeoutError:
-                    # 队列为空，继续循环
-                    continue
+                except websockets.exceptions.ConnectionClosed:
+                    logger.debug("📤 连接已关闭，停止发送")
+                    break
                 except Exception as e:
                     logger.error(f"❌ 消息发送失败: {e}")
                     break
@@ -459,17 +587,22 @@ class WebSocketReconnector:
         except Exception as e:
             logger.error(f"❌ 发送循环异常: {e}")
     
+    def _enqueue(self, message):
+        """放入待发送消息并唤醒发送循环"""
+        self._send_deque.append(message)
+        self._send_event.set()
+    
     async def send_message(self, message: str):
         """发送消息（异步队列）"""
         if self.state == ConnectionState.CONNECTED:
-            await self.message_queue.put(message)
+            self._enqueue(message)
         else:
             logger.warning(f"⚠️ 连接未建立，消息已丢弃: {len(message)} bytes")
     
     async def send_data(self, data: bytes):
         """发送二进制数据"""
         if self.state == ConnectionState.CONNECTED:
-            await self.message_queue.put(data)
+            self._enqueue(data)
         else:
             logger.warning(f"⚠️ 连接未建立，数据已丢弃: {len(data)} bytes")
     
@@ -481,9 +614,11 @@ class WebSocketReconnector:
             "retry_count": self.retry_count,
             "max_retries": self.max_retries,
             "should_reconnect": self.should_reconnect,
+            # websockets库根据最近一次PING/PONG计算的往返延迟（秒）
+            "ping_latency": getattr(self.websocket, "latency", None) if self.websocket else None,
             "is_manual_disconnect": self.is_manual_disconnect,
             "next_retry_delay": (
-                self._calculate_retry_delay() if self.retry_count < self.max_retries else None
+                self._retry_delay_bounds()[1] if self.retry_count < self.max_retries else None
             )
         })
         return stats
@@ -3,6 +3,8 @@
 """
 Agent管理命令行工具
 用户可以通过命令行注册、管理A2A Agent
+
+推荐在项目根目录以模块方式运行: python -m tools.agent_manager <command>
 """
 
 import asyncio
@@ -10,26 +12,28 @@ import argparse
 import sys
 import os
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 直接以脚本方式运行时，把项目根目录加入导入路径
+if not __package__:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 
-from src.config.agent_registry import get_agent_registry
+def _get_registry():
+    """按需导入Agent注册表，避免 --help 等不需要注册表的命令加载整个项目"""
+    from src.config.agent_registry import get_agent_registry
+    return get_agent_registry()
 
 async def add_agent(url: str, agent_id: str = None):
     """添加Agent"""
-    registry = get_agent_registry()
+    registry = _get_registry()
     
     print(f"🔄 正在添加Agent: {url}")
-    success = await registry.add_agent_by_card_url(url, agent_id)
+    # 注册表直接返回 (agent_id, agent_info)，无需再次查询
+    result = await registry.add_agent_by_card_url(url, agent_id)
     
-    if success:
+    if result:
         print(f"✅ 成功添加Agent!")
         # 显示Agent信息
-        if agent_id:
-            agent_info = await registry.get_agent_by_id(agent_id)
-        else:
-            # 如果没有指定ID，获取最新添加的Agent
-            all_agents = await registry.get_all_agents()
-            agent_info = list(all_agents.values())[-1] if all_agents else None
+        agent_id, agent_info = result
         
         if agent_info:
             print(f"   名称: {agent_info.get('name')}")
@@ -41,7 +45,7 @@ async def add_agent(url: str, agent_id: str = None):
 
 async def list_agents():
     """列出所有Agent"""
-    registry = get_agent_registry()
+    registry = _get_registry()
     
     print("📋 已注册的Agent:")
     all_agents = await registry.get_all_agents()
@@ -65,7 +69,7 @@ async def list_agents():
 
 async def remove_agent(agent_id: str):
     """移除Agent"""
-    registry = get_agent_registry()
+    registry = _get_registry()
     
     print(f"🗑️  正在移除Agent: {agent_id}")
     success = registry.remove_agent(agent_id)
@@ -77,21 +81,24 @@ async def remove_agent(agent_id: str):
 
 async def enable_agent(agent_id: str):
     """启用Agent"""
-    registry = get_agent_registry()
+    registry = _get_registry()
     
     success = registry.enable_agent(agent_id)
     print(f"{'✅ 已启用' if success else '❌ 启用失败'} Agent: {agent_id}")
 
 async def disable_agent(agent_id: str):
     """禁用Agent"""
-    registry = get_agent_registry()
+    registry = _get_registry()
     
     success = registry.disable_agent(agent_id)
     print(f"{'✅ 已禁用' if success else '❌ 禁用失败'} Agent: {agent_id}")
 
 async def main():
     """主函数"""
-    parser = argparse.ArgumentParser(description='A2A Agent管理工具')
+    parser = argparse.ArgumentParser(
+        description='A2A Agent管理工具',
+        epilog='在项目根目录运行: python -m tools.agent_manager <command>'
+    )
     subparsers = parser.add_subparsers(dest='command', help='可用命令')
     
     # 添加Agent
@@ -135,4 +142,10 @@ async def main():
         print(f"❌ 错误: {e}")
 
 if __name__ == "__main__":
+    # uvloop随uvicorn[standard]安装(Windows除外)，可用时用于加速CLI的网络请求
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     asyncio.run(main())